@@ -4,18 +4,21 @@ API变更分析模块
 分析代码中公共API的变更
 """
 import ast
-import os
 
+from src.utils.file_provider import as_file_provider
 
-def extract_public_api(filepath):
+
+def extract_public_api(filepath, source=None):
     """
     提取文件的公共API
     
-    包括公共函数、类和常量
+    包括公共函数、类和常量，source为None时从filepath读取
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return []
     
@@ -57,23 +60,19 @@ def extract_public_api(filepath):
     return api
 
 
-def analyze_project_api(project_path):
-    """分析整个项目的公共API"""
+def analyze_project_api(project_path, rev=None):
+    """分析整个项目的公共API，指定rev时分析该版本"""
+    provider = as_file_provider(project_path, rev)
     all_api = {}
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        api = extract_public_api(filepath, source)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            api = extract_public_api(filepath)
-            
-            if api:
-                rel_path = os.path.relpath(filepath, project_path)
-                all_api[rel_path] = api
+        if api:
+            all_api[provider.relpath(filepath)] = api
     
     return all_api
 
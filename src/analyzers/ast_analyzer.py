@@ -2,9 +2,10 @@
 高级AST分析 - 使用ast模块深度分析
 """
 import ast
-import os
 from collections import defaultdict
 
+from src.utils.file_provider import as_file_provider
+
 class ComplexityVisitor(ast.NodeVisitor):
     """圈复杂度计算器"""
     
@@ -111,11 +112,12 @@ class FunctionAnalyzer(ast.NodeVisitor):
         visitor.visit(node)
         return visitor.complexity
 
-def deep_analyze_file(filepath):
-    """深度AST分析"""
+def deep_analyze_file(filepath, source=None):
+    """深度AST分析，source为None时从filepath读取"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            source = f.read()
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
         
         tree = ast.parse(source)
         analyzer = FunctionAnalyzer()
@@ -134,26 +136,30 @@ def deep_analyze_file(filepath):
     except Exception as e:
         return {'error': str(e), 'filepath': filepath}
 
-def analyze_project_ast(project_path):
-    """分析整个项目的AST"""
+def analyze_project_ast(project_path, rev=None):
+    """
+    分析整个项目的AST
+    
+    Args:
+        project_path: 项目目录或FileProvider
+        rev: 分析指定版本（标签、提交、分支），不checkout，默认分析工作区
+    """
+    provider = as_file_provider(project_path, rev)
     results = []
     stats = defaultdict(int)
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        
+        analysis = deep_analyze_file(filepath, source)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            analysis = deep_analyze_file(filepath)
-            
-            if 'error' not in analysis:
-                results.append(analysis)
-                stats['total_files'] += 1
-                stats['total_functions'] += analysis['total_functions']
-                stats['total_classes'] += analysis['total_classes']
+        if 'error' not in analysis:
+            results.append(analysis)
+            stats['total_files'] += 1
+            stats['total_functions'] += analysis['total_functions']
+            stats['total_classes'] += analysis['total_classes']
     
     return {
         'files': results,
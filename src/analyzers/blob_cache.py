@@ -0,0 +1,146 @@
+"""
+按blob id缓存的文件指标
+
+同一份文件内容（blob）无论出现在哪个版本、哪个路径，
+AST和行数分析的结果都相同，因此以blob id为键缓存到磁盘，
+跨版本、跨提交的分析只需计算没见过的blob。
+
+主要功能：
+- compute_blob_metrics: 计算一份源码的指标（可在子进程中调用）
+- BlobMetricsCache: 磁盘缓存，get_or_compute 按需读取blob并计算
+"""
+import gzip
+import json
+import os
+
+from src.config import CACHE_DIR
+from src.analyzers.ast_analyzer import deep_analyze_file
+from src.analyzers.loc_counter import count_lines
+
+BLOB_METRICS_FILE = os.path.join(CACHE_DIR, 'blob_metrics.json.gz')
+
+# 指标的计算方式变化时递增，旧缓存自动失效
+METRICS_VERSION = 1
+
+
+def compute_blob_metrics(source):
+    """
+    计算一份Python源码的指标
+    
+    Args:
+        source: 源码文本
+    
+    Returns:
+        {'loc': {total, code, blank, comment}, 'functions', 'classes',
+         'async_functions', 'complexity_sum', 'max_complexity',
+         'function_list': [[名称, 起始行, 结束行, 复杂度], ...], 'error'}
+        语法错误时只有行数，error为True
+    """
+    loc = count_lines(None, source) or {'total': 0, 'code': 0, 'blank': 0, 'comment': 0}
+    metrics = {
+        'loc': loc,
+        'functions': 0,
+        'classes': 0,
+        'async_functions': 0,
+        'complexity_sum': 0,
+        'max_complexity': 0,
+        'function_list': [],
+        'error': False,
+    }
+    
+    analysis = deep_analyze_file(None, source)
+    if 'error' in analysis:
+        metrics['error'] = True
+        return metrics
+    
+    functions = analysis['functions']
+    complexities = [f['complexity'] for f in functions]
+    metrics.update({
+        'functions': analysis['total_functions'],
+        'classes': analysis['total_classes'],
+        'async_functions': analysis['async_functions'],
+        'complexity_sum': sum(complexities),
+        'max_complexity': max(complexities, default=0),
+        'function_list': [
+            [f['name'], f['lineno'], f.get('end_lineno', f['lineno']), f['complexity']]
+            for f in functions
+        ],
+    })
+    return metrics
+
+
+class BlobMetricsCache:
+    """
+    blob id → 指标 的磁盘缓存
+    
+    Attributes:
+        filepath: 缓存文件路径，None表示只在内存中缓存
+        computed: 本次新计算的blob数
+        reused: 本次命中缓存的次数
+    """
+    
+    def __init__(self, filepath=BLOB_METRICS_FILE):
+        self.filepath = filepath
+        self.computed = 0
+        self.reused = 0
+        self._metrics = {}
+        self._dirty = False
+        if filepath and os.path.exists(filepath):
+            try:
+                with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('version') == METRICS_VERSION:
+                self._metrics = data.get('metrics', {})
+    
+    def __len__(self):
+        return len(self._metrics)
+    
+    def __contains__(self, oid):
+        return oid in self._metrics
+    
+    def get(self, oid):
+        """已缓存的指标，没有时返回None"""
+        return self._metrics.get(oid)
+    
+    def put(self, oid, metrics):
+        """写入一个blob的指标"""
+        self._metrics[oid] = metrics
+        self._dirty = True
+    
+    def missing(self, oids):
+        """oids中尚未缓存的blob id（去重，保持顺序）"""
+        return [oid for oid in dict.fromkeys(oids) if oid not in self._metrics]
+    
+    def get_or_compute(self, oid, read_source):
+        """
+        获取blob的指标，没有缓存时调用read_source()读取源码并计算
+        
+        Args:
+            oid: blob id
+            read_source: 无参函数，返回源码文本，读取失败返回None
+        
+        Returns:
+            指标字典，源码无法读取时返回None
+        """
+        metrics = self._metrics.get(oid)
+        if metrics is not None:
+            self.reused += 1
+            return metrics
+        source = read_source()
+        if source is None:
+            return None
+        metrics = compute_blob_metrics(source)
+        self.put(oid, metrics)
+        self.computed += 1
+        return metrics
+    
+    def save(self):
+        """有新结果时写回磁盘"""
+        if not self.filepath or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.filepath) or '.', exist_ok=True)
+        with gzip.open(self.filepath, 'wt', encoding='utf-8') as f:
+            json.dump({'version': METRICS_VERSION, 'metrics': self._metrics}, f, ensure_ascii=False)
+        self._dirty = False
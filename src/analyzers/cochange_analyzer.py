@@ -0,0 +1,316 @@
+"""
+文件共同变更（co-change）分析
+
+统计哪些文件经常在同一个提交中一起修改，用于发现隐式耦合、指导重构。
+
+文件路径映射为整数id，共现次数存放在以 (a << 32) | b 为键的稀疏字典中，
+只记录实际出现过的文件对；修改文件数超过阈值的大提交（批量格式化、
+依赖升级等）不计入。提交数据来自ChangeTable，新提交到来时增量累加。
+
+主要功能：
+- CoChangeMatrix: 稀疏共现矩阵，支持 support/confidence、最强文件对、聚类
+- build_cochange_matrix: 从变更表构建
+- load_or_build_cochange: 加载已保存的矩阵并增量更新
+"""
+import gzip
+import json
+import os
+from array import array
+from collections import Counter
+
+from src.config import DATA_DIR
+from src.collectors.numstat_collector import collect_changes
+
+COCHANGE_FILE = os.path.join(DATA_DIR, 'cochange.json.gz')
+DEFAULT_MAX_FILES = 50
+
+
+def _pair_key(a, b):
+    return (a << 32) | b if a < b else (b << 32) | a
+
+
+class CoChangeMatrix:
+    """
+    稀疏的文件×文件共现矩阵
+    
+    Attributes:
+        max_files: 修改文件数超过该值的提交不计入
+        max_pairs: 文件对数量上限，超过时按共现次数从低到高删除，直到不超过上限的一半；
+            None表示不限制
+        paths: 路径列表，下标即路径id
+        file_counts: 每个文件出现在多少个计入的提交中
+        pairs: {(a << 32) | b: 共同出现的提交数}，a < b
+        commits: 计入的提交数
+        skipped: 因文件数过多被跳过的提交数
+        head: 最后处理的提交hash
+    """
+    
+    def __init__(self, max_files=DEFAULT_MAX_FILES, max_pairs=None):
+        self.max_files = max_files
+        self.max_pairs = max_pairs
+        self.paths = []
+        self._path_index = {}
+        self.file_counts = array('i')
+        self.pairs = {}
+        self.commits = 0
+        self.skipped = 0
+        self.head = None
+    
+    def __len__(self):
+        return len(self.pairs)
+    
+    def _intern(self, path):
+        pid = self._path_index.get(path)
+        if pid is None:
+            pid = len(self.paths)
+            self.paths.append(path)
+            self._path_index[path] = pid
+            self.file_counts.append(0)
+        return pid
+    
+    def add_commit(self, paths):
+        """
+        累加一个提交修改的文件
+        
+        Returns:
+            是否计入（文件数超过max_files或少于1时不计入）
+        """
+        unique = set(paths)
+        if not unique:
+            return False
+        if len(unique) > self.max_files:
+            self.skipped += 1
+            return False
+        
+        ids = sorted(self._intern(p) for p in unique)
+        self.commits += 1
+        for i, a in enumerate(ids):
+            self.file_counts[a] += 1
+            for b in ids[i + 1:]:
+                key = (a << 32) | b
+                self.pairs[key] = self.pairs.get(key, 0) + 1
+        
+        if self.max_pairs and len(self.pairs) > self.max_pairs:
+            self._shrink()
+        return True
+    
+    def update(self, table):
+        """
+        累加ChangeTable中head之后的提交
+        
+        Returns:
+            新处理的提交数
+        """
+        start = 0
+        if self.head is not None:
+            idx = table.commit_index(self.head)
+            if idx is None:
+                raise ValueError(f"变更表中没有已处理的提交 {self.head}，需要重新构建")
+            start = idx + 1
+        
+        for ci in range(start, table.num_commits):
+            rows = table.commit_rows(ci)
+            self.add_commit(table.paths[table.path_ids[i]] for i in rows)
+        if table.num_commits > start:
+            self.head = table.hashes[-1]
+        return table.num_commits - start
+    
+    def _shrink(self):
+        """
+        把文件对数量降到 max_pairs 的一半以内
+        
+        从最低的共现次数开始逐级提高删除阈值；每次删除后至少还要新增
+        max_pairs/2 个文件对才会再次触发，重建字典的开销是均摊常数。
+        """
+        target = self.max_pairs // 2
+        kept = len(self.pairs)
+        threshold = 1
+        for support, count in sorted(Counter(self.pairs.values()).items()):
+            if kept <= target:
+                break
+            kept -= count
+            threshold = support + 1
+        self.prune(threshold)
+    
+    def prune(self, min_support):
+        """
+        删除共现次数低于min_support的文件对以限制内存
+        
+        被删除的文件对之后从0重新计数，结果是近似的。
+        """
+        self.pairs = {k: v for k, v in self.pairs.items() if v >= min_support}
+    
+    def support(self, path_a, path_b):
+        """两个文件共同修改的提交数"""
+        a = self._path_index.get(path_a)
+        b = self._path_index.get(path_b)
+        if a is None or b is None or a == b:
+            return 0
+        return self.pairs.get(_pair_key(a, b), 0)
+    
+    def confidence(self, path_a, path_b):
+        """修改path_a的提交中同时修改path_b的比例"""
+        a = self._path_index.get(path_a)
+        if a is None or not self.file_counts[a]:
+            return 0.0
+        return self.support(path_a, path_b) / self.file_counts[a]
+    
+    def _iter_pairs(self, min_support, min_confidence):
+        for key, count in self.pairs.items():
+            if count < min_support:
+                continue
+            a, b = key >> 32, key & 0xFFFFFFFF
+            conf_ab = count / self.file_counts[a]
+            conf_ba = count / self.file_counts[b]
+            if max(conf_ab, conf_ba) < min_confidence:
+                continue
+            yield a, b, count, conf_ab, conf_ba
+    
+    def top_pairs(self, n=20, min_support=2, min_confidence=0.0):
+        """
+        共同修改最多的文件对
+        
+        Returns:
+            [{file_a, file_b, support, confidence_ab, confidence_ba}, ...]，
+            按support和较大的confidence降序
+        """
+        ranked = sorted(self._iter_pairs(min_support, min_confidence),
+                        key=lambda p: (-p[2], -max(p[3], p[4])))
+        return [{
+            'file_a': self.paths[a],
+            'file_b': self.paths[b],
+            'support': count,
+            'confidence_ab': round(conf_ab, 4),
+            'confidence_ba': round(conf_ba, 4),
+        } for a, b, count, conf_ab, conf_ba in ranked[:n]]
+    
+    def clusters(self, min_support=3, min_confidence=0.5):
+        """
+        按强耦合关系合并的文件簇（并查集）
+        
+        Returns:
+            文件簇列表，每个簇是路径列表，按簇大小降序，只包含2个及以上文件的簇
+        """
+        parent = {}
+        
+        def find(x):
+            root = x
+            while parent[root] != root:
+                root = parent[root]
+            while parent[x] != root:
+                parent[x], x = root, parent[x]
+            return root
+        
+        for a, b, *_ in self._iter_pairs(min_support, min_confidence):
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+        
+        groups = {}
+        for x in parent:
+            groups.setdefault(find(x), []).append(x)
+        
+        result = [sorted(self.paths[i] for i in members) for members in groups.values()]
+        return sorted(result, key=lambda c: (-len(c), c[0]))
+    
+    def to_dependency_graph(self, min_support=3, min_confidence=0.5):
+        """
+        转换为 {文件: {耦合文件, ...}}，与 build_dependency_graph 的结构相同，
+        可直接传给 dependency_charts 中的绘图函数
+        """
+        graph = {}
+        for a, b, *_ in self._iter_pairs(min_support, min_confidence):
+            graph.setdefault(self.paths[a], set()).add(self.paths[b])
+            graph.setdefault(self.paths[b], set()).add(self.paths[a])
+        return graph
+    
+    def save(self, filepath):
+        """保存为gzip压缩的JSON"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        data = {
+            'max_files': self.max_files,
+            'max_pairs': self.max_pairs,
+            'paths': self.paths,
+            'file_counts': self.file_counts.tolist(),
+            'pair_keys': list(self.pairs.keys()),
+            'pair_counts': list(self.pairs.values()),
+            'commits': self.commits,
+            'skipped': self.skipped,
+            'head': self.head,
+        }
+        with gzip.open(filepath, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, filepath):
+        """从save()生成的文件加载，文件不存在或损坏时返回None"""
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        matrix = cls(data['max_files'], data.get('max_pairs'))
+        matrix.paths = data['paths']
+        matrix._path_index = {p: i for i, p in enumerate(matrix.paths)}
+        matrix.file_counts = array('i', data['file_counts'])
+        matrix.pairs = dict(zip(data['pair_keys'], data['pair_counts']))
+        matrix.commits = data['commits']
+        matrix.skipped = data['skipped']
+        matrix.head = data['head']
+        return matrix
+
+
+def build_cochange_matrix(repo_path, table=None, max_files=DEFAULT_MAX_FILES, max_pairs=None):
+    """
+    从提交历史构建共现矩阵
+    
+    Args:
+        repo_path: 仓库路径
+        table: ChangeTable，默认全量采集
+        max_files: 修改文件数超过该值的提交不计入
+        max_pairs: 文件对数量上限，超过时从最低的共现次数开始逐级提高阈值删除文件对，
+            直到不超过上限的一半（被删除的文件对之后从0重新计数，结果是近似的），默认不限制
+    
+    Returns:
+        CoChangeMatrix
+    """
+    if table is None:
+        table = collect_changes(repo_path)
+    matrix = CoChangeMatrix(max_files, max_pairs)
+    matrix.update(table)
+    print(f"✓ 共同变更矩阵: {matrix.commits} 个提交, {len(matrix.paths)} 个文件, "
+          f"{len(matrix)} 个文件对, 跳过 {matrix.skipped} 个大提交")
+    return matrix
+
+
+def load_or_build_cochange(repo_path, filepath=COCHANGE_FILE, table=None,
+                           max_files=DEFAULT_MAX_FILES, max_pairs=None):
+    """
+    加载已保存的矩阵，只累加新提交；没有保存、阈值改变或历史被改写时重新构建
+    
+    Args:
+        repo_path: 仓库路径
+        filepath: 矩阵文件路径
+        table: ChangeTable，默认全量采集
+        max_files: 修改文件数超过该值的提交不计入
+        max_pairs: 文件对数量上限，含义同build_cochange_matrix
+    
+    Returns:
+        CoChangeMatrix
+    """
+    if table is None:
+        table = collect_changes(repo_path)
+    matrix = CoChangeMatrix.load(filepath)
+    if (matrix is None or matrix.max_files != max_files or matrix.max_pairs != max_pairs
+            or (matrix.head and table.commit_index(matrix.head) is None)):
+        matrix = build_cochange_matrix(repo_path, table, max_files, max_pairs)
+    else:
+        added = matrix.update(table)
+        print(f"✓ 增量更新共同变更矩阵: +{added} 个提交")
+    matrix.save(filepath)
+    return matrix
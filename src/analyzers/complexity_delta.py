@@ -0,0 +1,191 @@
+"""
+逐提交复杂度变化分析
+
+从ChangeTable中取出每个提交修改过的Python文件及其前后blob id，
+只分析这两个版本的文件，得到该提交带来的圈复杂度、函数数、类数变化，
+再按提交和作者汇总。作者按IdentityResolver合并为规范身份，
+与提交统计、blame归属中的作者一致。
+
+blob指标通过BlobMetricsCache复用：同一个blob只分析一次，
+缺失的blob分批交给进程池并行计算，可以处理数万个提交的历史。
+
+主要功能：
+- analyze_complexity_deltas: 计算每个提交和每个作者的复杂度变化
+- deltas_to_dataframe: 提交级结果转换为DataFrame
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.collectors.object_store import open_object_store
+from src.collectors.numstat_collector import collect_changes
+from src.analyzers.blob_cache import BlobMetricsCache, compute_blob_metrics
+from src.analyzers.identity import IdentityResolver
+
+DEFAULT_BATCH_SIZE = 200
+
+
+def _compute_batch(args):
+    """进程池任务：读取并分析一批blob"""
+    repo_path, oids = args
+    store = open_object_store(repo_path)
+    results = []
+    for oid in oids:
+        try:
+            data = store.read_blob(oid)
+        except Exception:
+            data = None
+        if data is None:
+            results.append((oid, None))
+        else:
+            results.append((oid, compute_blob_metrics(data.decode('utf-8', errors='replace'))))
+    return results
+
+
+def fill_blob_metrics(repo_path, oids, cache, max_workers=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    计算缓存中缺失的blob指标
+    
+    缺失数量不超过一个批次时直接在当前进程计算，否则分批并行。
+    
+    Args:
+        repo_path: 仓库路径
+        oids: 需要的blob id
+        cache: BlobMetricsCache
+        max_workers: 进程数，默认CPU核数
+        batch_size: 每个任务包含的blob数
+    
+    Returns:
+        新计算的blob数，读取失败的blob不计入
+    """
+    missing = cache.missing(oids)
+    if not missing:
+        return 0
+    
+    batches = [(repo_path, missing[i:i + batch_size])
+               for i in range(0, len(missing), batch_size)]
+    if len(batches) == 1 or max_workers == 1:
+        computed = _store_results(cache, map(_compute_batch, batches))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            computed = _store_results(cache, executor.map(_compute_batch, batches))
+    cache.computed += computed
+    return computed
+
+
+def _store_results(cache, batch_results):
+    """把各批结果放入缓存，返回成功计算的blob数"""
+    computed = 0
+    for batch_result in batch_results:
+        for oid, metrics in batch_result:
+            if metrics is not None:
+                cache.put(oid, metrics)
+                computed += 1
+    return computed
+
+
+def analyze_complexity_deltas(repo_path, table=None, cache=None, suffix='.py',
+                              max_workers=None, batch_size=DEFAULT_BATCH_SIZE, resolver=None):
+    """
+    计算每个提交带来的复杂度变化
+    
+    每个被修改文件的变化 = 新blob指标 - 旧blob指标，新增文件的旧blob、
+    删除文件的新blob按0计；任一版本有语法错误的文件不计入AST指标。
+    重命名时新旧路径只要有一个匹配suffix就计入，不匹配的一侧按0计
+    （例如 .py 改名为其他扩展名相当于删除）。
+    
+    Args:
+        repo_path: 仓库路径
+        table: ChangeTable，默认全量采集
+        cache: BlobMetricsCache，默认使用 cache/blob_metrics.json.gz
+        suffix: 分析的文件扩展名
+        max_workers: 进程数
+        batch_size: 每个任务包含的blob数
+        resolver: IdentityResolver（通常由提交记录构建，与提交统计共用），
+            默认用变更表中的 (署名, 邮箱) 构建
+    
+    Returns:
+        author（包括authors的键）为规范作者名：
+        {'commits': [{hash, author, timestamp, files, complexity_delta,
+                      complexity_added, complexity_removed, functions_delta,
+                      classes_delta, loc_delta}, ...],
+         'authors': {作者: {commits, complexity_delta, complexity_added,
+                           complexity_removed, functions_delta, classes_delta, loc_delta}}}
+    """
+    if table is None:
+        table = collect_changes(repo_path)
+    if cache is None:
+        cache = BlobMetricsCache()
+    if resolver is None:
+        resolver = IdentityResolver()
+        for ci in range(table.num_commits):
+            resolver.add(*table.author_of(ci))
+    
+    wanted_paths = {pid for pid, path in enumerate(table.paths) if path.endswith(suffix)}
+    blob_pairs = {}
+    for i, (pid, old_pid) in enumerate(zip(table.path_ids, table.old_path_ids)):
+        old_wanted = (old_pid if old_pid >= 0 else pid) in wanted_paths
+        new_wanted = pid in wanted_paths
+        if old_wanted or new_wanted:
+            old_oid, new_oid = table.blobs(i)
+            blob_pairs[i] = (old_oid if old_wanted else None, new_oid if new_wanted else None)
+    
+    oids = [blob for pair in blob_pairs.values() for blob in pair if blob]
+    computed = fill_blob_metrics(repo_path, oids, cache, max_workers, batch_size)
+    cache.save()
+    
+    commits = {}
+    for i, (old_oid, new_oid) in blob_pairs.items():
+        old = cache.get(old_oid) if old_oid else None
+        new = cache.get(new_oid) if new_oid else None
+        
+        ci = table.commit_idx[i]
+        entry = commits.get(ci)
+        if entry is None:
+            entry = commits[ci] = {
+                'hash': table.hashes[ci],
+                'author': resolver.display_name(*table.author_of(ci)),
+                'timestamp': table.timestamps[ci],
+                'files': 0, 'complexity_delta': 0, 'complexity_added': 0,
+                'complexity_removed': 0, 'functions_delta': 0, 'classes_delta': 0,
+                'loc_delta': 0,
+            }
+        entry['files'] += 1
+        entry['loc_delta'] += (new['loc']['code'] if new else 0) - (old['loc']['code'] if old else 0)
+        
+        if (old and old['error']) or (new and new['error']):
+            continue
+        delta = (new['complexity_sum'] if new else 0) - (old['complexity_sum'] if old else 0)
+        entry['complexity_delta'] += delta
+        if delta > 0:
+            entry['complexity_added'] += delta
+        else:
+            entry['complexity_removed'] -= delta
+        entry['functions_delta'] += (new['functions'] if new else 0) - (old['functions'] if old else 0)
+        entry['classes_delta'] += (new['classes'] if new else 0) - (old['classes'] if old else 0)
+    
+    commit_list = [commits[ci] for ci in sorted(commits)]
+    
+    authors = {}
+    for c in commit_list:
+        a = authors.setdefault(c['author'], {
+            'commits': 0, 'complexity_delta': 0, 'complexity_added': 0,
+            'complexity_removed': 0, 'functions_delta': 0, 'classes_delta': 0, 'loc_delta': 0,
+        })
+        a['commits'] += 1
+        for key in ('complexity_delta', 'complexity_added', 'complexity_removed',
+                    'functions_delta', 'classes_delta', 'loc_delta'):
+            a[key] += c[key]
+    authors = dict(sorted(authors.items(), key=lambda x: -x[1]['complexity_added']))
+    
+    print(f"✓ 复杂度变化: {len(commit_list)} 个提交, {len(blob_pairs)} 个文件变更, "
+          f"新分析 {computed} 个blob")
+    return {'commits': commit_list, 'authors': authors}
+
+
+def deltas_to_dataframe(result):
+    """提交级复杂度变化转换为DataFrame，date列为UTC时间"""
+    df = pd.DataFrame(result['commits'])
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['timestamp'], unit='s', utc=True)
+    return df
@@ -6,25 +6,25 @@
 import os
 import ast
 
+from src.utils.file_provider import as_file_provider
 
-def estimate_test_coverage(project_path):
+
+def estimate_test_coverage(project_path, rev=None):
     """
     估算测试覆盖率
     
     通过分析tests目录和src目录的文件数量比例估算
     """
+    provider = as_file_provider(project_path, rev)
     src_files = 0
     test_files = 0
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        
-        for f in files:
-            if f.endswith('.py'):
-                if 'test' in root.lower() or f.startswith('test_'):
-                    test_files += 1
-                else:
-                    src_files += 1
+    for filepath in provider.iter_files('.py'):
+        root, f = os.path.split(provider.relpath(filepath))
+        if 'test' in root.lower() or f.startswith('test_'):
+            test_files += 1
+        else:
+            src_files += 1
     
     if src_files == 0:
         return 0
@@ -33,35 +33,34 @@ def estimate_test_coverage(project_path):
     return min(ratio, 100)
 
 
-def count_test_functions(project_path):
+def count_test_functions(project_path, rev=None):
     """统计测试函数数量"""
+    provider = as_file_provider(project_path, rev)
     test_count = 0
     
-    tests_dir = os.path.join(project_path, 'tests')
-    if not os.path.exists(tests_dir):
-        return 0
-    
-    for root, dirs, files in os.walk(tests_dir):
-        for f in files:
-            if f.endswith('.py') and f.startswith('test_'):
-                filepath = os.path.join(root, f)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as file:
-                        tree = ast.parse(file.read())
-                    
-                    for node in ast.walk(tree):
-                        if isinstance(node, ast.FunctionDef):
-                            if node.name.startswith('test_'):
-                                test_count += 1
-                except:
-                    pass
+    for filepath in provider.iter_files('.py'):
+        rel_path = provider.relpath(filepath).replace(os.sep, '/')
+        if not rel_path.startswith('tests/'):
+            continue
+        if not os.path.basename(rel_path).startswith('test_'):
+            continue
+        try:
+            tree = ast.parse(provider.read_text(filepath))
+            
+            for node in ast.walk(tree):
+                if isinstance(node, ast.FunctionDef):
+                    if node.name.startswith('test_'):
+                        test_count += 1
+        except:
+            pass
     
     return test_count
 
 
-def get_test_summary(project_path):
+def get_test_summary(project_path, rev=None):
     """获取测试摘要"""
+    provider = as_file_provider(project_path, rev)
     return {
-        'estimated_coverage': estimate_test_coverage(project_path),
-        'test_function_count': count_test_functions(project_path)
+        'estimated_coverage': estimate_test_coverage(provider),
+        'test_function_count': count_test_functions(provider)
     }
@@ -4,23 +4,27 @@
 分析Python文件之间的导入依赖关系
 """
 import ast
-import os
 from collections import defaultdict
 
+from src.utils.file_provider import as_file_provider
 
-def extract_imports(filepath):
+
+def extract_imports(filepath, source=None):
     """
     提取文件的所有导入
     
     Args:
         filepath: Python文件路径
+        source: 文件内容，为None时从filepath读取
     
     Returns:
         导入模块列表
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return []
     
@@ -37,31 +41,29 @@ def extract_imports(filepath):
     return imports
 
 
-def build_dependency_graph(project_path):
+def build_dependency_graph(project_path, rev=None):
     """
     构建项目依赖图
     
     Args:
-        project_path: 项目根目录
+        project_path: 项目根目录或FileProvider
+        rev: 分析指定版本，默认分析工作区
     
     Returns:
         依赖图字典
     """
+    provider = as_file_provider(project_path, rev)
     graph = defaultdict(set)
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        rel_path = provider.relpath(filepath)
+        imports = extract_imports(filepath, source)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            rel_path = os.path.relpath(filepath, project_path)
-            imports = extract_imports(filepath)
-            
-            for imp in imports:
-                graph[rel_path].add(imp)
+        for imp in imports:
+            graph[rel_path].add(imp)
     
     return dict(graph)
 
@@ -3,11 +3,13 @@
 """
 import ast
 
-def extract_docstrings(filepath):
-    """提取文件中的docstring"""
+def extract_docstrings(filepath, source=None):
+    """提取文件中的docstring，source为None时从filepath读取"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return []
     
@@ -26,11 +28,13 @@ def extract_docstrings(filepath):
     
     return docstrings
 
-def count_documented(filepath):
+def count_documented(filepath, source=None):
     """统计文档覆盖率"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return 0, 0
     
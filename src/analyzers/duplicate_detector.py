@@ -3,10 +3,11 @@
 
 检测项目中的重复代码块
 """
-import os
 import hashlib
 from collections import defaultdict
 
+from src.utils.file_provider import as_file_provider
+
 
 def hash_code_block(lines, min_lines=5):
     """
@@ -26,51 +27,45 @@ def hash_code_block(lines, min_lines=5):
     return hashlib.md5(normalized.encode()).hexdigest()
 
 
-def find_duplicates(project_path, block_size=10):
+def find_duplicates(project_path, block_size=10, rev=None):
     """
     查找重复代码块
     
     Args:
-        project_path: 项目路径
+        project_path: 项目路径或FileProvider
         block_size: 检测的代码块大小
+        rev: 分析指定版本，默认分析工作区
     
     Returns:
         重复代码块信息
     """
+    provider = as_file_provider(project_path, rev)
     blocks = defaultdict(list)
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        lines = source.splitlines(keepends=True)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as file:
-                    lines = file.readlines()
-            except:
-                continue
+        for i in range(len(lines) - block_size + 1):
+            block = lines[i:i + block_size]
+            block_hash = hash_code_block(block)
             
-            for i in range(len(lines) - block_size + 1):
-                block = lines[i:i + block_size]
-                block_hash = hash_code_block(block)
-                
-                if block_hash:
-                    blocks[block_hash].append({
-                        'file': filepath,
-                        'start_line': i + 1,
-                        'end_line': i + block_size
-                    })
+            if block_hash:
+                blocks[block_hash].append({
+                    'file': filepath,
+                    'start_line': i + 1,
+                    'end_line': i + block_size
+                })
     
     duplicates = {k: v for k, v in blocks.items() if len(v) > 1}
     return duplicates
 
 
-def get_duplication_stats(project_path):
+def get_duplication_stats(project_path, rev=None):
     """获取重复统计"""
-    duplicates = find_duplicates(project_path)
+    duplicates = find_duplicates(project_path, rev=rev)
     
     total_duplicates = sum(len(v) for v in duplicates.values())
     unique_patterns = len(duplicates)
@@ -4,7 +4,8 @@
 分析代码中的异常处理模式
 """
 import ast
-import os
+
+from src.utils.file_provider import as_file_provider
 
 
 class ExceptionVisitor(ast.NodeVisitor):
@@ -32,11 +33,13 @@ class ExceptionVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
-def analyze_exceptions(filepath):
-    """分析单个文件的异常处理"""
+def analyze_exceptions(filepath, source=None):
+    """分析单个文件的异常处理，source为None时从filepath读取"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return None
     
@@ -53,8 +56,9 @@ def analyze_exceptions(filepath):
     }
 
 
-def analyze_project_exceptions(project_path):
-    """分析整个项目的异常处理"""
+def analyze_project_exceptions(project_path, rev=None):
+    """分析整个项目的异常处理，指定rev时分析该版本"""
+    provider = as_file_provider(project_path, rev)
     results = []
     summary = {
         'total_try_blocks': 0,
@@ -63,22 +67,18 @@ def analyze_project_exceptions(project_path):
         'all_exception_types': set()
     }
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        result = analyze_exceptions(filepath, source)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            result = analyze_exceptions(filepath)
-            
-            if result:
-                results.append(result)
-                summary['total_try_blocks'] += result['try_blocks']
-                summary['total_bare_excepts'] += result['bare_excepts']
-                summary['total_finally_blocks'] += result['finally_blocks']
-                summary['all_exception_types'].update(result['exception_types'])
+        if result:
+            results.append(result)
+            summary['total_try_blocks'] += result['try_blocks']
+            summary['total_bare_excepts'] += result['bare_excepts']
+            summary['total_finally_blocks'] += result['finally_blocks']
+            summary['all_exception_types'].update(result['exception_types'])
     
     summary['all_exception_types'] = list(summary['all_exception_types'])
     
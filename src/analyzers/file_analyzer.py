@@ -3,24 +3,28 @@
 
 分析Python文件的结构和内容
 """
-import os
 import ast
 
+from src.utils.file_provider import as_file_provider
 
-def analyze_file_structure(filepath):
+
+def analyze_file_structure(filepath, source=None):
     """
     分析单个文件结构
     
     Args:
         filepath: 文件路径
+        source: 文件内容，为None时从filepath读取
     
     Returns:
         文件结构信息字典
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        content = source
+        lines = content.split('\n')
         
         tree = ast.parse(content)
     except Exception as e:
@@ -65,13 +69,14 @@ def analyze_file_structure(filepath):
     }
 
 
-def scan_directory(path, extensions=None):
+def scan_directory(path, extensions=None, rev=None):
     """
     扫描目录获取所有文件
     
     Args:
-        path: 目录路径
+        path: 目录路径或FileProvider
         extensions: 文件扩展名列表
+        rev: 指定时列出该版本中的文件
     
     Returns:
         文件路径列表
@@ -79,30 +84,26 @@ def scan_directory(path, extensions=None):
     if extensions is None:
         extensions = ['.py']
     
-    files = []
-    
-    for root, dirs, filenames in os.walk(path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        
-        for f in filenames:
-            if any(f.endswith(ext) for ext in extensions):
-                files.append(os.path.join(root, f))
-    
-    return files
+    provider = as_file_provider(path, rev)
+    return list(provider.iter_files(tuple(extensions)))
 
 
-def get_project_summary(path):
+def get_project_summary(path, rev=None):
     """
     获取项目整体摘要
     """
-    files = scan_directory(path)
+    provider = as_file_provider(path, rev)
+    files = scan_directory(provider)
     
     total_lines = 0
     total_functions = 0
     total_classes = 0
     
     for filepath in files:
-        result = analyze_file_structure(filepath)
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        result = analyze_file_structure(filepath, source)
         if 'error' not in result:
             total_lines += result['lines']
             total_functions += result['function_count']
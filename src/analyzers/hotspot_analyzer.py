@@ -0,0 +1,126 @@
+"""
+热点分析
+
+把代码复杂度和变更历史结合起来：既复杂又频繁修改的文件/函数最值得关注。
+复杂度来自 ast_analyzer，变更频率和行数来自 ChangeTable，
+两者都整理为DataFrame后按路径一次性合并，不逐文件查询历史。
+
+函数级热点用"函数复杂度 × 所在文件的修改次数"近似，
+ChangeTable只记录到文件粒度，不区分同一文件中修改了哪个函数。
+
+主要功能：
+- analyze_hotspots: 计算文件级和函数级热点排行
+- save_hotspots: 保存为JSON
+"""
+import os
+
+import pandas as pd
+
+from src.config import OUTPUT_DIR
+from src.analyzers.ast_analyzer import analyze_project_ast
+from src.collectors.numstat_collector import collect_changes
+from src.utils.persistence import save_json
+
+DEFAULT_WINDOW_DAYS = 365
+HOTSPOTS_FILE = os.path.join(OUTPUT_DIR, 'hotspots.json')
+
+
+def _complexity_frames(ast_results, repo_path):
+    """ast_analyzer结果 → (文件级DataFrame, 函数级DataFrame)，路径相对仓库根目录"""
+    files = []
+    functions = []
+    for result in ast_results.get('files', []):
+        path = result['filepath']
+        if os.path.isabs(path) or path.startswith(str(repo_path)):
+            # 工作区分析得到的是带仓库目录的路径，版本分析得到的已是相对路径
+            path = os.path.relpath(path, repo_path)
+        path = path.replace(os.sep, '/')
+        complexities = [f['complexity'] for f in result.get('functions', [])]
+        files.append({
+            'path': path,
+            'functions': len(complexities),
+            'complexity_sum': sum(complexities),
+            'max_complexity': max(complexities, default=0),
+        })
+        for f in result.get('functions', []):
+            functions.append({
+                'path': path,
+                'function': f['name'],
+                'lineno': f['lineno'],
+                'complexity': f['complexity'],
+            })
+    return (pd.DataFrame(files, columns=['path', 'functions', 'complexity_sum', 'max_complexity']),
+            pd.DataFrame(functions, columns=['path', 'function', 'lineno', 'complexity']))
+
+
+def _churn_frame(table, window_days):
+    """统计时间窗口内每个文件的修改次数和变更行数，窗口以最后一个提交为终点"""
+    changes = table.to_dataframe()
+    if changes.empty:
+        return pd.DataFrame(columns=['path', 'commits', 'churn']), None, None
+    
+    until = int(changes['timestamp'].max())
+    since = until - window_days * 86400 if window_days else int(changes['timestamp'].min())
+    changes = changes[changes['timestamp'] >= since]
+    
+    changes = changes.assign(
+        churn=changes['additions'].clip(lower=0) + changes['deletions'].clip(lower=0),
+        path=changes['path'].astype(str),
+    )
+    churn = changes.groupby('path', observed=True).agg(
+        commits=('commit', 'nunique'),
+        churn=('churn', 'sum'),
+    ).reset_index()
+    return churn, since, until
+
+
+def analyze_hotspots(repo_path, ast_results=None, table=None, window_days=DEFAULT_WINDOW_DAYS,
+                     rev='HEAD', top_n=30):
+    """
+    计算复杂度 × 变更频率热点
+    
+    Args:
+        repo_path: 仓库路径
+        ast_results: analyze_project_ast 的结果，默认分析rev版本
+        table: ChangeTable，默认全量采集
+        window_days: 统计最近多少天的变更（以最后一个提交为终点），None表示全部历史
+        rev: ast_results为None时分析的版本
+        top_n: 返回前N个热点
+    
+    Returns:
+        {'window': {since, until, days},
+         'files': [{path, commits, churn, functions, complexity_sum, max_complexity, score}, ...],
+         'functions': [{path, function, lineno, complexity, commits, score}, ...]}
+        score 为 修改次数 × 复杂度，归一化到0~1
+    """
+    if ast_results is None:
+        ast_results = analyze_project_ast(repo_path, rev=rev)
+    if table is None:
+        table = collect_changes(repo_path)
+    
+    file_df, func_df = _complexity_frames(ast_results, repo_path)
+    churn, since, until = _churn_frame(table, window_days)
+    
+    files = file_df.merge(churn, on='path', how='inner')
+    files['raw_score'] = files['commits'] * files['complexity_sum']
+    max_score = files['raw_score'].max() if not files.empty else 0
+    files['score'] = (files['raw_score'] / max_score).round(4) if max_score else 0.0
+    files = files.sort_values(['raw_score', 'churn'], ascending=False).head(top_n)
+    
+    funcs = func_df.merge(churn[['path', 'commits']], on='path', how='inner')
+    funcs['raw_score'] = funcs['commits'] * funcs['complexity']
+    max_score = funcs['raw_score'].max() if not funcs.empty else 0
+    funcs['score'] = (funcs['raw_score'] / max_score).round(4) if max_score else 0.0
+    funcs = funcs.sort_values(['raw_score', 'complexity'], ascending=False).head(top_n)
+    
+    print(f"✓ 热点分析: {len(file_df)} 个文件, 窗口内有修改 {len(churn)} 个")
+    return {
+        'window': {'since': since, 'until': until, 'days': window_days},
+        'files': files.drop(columns='raw_score').to_dict('records'),
+        'functions': funcs.drop(columns='raw_score').to_dict('records'),
+    }
+
+
+def save_hotspots(hotspots, filepath=HOTSPOTS_FILE):
+    """保存热点排行为JSON"""
+    save_json(hotspots, filepath)
@@ -0,0 +1,244 @@
+"""
+作者身份归并
+
+同一个人常用多个邮箱或多种署名提交。git log 的 %aN/%aE 已经应用了 .mailmap，
+这里再用并查集把共享邮箱或共享署名的身份合并，每个人分配一个整数id，
+按作者统计时对整数id计数，不再以字符串为键。
+
+- 邮箱不区分大小写，署名忽略大小写和首尾空白
+- noreply、root 等通用署名/邮箱不参与合并，避免把不同的人连在一起
+- Co-authored-by 中的合作者与提交作者使用同一套id
+- 每个id的显示名唯一：不同的人署名相同（如多个 root）时，显示名附带各自的邮箱
+
+主要功能：
+- IdentityResolver: 并查集，把 (署名, 邮箱) 映射为整数id
+- parse_identity: 解析 "Name <email>" 字符串
+- canonical_authors: 每个提交的规范作者名，供可视化按作者分组
+"""
+import re
+from collections import Counter
+
+_IDENTITY_RE = re.compile(r'^\s*(.*?)\s*<([^>]*)>\s*$')
+
+# 这些署名/邮箱会被很多人共用，不作为合并依据
+GENERIC_NAMES = {'', 'root', 'unknown', 'user', 'admin', 'github', 'your name'}
+GENERIC_EMAILS = {'', 'noreply@github.com', 'you@example.com', 'root@localhost'}
+
+
+def parse_identity(text):
+    """
+    解析 "Name <email>"
+    
+    Returns:
+        (name, email)，没有尖括号时整个字符串作为署名
+    """
+    match = _IDENTITY_RE.match(text)
+    if match:
+        return match.group(1), match.group(2)
+    return text.strip(), ''
+
+
+def _text(value):
+    """署名/邮箱字段，从CSV读回的空值（NaN）等非字符串视为空"""
+    return value if isinstance(value, str) else ''
+
+
+def _co_author_list(commit):
+    """提交中的合作者列表，兼容从CSV读回的 "; " 分隔字符串和空值（NaN）"""
+    co_authors = commit.get('co_authors')
+    if isinstance(co_authors, str):
+        return [c for c in co_authors.split('; ') if c]
+    if isinstance(co_authors, list):
+        return co_authors
+    return []
+
+
+class IdentityResolver:
+    """
+    基于并查集的作者身份归并
+    
+    先用 add() 加入全部身份，再用 resolve() 取整数id；
+    加入新身份后id会重新编号。
+    """
+    
+    def __init__(self):
+        self._parent = {}       # 节点 -> 父节点，节点为 ('n', 署名) 或 ('e', 邮箱)
+        self._counts = {}       # (署名, 邮箱) -> 出现次数
+        self._ids = None        # 根节点 -> 整数id
+        self._cache = {}        # (署名, 邮箱) -> 整数id
+        self._names = []        # 整数id -> 显示名
+    
+    def __len__(self):
+        self._finalize()
+        return len(self._names)
+    
+    def _find(self, x):
+        root = x
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[x] != root:
+            self._parent[x], x = root, self._parent[x]
+        return root
+    
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[max(ra, rb)] = min(ra, rb)
+    
+    @staticmethod
+    def _nodes(name, email):
+        name_key = name.strip().lower()
+        email_key = email.strip().lower()
+        nodes = []
+        if name_key not in GENERIC_NAMES:
+            nodes.append(('n', name_key))
+        if email_key not in GENERIC_EMAILS:
+            nodes.append(('e', email_key))
+        if not nodes:
+            # 署名和邮箱都是通用值时按原样单独成组
+            nodes.append(('x', f'{name_key}<{email_key}>'))
+        return nodes
+    
+    def add(self, name, email, count=1):
+        """加入一个身份"""
+        name, email = _text(name), _text(email)
+        key = (name, email)
+        if key not in self._counts:
+            nodes = self._nodes(name, email)
+            for node in nodes:
+                self._parent.setdefault(node, node)
+            for node in nodes[1:]:
+                self._union(nodes[0], node)
+            self._ids = None
+        self._counts[key] = self._counts.get(key, 0) + count
+    
+    def add_commit(self, commit):
+        """加入提交作者和Co-authored-by合作者"""
+        self.add(commit['author'], commit.get('email', ''))
+        for text in _co_author_list(commit):
+            self.add(*parse_identity(text))
+    
+    @classmethod
+    def from_commits(cls, commits):
+        resolver = cls()
+        for commit in commits:
+            resolver.add_commit(commit)
+        return resolver
+    
+    def _finalize(self):
+        if self._ids is not None:
+            return
+        # 每组的显示名取出现次数最多的署名
+        name_counts = {}
+        email_counts = {}
+        for (name, email), count in self._counts.items():
+            root = self._find(self._nodes(name, email)[0])
+            name_counts.setdefault(root, Counter())[name] += count
+            email_counts.setdefault(root, Counter())[email] += count
+        
+        roots = sorted(name_counts, key=lambda r: (-sum(name_counts[r].values()), r))
+        self._ids = {root: i for i, root in enumerate(roots)}
+        names = [name_counts[root].most_common(1)[0][0] for root in roots]
+        
+        # 署名相同的不同身份附带邮箱区分，保证按显示名分组时不会合并不同的人
+        duplicated = {n for n, c in Counter(names).items() if c > 1}
+        labels = set()
+        for i, root in enumerate(roots):
+            if names[i] in duplicated:
+                email = email_counts[root].most_common(1)[0][0]
+                label = f'{names[i]} <{email}>'
+                if label in labels:
+                    label = f'{names[i]} #{i}'
+                names[i] = label
+            labels.add(names[i])
+        self._names = names
+        self._cache = {}
+    
+    def resolve(self, name, email=''):
+        """身份对应的整数id，未加入过的身份返回None"""
+        self._finalize()
+        key = (_text(name), _text(email))
+        name, email = key
+        pid = self._cache.get(key)
+        if pid is None and key in self._counts:
+            pid = self._ids[self._find(self._nodes(name, email)[0])]
+            self._cache[key] = pid
+        return pid
+    
+    def name_of(self, pid):
+        """整数id对应的显示名，不同id的显示名互不相同"""
+        self._finalize()
+        return self._names[pid]
+    
+    def display_name(self, name, email=''):
+        """身份的规范显示名，未加入过的身份返回原署名"""
+        pid = self.resolve(name, email)
+        return self._names[pid] if pid is not None else name
+    
+    def commit_names(self, commit, co_authors=True):
+        """
+        提交涉及的作者显示名，未加入过的身份（resolver由其他提交构建时）用原署名
+        
+        Returns:
+            去重后的显示名列表，作者在前
+        """
+        names = [self.display_name(commit['author'], commit.get('email', ''))]
+        if co_authors:
+            for text in _co_author_list(commit):
+                name = self.display_name(*parse_identity(text))
+                if name not in names:
+                    names.append(name)
+        return names
+    
+    def commit_ids(self, commit, co_authors=True):
+        """
+        提交涉及的作者id
+        
+        Args:
+            commit: 提交记录
+            co_authors: 是否包含合作者
+        
+        Returns:
+            去重后的id列表，作者在前
+        """
+        ids = [self.resolve(commit['author'], commit.get('email', ''))]
+        if co_authors:
+            for text in _co_author_list(commit):
+                pid = self.resolve(*parse_identity(text))
+                if pid not in ids:
+                    ids.append(pid)
+        return ids
+    
+    def aliases(self):
+        """
+        每个id的全部署名和邮箱
+        
+        Returns:
+            {显示名: {'names': [...], 'emails': [...]}}，只包含有多个别名的人
+        """
+        self._finalize()
+        groups = {}
+        for name, email in self._counts:
+            pid = self.resolve(name, email)
+            entry = groups.setdefault(pid, (set(), set()))
+            entry[0].add(name)
+            if email:
+                entry[1].add(email)
+        return {
+            self._names[pid]: {'names': sorted(names), 'emails': sorted(emails)}
+            for pid, (names, emails) in sorted(groups.items())
+            if len(names) > 1 or len(emails) > 1
+        }
+
+
+def canonical_authors(commits, resolver=None):
+    """
+    每个提交的规范作者名，顺序与commits一致；resolver中没有的身份用原署名
+    
+    Args:
+        commits: 提交记录列表
+        resolver: IdentityResolver，默认从commits构建
+    """
+    if resolver is None:
+        resolver = IdentityResolver.from_commits(commits)
+    return [resolver.display_name(c['author'], c.get('email', '')) for c in commits]
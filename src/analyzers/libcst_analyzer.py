@@ -4,8 +4,9 @@ libcst高级代码分析器
 """
 import libcst as cst
 from libcst import matchers as m
-from typing import List, Dict, Set
-import os
+from typing import List, Dict, Set, Optional
+
+from src.utils.file_provider import as_file_provider
 
 class ImportCollector(cst.CSTVisitor):
     """收集所有导入"""
@@ -98,11 +99,12 @@ class ClassAnalyzer(cst.CSTVisitor):
             'decorators': [d.decorator.value for d in node.decorators if hasattr(d.decorator, 'value')]
         })
 
-def analyze_with_libcst(filepath: str) -> Dict:
-    """使用libcst进行完整分析"""
+def analyze_with_libcst(filepath: str, source: Optional[str] = None) -> Dict:
+    """使用libcst进行完整分析，source为None时从filepath读取"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            source = f.read()
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
         
         tree = cst.parse_module(source)
         
@@ -128,21 +130,18 @@ def analyze_with_libcst(filepath: str) -> Dict:
     except Exception as e:
         return {'error': str(e), 'filepath': filepath}
 
-def analyze_project_libcst(project_path: str) -> Dict:
-    """分析整个项目"""
+def analyze_project_libcst(project_path, rev: Optional[str] = None) -> Dict:
+    """分析整个项目，指定rev时分析该版本"""
+    provider = as_file_provider(project_path, rev)
     results = []
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            result = analyze_with_libcst(filepath)
-            if 'error' not in result:
-                results.append(result)
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        result = analyze_with_libcst(filepath, source)
+        if 'error' not in result:
+            results.append(result)
     
     return {
         'files': results,
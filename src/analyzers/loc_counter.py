@@ -3,22 +3,26 @@
 
 统计Python项目的代码行数、空行数和注释行数。
 """
-import os
+from src.utils.file_provider import as_file_provider
 
 
-def count_lines(filepath):
+def count_lines(filepath, source=None):
     """
     统计单个文件的行数
     
     Args:
         filepath: 文件路径
+        source: 文件内容，为None时从filepath读取
     
     Returns:
         包含total, code, blank, comment的字典
     """
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+        else:
+            lines = source.splitlines(keepends=True)
         
         total = len(lines)
         blank = sum(1 for l in lines if not l.strip())
@@ -36,34 +40,31 @@ def count_lines(filepath):
         return None
 
 
-def analyze_project_loc(path):
+def analyze_project_loc(path, rev=None):
     """
     分析整个项目的代码行数
     
     Args:
-        path: 项目根目录
+        path: 项目根目录或FileProvider
+        rev: 分析指定版本，默认分析工作区
     
     Returns:
         项目整体行数统计
     """
+    provider = as_file_provider(path, rev)
     results = {'total': 0, 'code': 0, 'blank': 0, 'comment': 0, 'files': 0}
     
-    for root, dirs, files in os.walk(path):
-        # 排除隐藏目录和缓存
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath, errors='ignore')
+        if source is None:
+            continue
+        stats = count_lines(filepath, source)
         
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            stats = count_lines(filepath)
-            
-            if stats:
-                results['total'] += stats['total']
-                results['code'] += stats['code']
-                results['blank'] += stats['blank']
-                results['comment'] += stats['comment']
-                results['files'] += 1
+        if stats:
+            results['total'] += stats['total']
+            results['code'] += stats['code']
+            results['blank'] += stats['blank']
+            results['comment'] += stats['comment']
+            results['files'] += 1
     
     return results
@@ -0,0 +1,106 @@
+"""
+版本指标时间线
+
+对仓库中的每个发布标签统计代码行数、函数/类数量和复杂度。
+各版本的文件列表直接从对象库中的tree读取，文件指标按blob id
+从BlobMetricsCache获取：相邻版本之间大部分文件没有变化，
+只有第一次出现的blob需要分析，其余版本只是把缓存的结果重新加总。
+
+主要功能：
+- build_release_timeline: 计算每个版本的汇总指标
+- timeline_to_dataframe: 转换为DataFrame
+"""
+import pandas as pd
+
+from src.collectors.tag_collector import get_all_tags_info
+from src.collectors.object_store import open_object_store
+from src.analyzers.blob_cache import BlobMetricsCache
+from src.utils.file_provider import GitTreeProvider
+from src.exceptions import GitError
+
+
+def summarize_tree(provider, cache, suffix='.py'):
+    """
+    用缓存的blob指标汇总一个版本
+    
+    Args:
+        provider: GitTreeProvider
+        cache: BlobMetricsCache
+        suffix: 统计的文件扩展名
+    
+    Returns:
+        版本汇总字典
+    """
+    totals = {
+        'files': 0, 'loc_total': 0, 'loc_code': 0, 'loc_comment': 0, 'loc_blank': 0,
+        'functions': 0, 'classes': 0, 'async_functions': 0,
+        'complexity_sum': 0, 'max_complexity': 0, 'parse_errors': 0,
+    }
+    
+    for path in provider.iter_files(suffix):
+        metrics = cache.get_or_compute(provider.blob_id(path),
+                                       lambda: provider.read_text(path, errors='replace'))
+        if metrics is None:
+            continue
+        loc = metrics['loc']
+        totals['files'] += 1
+        totals['loc_total'] += loc['total']
+        totals['loc_code'] += loc['code']
+        totals['loc_comment'] += loc['comment']
+        totals['loc_blank'] += loc['blank']
+        totals['functions'] += metrics['functions']
+        totals['classes'] += metrics['classes']
+        totals['async_functions'] += metrics['async_functions']
+        totals['complexity_sum'] += metrics['complexity_sum']
+        totals['max_complexity'] = max(totals['max_complexity'], metrics['max_complexity'])
+        totals['parse_errors'] += metrics['error']
+    
+    totals['avg_complexity'] = (
+        totals['complexity_sum'] / totals['functions'] if totals['functions'] else 0
+    )
+    return totals
+
+
+def build_release_timeline(repo_path, tags=None, suffix='.py', cache=None):
+    """
+    计算每个发布版本的代码指标
+    
+    Args:
+        repo_path: 仓库路径（可以是裸仓库）
+        tags: 标签列表，默认为全部标签按日期从旧到新；指向的对象不是提交或tree的标签会被跳过
+        suffix: 统计的文件扩展名
+        cache: BlobMetricsCache，默认使用 cache/blob_metrics.json.gz
+    
+    Returns:
+        列表，每个版本一条：{tag, hash, date, files, loc_*, functions, classes,
+        async_functions, complexity_sum, avg_complexity, max_complexity, parse_errors}
+    """
+    if tags is None:
+        tags = get_all_tags_info(repo_path, sort='date')
+    if cache is None:
+        cache = BlobMetricsCache()
+    store = open_object_store(repo_path)
+    
+    timeline = []
+    for tag in tags:
+        try:
+            provider = GitTreeProvider(repo_path, tag['hash'], store)
+        except GitError as e:
+            print(f"⚠ 跳过标签 {tag['tag']}: {e}")
+            continue
+        row = {'tag': tag['tag'], 'hash': tag['hash'], 'date': tag['date']}
+        row.update(summarize_tree(provider, cache, suffix))
+        timeline.append(row)
+    
+    cache.save()
+    print(f"✓ 版本时间线: {len(timeline)} 个版本, 新分析 {cache.computed} 个blob, "
+          f"复用 {cache.reused} 次")
+    return timeline
+
+
+def timeline_to_dataframe(timeline):
+    """转换为以版本为行的DataFrame，date列为UTC时间"""
+    df = pd.DataFrame(timeline)
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
+    return df
@@ -8,19 +8,31 @@ from collections import Counter
 from datetime import datetime
 import pandas as pd
 
+from src.analyzers.identity import IdentityResolver
 
-def get_author_stats(commits):
+
+def get_author_stats(commits, resolver=None, co_authors=True):
     """
     统计作者贡献数量
     
+    同一个人的多个署名/邮箱合并计数，按规范显示名统计；
+    显示名按id唯一，署名相同的不同的人不会互相覆盖。
+    resolver中没有的身份（resolver由其他提交构建时）按原署名计数。
+    
     Args:
         commits: 提交记录列表
+        resolver: IdentityResolver，默认从commits构建
+        co_authors: 是否把Co-authored-by合作者也计入该提交
     
     Returns:
         作者贡献统计字典，按贡献数降序排列
     """
-    authors = Counter(c['author'] for c in commits)
-    return dict(authors.most_common())
+    if resolver is None:
+        resolver = IdentityResolver.from_commits(commits)
+    counts = Counter()
+    for c in commits:
+        counts.update(resolver.commit_names(c, co_authors))
+    return dict(counts.most_common())
 
 
 def get_time_distribution(commits):
@@ -69,20 +81,24 @@ def get_message_stats(commits):
     return types
 
 
-def generate_report(commits):
+def generate_report(commits, resolver=None):
     """
     生成完整统计报告
     
     Args:
         commits: 提交记录列表
+        resolver: IdentityResolver，默认从commits构建
     
     Returns:
         包含所有统计信息的字典
     """
+    if resolver is None:
+        resolver = IdentityResolver.from_commits(commits)
     return {
         'total_commits': len(commits),
-        'unique_authors': len(set(c['author'] for c in commits)),
-        'author_stats': get_author_stats(commits),
+        'unique_authors': len(resolver),
+        'author_stats': get_author_stats(commits, resolver),
+        'co_authored_commits': sum(1 for c in commits if c.get('co_authors')),
         'time_distribution': get_time_distribution(commits),
         'message_types': get_message_stats(commits)
     }
@@ -3,21 +3,24 @@
 
 分析代码风格和规范性
 """
-import os
 import re
 
+from src.utils.file_provider import as_file_provider
 
-def check_naming_conventions(filepath):
+
+def check_naming_conventions(filepath, source=None):
     """
     检查命名规范
     
-    检查变量、函数、类的命名是否符合PEP8规范
+    检查变量、函数、类的命名是否符合PEP8规范，source为None时从filepath读取
     """
     issues = []
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        lines = source.splitlines(keepends=True)
     except:
         return issues
     
@@ -39,13 +42,15 @@ def check_naming_conventions(filepath):
     return issues
 
 
-def check_line_length(filepath, max_length=120):
+def check_line_length(filepath, max_length=120, source=None):
     """检查行长度"""
     long_lines = []
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        lines = source.splitlines(keepends=True)
     except:
         return long_lines
     
@@ -59,24 +64,21 @@ def check_line_length(filepath, max_length=120):
     return long_lines
 
 
-def analyze_code_style(project_path):
-    """分析整个项目的代码风格"""
+def analyze_code_style(project_path, rev=None):
+    """分析整个项目的代码风格，指定rev时分析该版本"""
+    provider = as_file_provider(project_path, rev)
     results = {
         'files_checked': 0,
         'naming_issues': 0,
         'long_lines': 0
     }
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        
-        for f in files:
-            if not f.endswith('.py'):
-                continue
-            
-            filepath = os.path.join(root, f)
-            results['files_checked'] += 1
-            results['naming_issues'] += len(check_naming_conventions(filepath))
-            results['long_lines'] += len(check_line_length(filepath))
+    for filepath in provider.iter_files('.py'):
+        source = provider.read_text(filepath)
+        if source is None:
+            continue
+        results['files_checked'] += 1
+        results['naming_issues'] += len(check_naming_conventions(filepath, source))
+        results['long_lines'] += len(check_line_length(filepath, source=source))
     
     return results
@@ -0,0 +1,223 @@
+"""
+代码年龄与行存活分析
+
+为每一行记录它的写入时间，按发布版本顺序逐个处理版本tree：
+- 第一个版本中的文件用 git blame 取得逐行的真实作者时间
+- 路径和blob都没变的文件直接沿用上一版本的逐行时间
+- 内容变化的文件与上一版本的内容做difflib比对，相同的行沿用时间，
+  其余行以当前版本的日期计（精度为一个发布周期）
+- 新路径先按两个版本之间的重命名（git diff -M）找到旧路径，
+  或按blob找到上一版本中的同一内容，沿用那份时间；
+  都找不到的新文件同样用 git blame 取得逐行时间
+
+只有第一个版本和新出现的文件需要运行git blame，其余版本只对变化的文件做一次diff。
+日期无法解析或不指向提交的标签会被跳过。
+
+主要功能：
+- analyze_survival: 计算各版本的年份队列行数、存活率和代码年龄中位数
+- save_survival: 保存为JSON
+"""
+import difflib
+import os
+import subprocess
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+
+from src.config import OUTPUT_DIR
+from src.collectors.blame_collector import blame_line_times
+from src.collectors.tag_collector import get_all_tags_info
+from src.collectors.object_store import open_object_store
+from src.exceptions import GitError
+from src.utils.file_provider import GitTreeProvider
+from src.utils.persistence import save_json
+
+SURVIVAL_FILE = os.path.join(OUTPUT_DIR, 'survival.json')
+SECONDS_PER_DAY = 86400
+
+
+def _split_lines(text):
+    """按换行符分行，与git blame的行一一对应"""
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def _carry_over(old_lines, old_times, new_lines, now):
+    """
+    按diff把旧版本的逐行时间映射到新版本
+    
+    Returns:
+        (逐行时间, 新写入的行数)，新写入的行记为now
+    """
+    times = array('q', [now]) * len(new_lines)
+    fresh = len(new_lines)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            times[j1:j2] = old_times[i1:i2]
+            fresh -= j2 - j1
+    return times, fresh
+
+
+def _renames(repo_path, old, new):
+    """两个版本之间的重命名 {新路径: 旧路径}，git命令失败时为空"""
+    cmd = ['git', 'diff', '--find-renames', '--name-status', '-z', old, new, '--']
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8', errors='replace')
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    tokens = output.split('\0')
+    renames = {}
+    i = 0
+    while i < len(tokens):
+        status = tokens[i]
+        if not status:
+            i += 1
+        elif status[0] in 'RC':
+            if status[0] == 'R' and i + 2 < len(tokens):
+                renames[tokens[i + 2]] = tokens[i + 1]
+            i += 3
+        else:
+            i += 2
+    return renames
+
+
+def _tag_time(tag):
+    """标签日期的Unix时间戳，无法解析时返回None"""
+    try:
+        return int(datetime.fromisoformat(tag['date']).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _weighted_median(counts):
+    """{值: 数量} 的中位数"""
+    total = sum(counts.values())
+    if not total:
+        return None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def analyze_survival(repo_path, tags=None, suffix='.py'):
+    """
+    跨版本的行存活分析
+    
+    Args:
+        repo_path: 仓库路径（可以是裸仓库）
+        tags: 标签列表，默认为全部标签按日期从旧到新
+        suffix: 统计的文件扩展名，None表示全部文件
+    
+    Returns:
+        {'releases': [{tag, date, lines, median_age_days, cohorts: {年份: 存活行数}}, ...],
+         'cohorts': {年份: {'added': 该年份写入的总行数,
+                           'survival': [该年份的行在各版本中的存活比例, ...]}}}
+    """
+    if tags is None:
+        tags = get_all_tags_info(repo_path, sort='date')
+    store = open_object_store(repo_path)
+    
+    years = {}
+    
+    def year_of(ts):
+        year = years.get(ts)
+        if year is None:
+            year = years[ts] = datetime.fromtimestamp(ts, timezone.utc).year
+        return year
+    
+    prev_files = {}     # 路径 -> (blob, 逐行时间, 按时间计数)
+    prev_commit = None
+    releases = []
+    added = Counter()   # 年份 -> 写入的行数
+    reused = diffed = blamed = 0
+    
+    for tag in tags:
+        release_time = _tag_time(tag)
+        if release_time is None:
+            print(f"⚠ 跳过标签 {tag.get('tag')}: 无法解析日期 {tag.get('date')!r}")
+            continue
+        try:
+            provider = GitTreeProvider(repo_path, tag['hash'], store)
+        except GitError as e:
+            print(f"⚠ 跳过标签 {tag['tag']}: {e}")
+            continue
+        
+        prev_by_blob = {entry[0]: entry for entry in prev_files.values()}
+        renames = _renames(repo_path, prev_commit, tag['hash']) if prev_commit else {}
+        files = {}
+        alive = Counter()   # 写入时间 -> 存活行数
+        
+        for path in provider.iter_files(suffix):
+            blob = provider.blob_id(path)
+            prev = prev_files.get(path)
+            if prev is None and path in renames:
+                prev = prev_files.get(renames[path])
+            if prev is not None and prev[0] == blob:
+                entry = prev
+                reused += 1
+            elif blob in prev_by_blob:
+                entry = prev_by_blob[blob]
+                reused += 1
+            else:
+                text = provider.read_text(path, errors='replace')
+                if text is None:
+                    continue
+                new_lines = _split_lines(text)
+                if prev is not None:
+                    old_text = store.read_blob(prev[0]).decode('utf-8', errors='replace')
+                    times, fresh = _carry_over(_split_lines(old_text), prev[1], new_lines, release_time)
+                    added[year_of(release_time)] += fresh
+                    diffed += 1
+                else:
+                    times = blame_line_times(repo_path, path, tag['hash'])
+                    if times is None or len(times) != len(new_lines):
+                        times = array('q', [release_time]) * len(new_lines)
+                    blamed += 1
+                    for ts, count in Counter(times).items():
+                        added[year_of(ts)] += count
+                entry = (blob, times, Counter(times))
+            
+            files[path] = entry
+            alive.update(entry[2])
+        
+        cohorts = Counter()
+        ages = Counter()
+        for ts, count in alive.items():
+            cohorts[year_of(ts)] += count
+            ages[max(release_time - ts, 0) // SECONDS_PER_DAY] += count
+        
+        releases.append({
+            'tag': tag['tag'],
+            'date': tag['date'],
+            'lines': sum(alive.values()),
+            'median_age_days': _weighted_median(ages),
+            'cohorts': {str(y): c for y, c in sorted(cohorts.items())},
+        })
+        prev_files = files
+        prev_commit = tag['hash']
+    
+    cohort_table = {}
+    for year in sorted(added):
+        total = added[year]
+        cohort_table[str(year)] = {
+            'added': total,
+            'survival': [
+                round(r['cohorts'].get(str(year), 0) / total, 4) if total else 0
+                for r in releases
+            ],
+        }
+    
+    print(f"✓ 行存活分析: {len(releases)} 个版本, 沿用归属 {reused} 次, "
+          f"diff {diffed} 个文件, blame {blamed} 个文件")
+    return {'releases': releases, 'cohorts': cohort_table}
+
+
+def save_survival(survival, filepath=SURVIVAL_FILE):
+    """保存存活分析结果为JSON"""
+    save_json(survival, filepath)
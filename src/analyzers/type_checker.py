@@ -3,11 +3,13 @@
 """
 import ast
 
-def check_type_annotations(filepath):
-    """检查类型注解"""
+def check_type_annotations(filepath, source=None):
+    """检查类型注解，source为None时从filepath读取"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source)
     except:
         return {'total': 0, 'annotated': 0}
     
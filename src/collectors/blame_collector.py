@@ -1,7 +1,32 @@
 """
 Git blame分析
+
+- get_blame_info: 单个文件逐行的blame信息
+- blame_file_summary: 流式解析blame输出，直接汇总作者/行数/年份
+- blame_line_times: 逐行的作者时间
+- get_project_blame: 全仓库归属统计，多进程并行，按(版本, 路径, blob id)缓存到磁盘，
+  每个仓库一个缓存文件
+
+逐文件的汇总以 "署名 <邮箱>" 记录作者，输出前用 IdentityResolver
+合并为规范身份，与提交统计中的作者一致。
 """
+import hashlib
+import json
+import os
 import subprocess
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from src.analyzers.identity import IdentityResolver, parse_identity
+from src.config import CACHE_DIR
+
+# 每个仓库的缓存文件放在该目录下，以git目录路径的hash命名
+BLAME_CACHE_DIR = os.path.join(CACHE_DIR, 'blame')
+# 缓存格式版本，汇总结构或缓存键变化时递增，旧缓存自动失效
+BLAME_CACHE_VERSION = 3
+
 
 def get_blame_info(repo_path, filepath):
     """获取文件的blame信息"""
@@ -26,13 +51,295 @@ def get_blame_info(repo_path, filepath):
     
     return blame
 
-def get_file_authors(repo_path, filepath):
-    """获取文件的所有作者"""
-    blame = get_blame_info(repo_path, filepath)
-    authors = {}
+
+def _run_blame(repo_path, filepath, rev=None):
+    """
+    流式解析 git blame --porcelain 输出
+    
+    porcelain格式中每个提交的作者信息只出现一次，逐行只记录提交hash。
+    
+    Returns:
+        (逐行的提交hash列表, {提交hash: {author, mail, time}})，失败时返回None
+    """
+    cmd = ['git', 'blame', '--porcelain']
+    if rev:
+        cmd.append(rev)
+    cmd += ['--', filepath]
+    
+    try:
+        proc = subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    
+    line_shas = []
+    commit_info = {}
+    interned = {}
+    current = None
+    expect_header = True
+    
+    for raw in proc.stdout:
+        if expect_header:
+            sha = raw[:40].decode('ascii', errors='replace')
+            # 同一提交的各行共用一个字符串对象
+            current = interned.setdefault(sha, sha)
+            commit_info.setdefault(current, {})
+            line_shas.append(current)
+            expect_header = False
+            continue
+        if raw.startswith(b'\t'):
+            expect_header = True
+        elif raw.startswith(b'author '):
+            commit_info[current]['author'] = raw[7:].rstrip(b'\n').decode('utf-8', errors='replace')
+        elif raw.startswith(b'author-mail '):
+            commit_info[current]['mail'] = raw[12:].rstrip(b'\n').decode('utf-8', errors='replace')
+        elif raw.startswith(b'author-time '):
+            commit_info[current]['time'] = int(raw[12:])
+    
+    proc.stdout.close()
+    if proc.wait() != 0:
+        return None
+    return line_shas, commit_info
+
+
+def blame_file_summary(repo_path, filepath, rev=None):
+    """
+    流式解析 git blame --porcelain 输出并就地汇总
+    
+    逐行只统计提交hash，最后再按作者和年份汇总，不为每行创建字典。
+    
+    Args:
+        repo_path: 仓库路径
+        filepath: 文件相对路径
+        rev: 从哪个版本开始blame，默认None表示工作区
+    
+    Returns:
+        {'lines', 'authors': {"署名 <邮箱>": 行数}, 'years': {年份: 行数}}，失败时返回None
+    """
+    result = _run_blame(repo_path, filepath, rev)
+    if result is None:
+        return None
+    line_shas, commit_info = result
+    line_counts = Counter(line_shas)
+    
+    authors = Counter()
+    years = Counter()
+    for sha, count in line_counts.items():
+        info = commit_info.get(sha, {})
+        authors[f"{info.get('author', 'Unknown')} {info.get('mail', '<>')}"] += count
+        ts = info.get('time')
+        if ts is not None:
+            years[datetime.fromtimestamp(ts, timezone.utc).year] += count
+    
+    return {
+        'lines': len(line_shas),
+        'authors': dict(authors.most_common()),
+        'years': {str(y): c for y, c in sorted(years.items())},
+    }
+
+
+def blame_line_times(repo_path, filepath, rev=None):
+    """
+    逐行的作者时间
+    
+    Returns:
+        array('q')，与文件的行一一对应的Unix时间戳，失败时返回None
+    """
+    result = _run_blame(repo_path, filepath, rev)
+    if result is None:
+        return None
+    line_shas, commit_info = result
+    return array('q', [commit_info[sha].get('time', 0) for sha in line_shas])
+
+
+def _identity_resolver(counts_list):
+    """从若干 {"署名 <邮箱>": 行数} 构建IdentityResolver"""
+    resolver = IdentityResolver()
+    for counts in counts_list:
+        for identity, count in counts.items():
+            resolver.add(*parse_identity(identity), count=count)
+    return resolver
+
+
+def canonical_author_counts(counts, resolver):
+    """
+    把 {"署名 <邮箱>": 行数} 按规范身份合并
+    
+    Returns:
+        {显示名: 行数}，按行数降序；resolver中没有的身份保留原署名
+    """
+    merged = Counter()
+    for identity, count in counts.items():
+        merged[resolver.display_name(*parse_identity(identity))] += count
+    return dict(merged.most_common())
+
+
+def get_file_authors(repo_path, filepath, resolver=None):
+    """
+    获取文件的所有作者
+    
+    Args:
+        resolver: IdentityResolver，默认只用该文件中的身份构建
+    
+    Returns:
+        {规范作者名: 行数}
+    """
+    summary = blame_file_summary(repo_path, filepath)
+    if summary is None:
+        return {}
+    if resolver is None:
+        resolver = _identity_resolver([summary['authors']])
+    return canonical_author_counts(summary['authors'], resolver)
+
+
+def _list_tree_blobs(repo_path, rev):
+    """列出某个版本中的全部文件及其blob id"""
+    cmd = ['git', 'ls-tree', '-r', '-z', rev]
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path)
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    
+    blobs = []
+    for entry in output.decode('utf-8', errors='replace').split('\0'):
+        if not entry:
+            continue
+        meta, path = entry.split('\t', 1)
+        _, obj_type, oid = meta.split(' ')
+        if obj_type == 'blob':
+            blobs.append((path, oid))
+    return blobs
+
+
+def _blame_worker(args):
+    """进程池任务：blame单个文件"""
+    repo_path, rev, path, blob = args
+    return path, blob, blame_file_summary(repo_path, path, rev)
+
+
+def blame_cache_file(repo_path, cache_dir=BLAME_CACHE_DIR):
+    """
+    仓库对应的blame缓存文件
+    
+    以git公共目录（worktree共享）的绝对路径的hash命名，
+    不同仓库的缓存互不覆盖；不是git仓库时返回None
+    """
+    try:
+        git_dir = subprocess.check_output(['git', 'rev-parse', '--git-common-dir'], cwd=repo_path,
+                                          encoding='utf-8', stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    git_dir = os.path.realpath(os.path.join(repo_path, git_dir))
+    digest = hashlib.sha1(git_dir.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'{digest}.json')
+
+
+def _load_blame_cache(cache_file):
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == BLAME_CACHE_VERSION:
+                return cache['entries']
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+    return {}
+
+
+def _save_blame_cache(cache_file, cache):
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': BLAME_CACHE_VERSION, 'entries': cache}, f, ensure_ascii=False)
+
+
+def get_project_blame(repo_path, rev='HEAD', suffixes=None, max_workers=None,
+                      cache_file=None, cache_dir=BLAME_CACHE_DIR, resolver=None):
+    """
+    全仓库blame归属统计
+    
+    用进程池并行blame所有文件，结果按 (版本, 路径, blob id) 缓存到磁盘。
+    blame取决于文件的整个历史而不只是当前内容（例如改动后又还原，内容相同但归属不同），
+    因此键中包含统计的版本；同一版本重复统计时直接读缓存。
+    缓存只保留当前版本中存在的文件。
+    
+    Args:
+        repo_path: 仓库路径
+        rev: 统计的版本
+        suffixes: 只统计这些扩展名的文件，如 ('.py',)，默认全部
+        max_workers: 进程数，默认CPU核数
+        cache_file: 缓存文件路径，默认为 cache_dir 下该仓库的缓存文件
+        cache_dir: 按仓库存放缓存的目录，与cache_file都为None时不使用缓存
+        resolver: IdentityResolver（通常由提交记录构建，与提交统计共用），
+            默认用blame中出现的身份构建
+    
+    Returns:
+        {'head', 'files', 'lines', 'authors', 'years', 'age_histogram', 'by_file'}，
+        authors（包括by_file中的）以规范作者名为键；版本无法解析时head为None，其余为空
+    """
+    try:
+        head = subprocess.check_output(['git', 'rev-parse', '--verify', f'{rev}^{{commit}}'],
+                                       cwd=repo_path, encoding='utf-8',
+                                       stderr=subprocess.DEVNULL).strip()
+        head_time = int(subprocess.check_output(['git', 'show', '-s', '--format=%ct', head],
+                                                cwd=repo_path, encoding='utf-8').strip())
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"✗ 无法解析版本 {rev}: {e}")
+        return {'head': None, 'files': 0, 'lines': 0, 'authors': {}, 'years': {},
+                'age_histogram': {}, 'by_file': {}}
+    head_year = datetime.fromtimestamp(head_time, timezone.utc).year
+    
+    blobs = _list_tree_blobs(repo_path, head)
+    if suffixes:
+        blobs = [(p, b) for p, b in blobs if p.endswith(tuple(suffixes))]
+    
+    if cache_file is None and cache_dir:
+        cache_file = blame_cache_file(repo_path, cache_dir)
+    cache = _load_blame_cache(cache_file) if cache_file else {}
+    by_file = {}
+    todo = []
+    for path, blob in blobs:
+        cached = cache.get(f'{head}\0{path}\0{blob}')
+        if cached is not None:
+            by_file[path] = cached
+        else:
+            todo.append((repo_path, head, path, blob))
+    
+    print(f"  blame: {len(blobs)} 个文件, 缓存命中 {len(by_file)}, 需计算 {len(todo)}")
+    
+    new_cache = {f'{head}\0{p}\0{b}': by_file[p] for p, b in blobs if p in by_file}
+    if todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunksize = max(1, len(todo) // ((max_workers or os.cpu_count() or 1) * 4))
+            for path, blob, summary in executor.map(_blame_worker, todo, chunksize=chunksize):
+                if summary is None:
+                    continue
+                by_file[path] = summary
+                new_cache[f'{head}\0{path}\0{blob}'] = summary
+    
+    if cache_file:
+        _save_blame_cache(cache_file, new_cache)
+    
+    if resolver is None:
+        resolver = _identity_resolver(s['authors'] for s in by_file.values())
+    by_file = {path: dict(summary, authors=canonical_author_counts(summary['authors'], resolver))
+               for path, summary in by_file.items()}
+    
+    authors = Counter()
+    years = Counter()
+    for summary in by_file.values():
+        authors.update(summary['authors'])
+        years.update(summary['years'])
     
-    for b in blame:
-        author = b.get('author', 'Unknown')
-        authors[author] = authors.get(author, 0) + 1
+    age_histogram = Counter()
+    for year, count in years.items():
+        age_histogram[str(head_year - int(year))] += count
     
-    return authors
+    return {
+        'head': head,
+        'files': len(by_file),
+        'lines': sum(s['lines'] for s in by_file.values()),
+        'authors': dict(authors.most_common()),
+        'years': dict(sorted(years.items())),
+        'age_histogram': dict(sorted(age_histogram.items(), key=lambda x: int(x[0]))),
+        'by_file': by_file,
+    }
@@ -2,25 +2,58 @@
 分支采集模块
 
 获取Git仓库的分支信息。
+get_branch_inventory 用一次 git for-each-ref 列出全部分支，
+再用一次 git log 读出提交图（CommitGraph），在内存中计算
+每个分支的提交数以及相对默认分支的领先/落后数。
 """
 import subprocess
+from datetime import datetime
 
+from src.collectors.commit_graph import build_commit_graph
 
-def get_branches(repo_path):
-    """获取所有分支列表"""
-    cmd = ['git', 'branch', '-a']
+BRANCH_FORMAT = '%00'.join([
+    '%(refname)', '%(objectname)', '%(committerdate:iso-strict)', '%(symref)',
+])
+
+
+def _timestamp(date):
+    """ISO日期的Unix时间戳，空或无法解析时为0"""
     try:
-        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8')
-    except:
-        return []
+        return datetime.fromisoformat(date).timestamp()
+    except (TypeError, ValueError):
+        return 0
+
+
+def _list_branch_refs(repo_path):
+    """
+    一次for-each-ref列出本地和远程分支，跳过 origin/HEAD 这类符号引用
     
-    branches = []
-    for line in output.strip().split('\n'):
-        branch = line.strip().lstrip('* ')
-        if branch:
-            branches.append(branch)
+    Returns:
+        [(name, ref, hash, date)]，远程分支名与 git branch -a 一致，如 remotes/origin/main
+    """
+    cmd = ['git', 'for-each-ref', 'refs/heads', 'refs/remotes', f'--format={BRANCH_FORMAT}']
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8', errors='replace')
+    except (OSError, subprocess.CalledProcessError):
+        return []
     
-    return branches
+    refs = []
+    for line in output.split('\n'):
+        parts = line.split('\0')
+        if len(parts) != 4 or parts[3]:
+            continue
+        ref, oid, date, _ = parts
+        if ref.startswith('refs/heads/'):
+            name = ref[len('refs/heads/'):]
+        else:
+            name = ref[len('refs/'):]
+        refs.append((name, ref, oid, date))
+    return refs
+
+
+def get_branches(repo_path):
+    """获取所有分支列表"""
+    return [name for name, _, _, _ in _list_branch_refs(repo_path)]
 
 
 def get_current_branch(repo_path):
@@ -41,3 +74,83 @@ def get_branch_commits(repo_path, branch):
         return int(output.strip())
     except:
         return 0
+
+
+def get_default_branch(repo_path):
+    """
+    获取默认分支名
+    
+    依次尝试 origin/HEAD 指向的分支、当前分支、main、master。
+    """
+    try:
+        output = subprocess.check_output(
+            ['git', 'symbolic-ref', '--quiet', 'refs/remotes/origin/HEAD'],
+            cwd=repo_path, encoding='utf-8', stderr=subprocess.DEVNULL)
+        return output.strip()[len('refs/'):]
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    
+    current = get_current_branch(repo_path)
+    if current:
+        return current
+    names = set(get_branches(repo_path))
+    for name in ('main', 'master'):
+        if name in names:
+            return name
+    return None
+
+
+def get_branch_inventory(repo_path, default_branch=None):
+    """
+    获取全部分支的清单
+    
+    只启动两个git进程：for-each-ref 列出分支，git log 读出提交图（CommitGraph），
+    领先/落后数按拓扑顺序只遍历分支与默认分支不同的部分，
+    提交数由默认分支的提交数推出，分支共享同一个提交时只算一次。
+    
+    Args:
+        repo_path: 仓库路径
+        default_branch: 作为比较基准的分支，默认自动检测
+    
+    Returns:
+        分支列表（按最后提交时间倒序），每条包含:
+        name, ref, hash, date, commits, ahead, behind, is_default
+    """
+    refs = _list_branch_refs(repo_path)
+    if not refs:
+        return []
+    
+    default_branch = default_branch or get_default_branch(repo_path)
+    default_tip = next((oid for name, _, oid, _ in refs if name == default_branch), None)
+    if default_tip is None:
+        default_branch, default_tip = refs[0][0], refs[0][2]
+    
+    tips = sorted({oid for _, _, oid, _ in refs})
+    graph = build_commit_graph(repo_path, tips)
+    
+    counts = {}
+    if default_tip in graph:
+        # 默认分支的祖先只完整遍历一次；每个分支只遍历与默认分支不同的部分
+        base = graph.ancestor_count(default_tip)
+        for tip in tips:
+            ahead, behind = graph.ahead_behind(tip, default_tip)
+            counts[tip] = (base - behind + ahead, ahead, behind)
+    else:
+        print("⚠ 无法读取提交图，分支提交数记为0")
+    
+    inventory = []
+    for name, ref, oid, date in refs:
+        total, ahead, behind = counts.get(oid, (0, 0, 0))
+        inventory.append({
+            'name': name,
+            'ref': ref,
+            'hash': oid,
+            'date': date,
+            'commits': total,
+            'ahead': ahead,
+            'behind': behind,
+            'is_default': name == default_branch
+        })
+    
+    inventory.sort(key=lambda b: _timestamp(b['date']), reverse=True)
+    return inventory
@@ -0,0 +1,292 @@
+"""
+内存中的提交图
+
+一次 git log --topo-order --reverse --format="%H %P" 读出整个提交图，
+提交hash映射为连续的整数id（按拓扑顺序分配，父提交的id总是小于子提交），
+父提交以CSR形式存放在两个整数数组中：
+    parents[offsets[i]:offsets[i + 1]] 为提交i的父提交id，第一个即第一父提交。
+
+同时预先计算代数（generation number）：根提交为1，其余为父提交的最大代数+1。
+祖先判断、merge-base、第一父提交主线、两个版本之间的提交都在内存中完成，
+不再为每次查询启动git进程。浅克隆边界之外的父提交不在图中，视为不存在。
+
+主要功能：
+- CommitGraph: 提交图，支持 is_ancestor / merge_base / first_parent / is_merge /
+  commits_between / ahead_behind / ancestor_count
+- build_commit_graph: 从仓库构建提交图
+"""
+import heapq
+import subprocess
+from array import array
+
+_STALE = 4
+
+
+class CommitGraph:
+    """
+    整数索引的提交图
+    
+    Attributes:
+        hashes: 提交hash列表，下标即提交id
+        offsets: 长度为提交数+1的数组，提交i的父提交位于parents[offsets[i]:offsets[i+1]]
+        parents: 扁平的父提交id数组
+        generations: 每个提交的代数
+    """
+    
+    def __init__(self):
+        self.hashes = []
+        self._index = {}
+        self.offsets = array('i', [0])
+        self.parents = array('i')
+        self.generations = array('i')
+    
+    def __len__(self):
+        return len(self.hashes)
+    
+    def __contains__(self, commit):
+        return commit in self._index
+    
+    def add_commit(self, commit, parent_hashes):
+        """
+        追加一个提交，父提交必须已经加入（按拓扑顺序追加）
+        
+        Returns:
+            提交id
+        """
+        cid = self._index.get(commit)
+        if cid is not None:
+            return cid
+        generation = 0
+        for p in parent_hashes:
+            pid = self._index.get(p)
+            if pid is None:
+                continue
+            self.parents.append(pid)
+            generation = max(generation, self.generations[pid])
+        cid = len(self.hashes)
+        self.hashes.append(commit)
+        self._index[commit] = cid
+        self.offsets.append(len(self.parents))
+        self.generations.append(generation + 1)
+        return cid
+    
+    def _id(self, commit):
+        cid = self._index.get(commit)
+        if cid is None:
+            raise KeyError(f"提交不在提交图中: {commit}")
+        return cid
+    
+    def _parents(self, cid):
+        return self.parents[self.offsets[cid]:self.offsets[cid + 1]]
+    
+    def parents_of(self, commit):
+        """父提交hash列表，第一个为第一父提交"""
+        return [self.hashes[p] for p in self._parents(self._id(commit))]
+    
+    def generation(self, commit):
+        """提交的代数，根提交为1"""
+        return self.generations[self._id(commit)]
+    
+    def is_merge(self, commit):
+        """是否为合并提交（两个及以上父提交）"""
+        cid = self._id(commit)
+        return self.offsets[cid + 1] - self.offsets[cid] > 1
+    
+    def first_parent(self, commit, limit=None):
+        """
+        从commit沿第一父提交回溯的主线
+        
+        Args:
+            commit: 起点提交
+            limit: 最多返回多少个提交
+        
+        Returns:
+            hash列表，从commit开始由新到旧
+        """
+        cid = self._id(commit)
+        line = []
+        while limit is None or len(line) < limit:
+            line.append(self.hashes[cid])
+            start, end = self.offsets[cid], self.offsets[cid + 1]
+            if start == end:
+                break
+            cid = self.parents[start]
+        return line
+    
+    def _ancestors(self, cid, min_generation=0):
+        """cid及其代数不小于min_generation的祖先，返回标记数组"""
+        seen = bytearray(len(self.hashes))
+        seen[cid] = 1
+        stack = [cid]
+        while stack:
+            for p in self._parents(stack.pop()):
+                if not seen[p] and self.generations[p] >= min_generation:
+                    seen[p] = 1
+                    stack.append(p)
+        return seen
+    
+    def is_ancestor(self, ancestor, commit):
+        """
+        ancestor是否是commit的祖先（相同提交也返回True）
+        
+        代数小于ancestor的提交不可能到达它，遍历时直接剪掉。
+        """
+        aid, cid = self._id(ancestor), self._id(commit)
+        if aid == cid:
+            return True
+        target = self.generations[aid]
+        if target >= self.generations[cid]:
+            return False
+        return bool(self._ancestors(cid, target)[aid])
+    
+    def merge_bases(self, a, b):
+        """
+        a和b的全部最佳公共祖先（互相不是祖先关系的公共祖先）
+        
+        与git的paint_down_to_common相同：从两端向下染色，
+        按id从大到小（子提交先于父提交）处理，找到的公共祖先把它的祖先标为过期。
+        
+        Returns:
+            hash列表，按代数从高到低
+        """
+        ids = (self._id(a), self._id(b))
+        if ids[0] == ids[1]:
+            return [a]
+        
+        flags = bytearray(len(self.hashes))
+        flags[ids[0]] |= 1
+        flags[ids[1]] |= 2
+        heap = [-ids[0], -ids[1]]
+        queued = set(ids)
+        active = 2
+        result = []
+        
+        while heap and active:
+            cid = -heapq.heappop(heap)
+            queued.discard(cid)
+            f = flags[cid]
+            if not f & _STALE:
+                active -= 1
+                if f & 3 == 3:
+                    result.append(cid)
+                    f |= _STALE
+            for p in self._parents(cid):
+                old = flags[p]
+                new = old | f
+                if new == old:
+                    continue
+                flags[p] = new
+                if p in queued:
+                    if new & _STALE and not old & _STALE:
+                        active -= 1
+                else:
+                    queued.add(p)
+                    heapq.heappush(heap, -p)
+                    if not new & _STALE:
+                        active += 1
+        
+        result.sort(key=lambda c: (-self.generations[c], -c))
+        return [self.hashes[c] for c in result]
+    
+    def merge_base(self, a, b):
+        """a和b的最佳公共祖先，没有公共历史时返回None"""
+        bases = self.merge_bases(a, b)
+        return bases[0] if bases else None
+    
+    def ancestor_count(self, commit):
+        """commit及其全部祖先的数量（即 git rev-list --count commit）"""
+        return sum(self._ancestors(self._id(commit)))
+    
+    def ahead_behind(self, a, b):
+        """
+        a可达而b不可达、b可达而a不可达的提交数（即 git rev-list --left-right --count a...b）
+        
+        与git的ahead_behind相同：按id从大到小处理，子提交的标记在父提交出队前已全部传到；
+        队列中只剩两边都可达的提交时停止，开销与差异部分成正比，而不是整个历史。
+        
+        Returns:
+            (ahead, behind)
+        """
+        ida, idb = self._id(a), self._id(b)
+        if ida == idb:
+            return 0, 0
+        flags = {ida: 1, idb: 2}
+        heap = [-ida, -idb]
+        pending = 2
+        counts = [0, 0, 0, 0]
+        
+        while heap and pending:
+            cid = -heapq.heappop(heap)
+            f = flags[cid]
+            if f != 3:
+                pending -= 1
+            counts[f] += 1
+            for p in self._parents(cid):
+                old = flags.get(p)
+                if old is None:
+                    flags[p] = f
+                    heapq.heappush(heap, -p)
+                    if f != 3:
+                        pending += 1
+                elif old | f != old:
+                    flags[p] = old | f
+                    if old | f == 3:
+                        pending -= 1
+        return counts[1], counts[2]
+    
+    def commits_between(self, since, until):
+        """
+        until可达、since不可达的提交（即 git rev-list since..until）
+        
+        Returns:
+            hash列表，按拓扑顺序由新到旧
+        """
+        sid, uid = self._id(since), self._id(until)
+        excluded = self._ancestors(sid)
+        if excluded[uid]:
+            return []
+        seen = bytearray(len(self.hashes))
+        seen[uid] = 1
+        stack = [uid]
+        found = []
+        while stack:
+            cid = stack.pop()
+            found.append(cid)
+            for p in self._parents(cid):
+                if not seen[p] and not excluded[p]:
+                    seen[p] = 1
+                    stack.append(p)
+        found.sort(reverse=True)
+        return [self.hashes[c] for c in found]
+
+
+def build_commit_graph(repo_path, revs=None):
+    """
+    从仓库构建提交图
+    
+    Args:
+        repo_path: 仓库路径（可以是裸仓库）
+        revs: 起点列表，默认为全部引用（--all）
+    
+    Returns:
+        CommitGraph，git命令失败时返回空图
+    """
+    cmd = ['git', 'log', '--topo-order', '--reverse', '--format=%H %P']
+    # 起点较多（如上千个分支）时从标准输入传入，避免命令行过长
+    cmd.append('--stdin' if revs else '--all')
+    cmd.append('--')
+    graph = CommitGraph()
+    try:
+        output = subprocess.run(cmd, cwd=repo_path, input=''.join(f'{r}\n' for r in revs or []),
+                                capture_output=True, encoding='utf-8', check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return graph
+    
+    for line in output.split('\n'):
+        if line:
+            commit, *parents = line.split()
+            graph.add_commit(commit, parents)
+    
+    merges = sum(1 for i in range(len(graph)) if graph.offsets[i + 1] - graph.offsets[i] > 1)
+    print(f"✓ 提交图: {len(graph)} 个提交, {merges} 个合并提交")
+    return graph
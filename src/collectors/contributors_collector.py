@@ -3,10 +3,11 @@ Contributors采集模块 - 全量版
 
 获取GitHub贡献者数据，支持增量持久化和实时热存储
 """
-import requests
 import json
 import os
-import time
+
+from src.collectors.http_client import get_client
+from src.exceptions import RateLimitError
 
 
 class ContributorsCollector:
@@ -15,9 +16,7 @@ class ContributorsCollector:
     def __init__(self, repo, token=None):
         self.repo = repo
         self.base_url = "https://api.github.com"
-        self.headers = {'Accept': 'application/vnd.github.v3+json'}
-        if token:
-            self.headers['Authorization'] = f'token {token}'
+        self.client = get_client(token)
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
         
@@ -44,52 +43,33 @@ class ContributorsCollector:
         existing_logins = {c.get('login') for c in existing if c.get('login')}
         
         all_contributors = list(existing)
-        page = 1
+        next_page = 1
+        url = f"{self.base_url}/repos/{self.repo}/contributors"
+        params = {'anon': 'true'}
         
         while True:
-            url = f"{self.base_url}/repos/{self.repo}/contributors"
-            params = {'page': page, 'per_page': 100, 'anon': 'true'}
-            
             try:
-                resp = requests.get(url, headers=self.headers, params=params, timeout=30)
-                
-                if resp.status_code == 403:
-                    reset_time = int(resp.headers.get('X-RateLimit-Reset', 0))
-                    wait_time = max(reset_time - int(time.time()), 60)
-                    if wait_time > 120:
-                        print(f"  ⚠ API限流需等待{wait_time}秒，跳过")
-                        break
-                    print(f"  ⚠ API限流，等待{wait_time}秒...")
-                    time.sleep(wait_time)
-                    continue
-                
-                if resp.status_code != 200:
-                    print(f"  ✗ 请求失败: {resp.status_code}")
-                    break
-                
-                data = resp.json()
-                if not data:
-                    break
-                
-                for item in data:
-                    login = item.get('login', 'Anonymous')
-                    if login not in existing_logins:
-                        contributor = {
-                            'login': login,
-                            'contributions': item['contributions'],
-                            'type': item.get('type', 'Anonymous'),
-                            'avatar_url': item.get('avatar_url', ''),
-                            'html_url': item.get('html_url', '')
-                        }
-                        all_contributors.append(contributor)
-                        existing_logins.add(login)
-                
-                self._save_realtime(all_contributors)
-                
-                print(f"  获取第{page}页，累计{len(all_contributors)}位贡献者")
-                page += 1
-                time.sleep(0.5)
-                
+                for page, data in self.client.iter_pages(url, params, start=next_page):
+                    next_page = page + 1
+                    for item in data:
+                        login = item.get('login', 'Anonymous')
+                        if login not in existing_logins:
+                            contributor = {
+                                'login': login,
+                                'contributions': item['contributions'],
+                                'type': item.get('type', 'Anonymous'),
+                                'avatar_url': item.get('avatar_url', ''),
+                                'html_url': item.get('html_url', '')
+                            }
+                            all_contributors.append(contributor)
+                            existing_logins.add(login)
+                    
+                    self._save_realtime(all_contributors)
+                    print(f"  获取第{page}页，累计{len(all_contributors)}位贡献者")
+                break
+            except RateLimitError as e:
+                print(f"  ⚠ API限流，跳过: {e}")
+                break
             except Exception as e:
                 print(f"  ✗ 错误: {e}")
                 break
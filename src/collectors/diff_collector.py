@@ -1,5 +1,9 @@
 """
 Git差异分析
+
+这里的函数每次调用都会启动一个 git show 进程，只适合查询单个提交。
+需要统计整个历史时请使用 numstat_collector.collect_changes 一次采集，
+并把得到的ChangeTable通过table参数传入。
 """
 import subprocess
 
@@ -12,8 +16,11 @@ def get_commit_diff(repo_path, commit_hash):
     except:
         return None
 
-def get_changed_files(repo_path, commit_hash):
-    """获取变更的文件列表"""
+def get_changed_files(repo_path, commit_hash, table=None):
+    """获取变更的文件列表，table为ChangeTable时直接查表"""
+    if table is not None and table.commit_index(commit_hash) is not None:
+        return [c['path'] for c in table.changes_for_commit(commit_hash)]
+    
     cmd = ['git', 'show', commit_hash, '--name-only', '--format=']
     try:
         output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8')
@@ -21,8 +28,11 @@ def get_changed_files(repo_path, commit_hash):
     except:
         return []
 
-def get_insertions_deletions(repo_path, commit_hash):
-    """获取增删行数"""
+def get_insertions_deletions(repo_path, commit_hash, table=None):
+    """获取增删行数，table为ChangeTable时直接查表"""
+    if table is not None and table.commit_index(commit_hash) is not None:
+        return table.commit_stats(commit_hash)
+    
     cmd = ['git', 'show', commit_hash, '--numstat', '--format=']
     try:
         output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8')
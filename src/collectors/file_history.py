@@ -0,0 +1,306 @@
+"""
+文件历史索引
+
+把ChangeTable中的变更按"文件谱系"（跟随重命名的同一个文件）归组，
+每个谱系保存按时间排序的 (时间戳, 提交序号, 增加行数, 删除行数) 数组，
+查询某个文件在某段时间内的提交只需两次二分查找，
+不再为每个文件运行 git log --follow。
+
+- 重命名(R)：新路径沿用旧路径的谱系
+- 复制(C)：新路径开始新的谱系
+- 删除后重新添加同名文件：开始新的谱系，按路径查询时返回最近的谱系
+
+主要功能：
+- FileHistoryIndex: 索引，支持按路径和时间范围查询、增量更新
+- load_or_build_file_history: 加载已保存的索引并增量更新
+"""
+import gzip
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from src.config import DATA_DIR
+from src.collectors.numstat_collector import load_or_collect_changes, CHANGES_FILE
+
+FILE_HISTORY_FILE = os.path.join(DATA_DIR, 'file_history.json.gz')
+
+
+def _to_timestamp(value):
+    """时间戳、datetime或ISO日期字符串 → Unix时间戳"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+class _Lineage:
+    """一个文件谱系的按时间排序的变更数组"""
+    
+    __slots__ = ('paths', 'timestamps', 'commits', 'path_ids', 'additions', 'deletions')
+    
+    def __init__(self):
+        self.paths = []
+        self.timestamps = array('q')
+        self.commits = array('i')
+        self.path_ids = array('i')
+        self.additions = array('i')
+        self.deletions = array('i')
+    
+    def add(self, timestamp, commit, path_id, added, deleted):
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            # 作者时间不一定单调，少数乱序的变更插入到正确位置
+            pos = bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(pos, timestamp)
+            self.commits.insert(pos, commit)
+            self.path_ids.insert(pos, path_id)
+            self.additions.insert(pos, added)
+            self.deletions.insert(pos, deleted)
+        else:
+            self.timestamps.append(timestamp)
+            self.commits.append(commit)
+            self.path_ids.append(path_id)
+            self.additions.append(added)
+            self.deletions.append(deleted)
+    
+    def window(self, since, until):
+        lo = 0 if since is None else bisect_left(self.timestamps, since)
+        hi = len(self.timestamps) if until is None else bisect_right(self.timestamps, until)
+        return range(lo, hi)
+
+
+class FileHistoryIndex:
+    """
+    跟随重命名的文件历史索引
+    
+    Attributes:
+        hashes: 已处理的提交hash，下标即提交序号（与ChangeTable一致）
+        paths: 路径列表，下标即路径id
+        lineages: 谱系列表
+        head: 最后处理的提交hash
+    """
+    
+    def __init__(self):
+        self.hashes = []
+        self.paths = []
+        self._path_index = {}
+        self.lineages = []
+        self._current = {}      # 当前存在的路径id -> 谱系id
+        self._latest = {}       # 路径id -> 最近使用该路径的谱系id
+    
+    def __len__(self):
+        return len(self.lineages)
+    
+    @property
+    def head(self):
+        return self.hashes[-1] if self.hashes else None
+    
+    def _intern(self, path):
+        pid = self._path_index.get(path)
+        if pid is None:
+            pid = len(self.paths)
+            self.paths.append(path)
+            self._path_index[path] = pid
+        return pid
+    
+    def _new_lineage(self):
+        self.lineages.append(_Lineage())
+        return len(self.lineages) - 1
+    
+    def _add_change(self, ci, timestamp, path, old_path, status, added, deleted):
+        pid = self._intern(path)
+        if status == 'R' and old_path is not None:
+            old_pid = self._intern(old_path)
+            lid = self._current.pop(old_pid, None)
+            if lid is None:
+                lid = self._new_lineage()
+        elif status == 'C' or status == 'A':
+            lid = self._new_lineage()
+        else:
+            lid = self._current.get(pid)
+            if lid is None:
+                lid = self._new_lineage()
+        
+        lineage = self.lineages[lid]
+        if not lineage.paths or lineage.paths[-1] != pid:
+            lineage.paths.append(pid)
+        lineage.add(timestamp, ci, pid, max(added, 0), max(deleted, 0))
+        
+        if status == 'D':
+            self._current.pop(pid, None)
+        else:
+            self._current[pid] = lid
+        self._latest[pid] = lid
+    
+    def matches(self, table):
+        """已处理的提交是否是ChangeTable的前缀（历史未被改写）"""
+        start = len(self.hashes)
+        return not start or (table.num_commits >= start and table.hashes[start - 1] == self.head)
+    
+    def update(self, table):
+        """
+        追加ChangeTable中head之后的提交
+        
+        Returns:
+            新处理的提交数
+        """
+        if not self.matches(table):
+            raise ValueError("变更表与索引不一致，需要重新构建")
+        start = len(self.hashes)
+        
+        for ci in range(start, table.num_commits):
+            self.hashes.append(table.hashes[ci])
+            timestamp = table.timestamps[ci]
+            for i in table.commit_rows(ci):
+                old_pid = table.old_path_ids[i]
+                self._add_change(
+                    ci, timestamp,
+                    table.paths[table.path_ids[i]],
+                    table.paths[old_pid] if old_pid >= 0 else None,
+                    chr(table.status[i]),
+                    table.additions[i], table.deletions[i],
+                )
+        return table.num_commits - start
+    
+    def _lineage_for(self, path):
+        pid = self._path_index.get(path)
+        if pid is None:
+            return None, None
+        lid = self._current.get(pid, self._latest.get(pid))
+        return pid, (None if lid is None else self.lineages[lid])
+    
+    def lineage(self, path):
+        """文件经历过的路径（按时间顺序），不存在时返回空列表"""
+        _, lineage = self._lineage_for(path)
+        if lineage is None:
+            return []
+        return [self.paths[p] for p in lineage.paths]
+    
+    def history(self, path, since=None, until=None, follow=True):
+        """
+        文件在时间范围内的变更
+        
+        Args:
+            path: 文件路径（当前路径或历史上用过的路径）
+            since / until: 起止时间（包含），时间戳、datetime或ISO日期字符串
+            follow: 为True时包含重命名之前的历史
+        
+        Returns:
+            [{hash, timestamp, path, additions, deletions}, ...]，按时间正序
+        """
+        pid, lineage = self._lineage_for(path)
+        if lineage is None:
+            return []
+        result = []
+        for i in lineage.window(_to_timestamp(since), _to_timestamp(until)):
+            if not follow and lineage.path_ids[i] != pid:
+                continue
+            result.append({
+                'hash': self.hashes[lineage.commits[i]],
+                'timestamp': lineage.timestamps[i],
+                'path': self.paths[lineage.path_ids[i]],
+                'additions': lineage.additions[i],
+                'deletions': lineage.deletions[i],
+            })
+        return result
+    
+    def stats(self, path, since=None, until=None):
+        """
+        文件在时间范围内的汇总
+        
+        Returns:
+            {'commits', 'additions', 'deletions'}
+        """
+        _, lineage = self._lineage_for(path)
+        if lineage is None:
+            return {'commits': 0, 'additions': 0, 'deletions': 0}
+        rows = lineage.window(_to_timestamp(since), _to_timestamp(until))
+        return {
+            'commits': len(rows),
+            'additions': sum(lineage.additions[rows.start:rows.stop]),
+            'deletions': sum(lineage.deletions[rows.start:rows.stop]),
+        }
+    
+    def save(self, filepath):
+        """保存为gzip压缩的JSON"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        data = {
+            'hashes': self.hashes,
+            'paths': self.paths,
+            'lineages': [{
+                'paths': lin.paths,
+                'timestamps': lin.timestamps.tolist(),
+                'commits': lin.commits.tolist(),
+                'path_ids': lin.path_ids.tolist(),
+                'additions': lin.additions.tolist(),
+                'deletions': lin.deletions.tolist(),
+            } for lin in self.lineages],
+            'current': list(self._current.items()),
+            'latest': list(self._latest.items()),
+        }
+        with gzip.open(filepath, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, filepath):
+        """从save()生成的文件加载，文件不存在或损坏时返回None"""
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        index = cls()
+        index.hashes = data['hashes']
+        index.paths = data['paths']
+        index._path_index = {p: i for i, p in enumerate(index.paths)}
+        for entry in data['lineages']:
+            lineage = _Lineage()
+            lineage.paths = entry['paths']
+            lineage.timestamps = array('q', entry['timestamps'])
+            lineage.commits = array('i', entry['commits'])
+            lineage.path_ids = array('i', entry['path_ids'])
+            lineage.additions = array('i', entry['additions'])
+            lineage.deletions = array('i', entry['deletions'])
+            index.lineages.append(lineage)
+        index._current = dict(data['current'])
+        index._latest = dict(data['latest'])
+        return index
+
+
+def build_file_history(table):
+    """从ChangeTable构建文件历史索引"""
+    index = FileHistoryIndex()
+    index.update(table)
+    print(f"✓ 文件历史索引: {len(index.paths)} 个路径, {len(index)} 个文件谱系")
+    return index
+
+
+def load_or_build_file_history(repo_path, filepath=FILE_HISTORY_FILE, table=None,
+                               changes_file=CHANGES_FILE):
+    """
+    加载已保存的索引并追加新提交，没有保存或历史被改写时重新构建
+    
+    Args:
+        repo_path: 仓库路径
+        filepath: 索引文件路径
+        table: ChangeTable，默认加载changes_file中保存的变更表并增量更新
+        changes_file: 变更表文件路径
+    
+    Returns:
+        FileHistoryIndex
+    """
+    if table is None:
+        table = load_or_collect_changes(repo_path, changes_file)
+    index = FileHistoryIndex.load(filepath)
+    if index is None or not index.matches(table):
+        index = build_file_history(table)
+    else:
+        added = index.update(table)
+        print(f"✓ 增量更新文件历史索引: +{added} 个提交")
+    index.save(filepath)
+    return index
@@ -5,86 +5,334 @@ Git历史采集模块
 支持导出为CSV和JSON格式，用于后续分析和可视化。
 
 主要功能：
+- iter_commits: 流式读取提交历史
 - get_commits: 获取提交历史
+- get_commits_with_releases: 获取提交历史并标注最早发布版本
 - get_file_stats: 统计文件类型
+- get_file_inventory: 按扩展名统计文件数和字节数，列出最大的文件
+- get_size_history: 沿历史抽样统计仓库体积增长
 - save_to_csv: 保存为CSV
 - save_to_json: 保存为JSON
+- sync_commits: 增量同步提交记录
 """
 import subprocess
+import tempfile
 from datetime import datetime
 import pandas as pd
 import json
 import os
+import shutil
 
+from src.config import CACHE_DIR
 
-def get_commits(repo_path, max_count=10000):
+
+# git log输出的字段分隔符和记录分隔符
+FIELD_SEP = '\x00'
+RECORD_SEP = '\x1e'
+CO_AUTHOR_SEP = '\x1f'
+COMMIT_FIELDS = ['hash', 'author', 'email', 'date', 'message', 'co_authors']
+# %aN/%aE 应用.mailmap；Co-authored-by trailer 以\x1f分隔，在同一次git log中取出
+COMMIT_FORMAT = '%x1e' + '%x00'.join([
+    '%H', '%aN', '%aE', '%ad', '%s',
+    '%(trailers:key=Co-authored-by,valueonly,unfold,separator=%x1f)',
+])
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_commit_record(record):
+    """解析单条git log记录，字段数不符时返回None"""
+    parts = record.rstrip('\n').split(FIELD_SEP)
+    if len(parts) != len(COMMIT_FIELDS):
+        return None
+    commit = dict(zip(COMMIT_FIELDS, parts))
+    commit['co_authors'] = [c.strip() for c in commit['co_authors'].split(CO_AUTHOR_SEP) if c.strip()]
+    return commit
+
+
+def iter_log_records(repo_path, cmd, sep=RECORD_SEP):
     """
-    获取Git仓库的提交历史记录
+    分块读取git命令的标准输出，按记录分隔符切分后逐条yield
     
     Args:
         repo_path: 仓库路径
-        max_count: 最大获取数量，默认10000
+        cmd: 完整的git命令列表，输出中每条记录以sep开头
+        sep: 记录分隔符
     
-    Returns:
-        提交记录列表，每条包含hash, author, email, date, message
+    Yields:
+        解码后的记录字符串（不含分隔符）
     """
-    # 构建git log命令，使用自定义格式
-    cmd = ['git', 'log', f'--max-count={max_count}', 
-           '--format=%H|%an|%ae|%ad|%s', '--date=iso']
-    
+    # stderr写入临时文件：读stdout的同时git写满stderr管道会互相等待
+    errors = tempfile.TemporaryFile()
     try:
-        # 执行命令并获取输出
-        output = subprocess.check_output(
-            cmd, cwd=repo_path, encoding='utf-8', errors='replace'
-        )
-    except subprocess.CalledProcessError as e:
-        print(f"git log失败: {e}")
-        return []
+        proc = subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE, stderr=errors)
+    except OSError as e:
+        errors.close()
+        print(f"{' '.join(cmd[:2])}失败: {e}")
+        return
     
-    # 解析输出
-    commits = []
-    for line in output.strip().split('\n'):
-        if '|' not in line:
-            continue
-        parts = line.split('|', 4)
-        if len(parts) < 5:
-            continue
+    sep = sep.encode()
+    buffer = b''
+    finished = False
+    try:
+        while True:
+            chunk = proc.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            records = buffer.split(sep)
+            # 最后一段可能是不完整的记录，留到下一块继续拼接
+            buffer = records.pop()
+            for record in records:
+                if record:
+                    yield record.decode('utf-8', errors='replace')
         
-        hash_val, author, email, date, msg = parts
-        commits.append({
-            'hash': hash_val,
-            'author': author,
-            'email': email,
-            'date': date,
-            'message': msg
-        })
+        if buffer:
+            yield buffer.decode('utf-8', errors='replace')
+        finished = True
+    finally:
+        # 只在调用方提前结束迭代时终止git进程；正常读完时等待git自己退出
+        if not finished and proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        if finished and returncode != 0:
+            errors.seek(0)
+            stderr = errors.read().decode('utf-8', errors='replace')
+            print(f"{' '.join(cmd[:2])}失败: {stderr.strip()}")
+        errors.close()
+
+
+def iter_commits(repo_path, max_count=None, rev_range=None):
+    """
+    流式读取Git提交历史
     
+    以NUL分隔字段、\\x1e分隔记录，分块读取git log的标准输出，
+    每解析出一条提交就立即yield，不会把整个输出缓存在内存中。
+    
+    Args:
+        repo_path: 仓库路径
+        max_count: 最大获取数量，默认None表示不限制
+        rev_range: 版本范围，如 'abc123..HEAD'，默认为HEAD
+    
+    Yields:
+        提交记录字典，包含hash, author, email, date, message, co_authors
+        （author/email已按.mailmap规范化，co_authors为 "Name <email>" 列表）
+    """
+    cmd = ['git', 'log', f'--format={COMMIT_FORMAT}', '--date=iso']
+    if max_count is not None:
+        cmd.append(f'--max-count={max_count}')
+    if rev_range:
+        cmd.append(rev_range)
+    cmd.append('--')
+    
+    for record in iter_log_records(repo_path, cmd):
+        commit = _parse_commit_record(record)
+        if commit:
+            yield commit
+
+
+def get_commits(repo_path, max_count=None):
+    """
+    获取Git仓库的提交历史记录
+    
+    Args:
+        repo_path: 仓库路径
+        max_count: 最大获取数量，默认None表示获取全部历史
+    
+    Returns:
+        提交记录列表，每条包含hash, author, email, date, message, co_authors
+    """
+    commits = list(iter_commits(repo_path, max_count=max_count))
     print(f"✓ 获取 {len(commits)} 条提交")
     return commits
 
 
+def get_commits_with_releases(repo_path, max_count=None, index_file=None):
+    """
+    获取提交历史，并为每条提交标注最早包含它的发布标签
+    
+    Args:
+        repo_path: 仓库路径
+        max_count: 最大获取数量
+        index_file: 发布归属索引文件，默认 data/release_index.json
+    
+    Returns:
+        提交记录列表，每条额外包含release字段，未发布的提交为None
+    """
+    from src.collectors.release_index import load_or_build_release_index, RELEASE_INDEX_FILE
+    
+    index = load_or_build_release_index(repo_path, index_file or RELEASE_INDEX_FILE)
+    commits = get_commits(repo_path, max_count=max_count)
+    for commit in commits:
+        commit['release'] = index.release_of(commit['hash'])
+    return commits
+
+
 def get_file_stats(repo_path):
     """
     统计仓库中各类型文件数量
     
+    统计的是HEAD提交的tree（通过get_file_inventory），不是索引：
+    已暂存但未提交的文件不计入，已提交但从索引中删除的文件仍计入。
+    结果按tree id缓存到 INVENTORY_CACHE_DIR（cache/file_inventory/<tree>.json），
+    调用会在该目录写入缓存文件。
+    
+    Args:
+        repo_path: 仓库路径（可以是裸仓库）
+    
+    Returns:
+        字典，key为扩展名，value为文件数量；HEAD无法解析时为空字典
+    """
+    inventory = get_file_inventory(repo_path)
+    if inventory is None:
+        return {}
+    return {ext: s['files'] for ext, s in inventory['by_extension'].items()}
+
+
+INVENTORY_CACHE_DIR = os.path.join(CACHE_DIR, 'file_inventory')
+INVENTORY_LARGEST = 50
+
+
+def _tree_id(repo_path, rev):
+    """版本对应的tree id，失败返回None"""
+    cmd = ['git', 'rev-parse', '--verify', '--quiet', f'{rev}^{{tree}}']
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8',
+                                         stderr=subprocess.DEVNULL)
+        return output.strip() or None
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+
+def _scan_tree(repo_path, tree, largest=INVENTORY_LARGEST):
+    """运行一次 git ls-tree -r -l -z，汇总文件数和字节数，保留最大的largest个文件"""
+    cmd = ['git', 'ls-tree', '-r', '-l', '-z', tree]
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    
+    by_ext = {}
+    files = []
+    for entry in output.decode('utf-8', errors='replace').split('\0'):
+        if not entry:
+            continue
+        meta, path = entry.split('\t', 1)
+        _, obj_type, _, size = meta.split()
+        if obj_type != 'blob':
+            # 子模块（commit条目）没有大小
+            continue
+        size = int(size)
+        ext = os.path.splitext(path)[1] or 'no_ext'
+        stats = by_ext.setdefault(ext, {'files': 0, 'bytes': 0})
+        stats['files'] += 1
+        stats['bytes'] += size
+        files.append((size, path))
+    
+    files.sort(key=lambda f: (-f[0], f[1]))
+    return {
+        'tree': tree,
+        'files': len(files),
+        'bytes': sum(s['bytes'] for s in by_ext.values()),
+        'by_extension': dict(sorted(by_ext.items(), key=lambda e: (-e[1]['bytes'], e[0]))),
+        'largest': [{'path': p, 'size': size} for size, p in files[:largest]],
+    }
+
+
+def get_file_inventory(repo_path, rev='HEAD', top_n=20, cache_dir=INVENTORY_CACHE_DIR):
+    """
+    统计某个版本中各扩展名的文件数和字节数
+    
+    结果按tree id缓存，同一个tree（HEAD未变、或不同提交内容相同）直接读缓存。
+    缓存中保留最大的 max(top_n, INVENTORY_LARGEST) 个文件，top_n超过缓存条数时重新统计。
+    
+    Args:
+        repo_path: 仓库路径（可以是裸仓库）
+        rev: 版本（提交、标签、分支或tree id）
+        top_n: 返回最大的前N个文件
+        cache_dir: 缓存目录，None表示不缓存
+    
+    Returns:
+        {tree, files, bytes, by_extension: {扩展名: {files, bytes}}, largest: [{path, size}]}，
+        by_extension按字节数降序；版本无法解析时返回None
+    """
+    tree = _tree_id(repo_path, rev)
+    if tree is None:
+        return None
+    
+    cache_path = os.path.join(cache_dir, f'{tree}.json') if cache_dir else None
+    inventory = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                inventory = json.load(f)
+        except (OSError, ValueError):
+            inventory = None
+    # 缓存中保留的最大文件不够top_n个，且仓库中确实有更多文件时重新统计
+    if (inventory and top_n > len(inventory['largest'])
+            and len(inventory['largest']) < inventory['files']):
+        inventory = None
+    
+    if inventory is None:
+        inventory = _scan_tree(repo_path, tree, max(top_n, INVENTORY_LARGEST))
+        if inventory is None:
+            return None
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(inventory, f, ensure_ascii=False)
+    
+    return dict(inventory, largest=inventory['largest'][:top_n])
+
+
+def get_size_history(repo_path, samples=20, rev='HEAD', cache_dir=INVENTORY_CACHE_DIR):
+    """
+    沿第一父提交历史均匀抽样，统计仓库体积的增长
+    
     Args:
         repo_path: 仓库路径
+        samples: 抽样点数（包含第一个和最后一个提交）
+        rev: 历史终点
+        cache_dir: 清单缓存目录，抽样点之间内容未变的tree只统计一次
     
     Returns:
-        字典，key为扩展名，value为文件数量
+        [{hash, date, files, bytes, by_extension}, ...]，按时间正序
     """
-    cmd = ['git', 'ls-files']
+    cmd = ['git', 'log', '--first-parent', '--reverse', '--format=%H%x00%aI%x00%T', rev, '--']
     try:
-        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8')
-    except:
-        return {}
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8',
+                                         stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError):
+        return []
     
-    stats = {}
-    for file in output.strip().split('\n'):
-        ext = os.path.splitext(file)[1] or 'no_ext'
-        stats[ext] = stats.get(ext, 0) + 1
+    history = [line.split('\0') for line in output.splitlines() if line]
+    if len(history) > samples > 1:
+        step = (len(history) - 1) / (samples - 1)
+        history = [history[round(i * step)] for i in range(samples)]
     
-    return stats
+    points = []
+    for commit, date, tree in history:
+        inventory = get_file_inventory(repo_path, tree, top_n=0, cache_dir=cache_dir)
+        if inventory is None:
+            continue
+        points.append({
+            'hash': commit,
+            'date': date,
+            'files': inventory['files'],
+            'bytes': inventory['bytes'],
+            'by_extension': {ext: s['bytes'] for ext, s in inventory['by_extension'].items()},
+        })
+    print(f"✓ 仓库体积历史: {len(points)} 个抽样点")
+    return points
+
+
+def _csv_frame(commits):
+    """提交记录 → DataFrame，co_authors列表以 "; " 连接"""
+    df = pd.DataFrame(commits)
+    if 'co_authors' in df:
+        df['co_authors'] = df['co_authors'].map(
+            lambda c: '; '.join(c) if isinstance(c, list) else c)
+    return df
 
 
 def save_to_csv(commits, output_dir='data'):
@@ -96,7 +344,7 @@ def save_to_csv(commits, output_dir='data'):
         output_dir: 输出目录
     """
     os.makedirs(output_dir, exist_ok=True)
-    df = pd.DataFrame(commits)
+    df = _csv_frame(commits)
     df.to_csv(f'{output_dir}/commits.csv', index=False, encoding='utf-8-sig')
     print(f"✓ 保存CSV: {output_dir}/commits.csv")
 
@@ -113,3 +361,169 @@ def save_to_json(commits, output_dir='data'):
     with open(f'{output_dir}/commits.json', 'w', encoding='utf-8') as f:
         json.dump(commits, f, ensure_ascii=False, indent=2)
     print(f"✓ 保存JSON: {output_dir}/commits.json")
+
+
+SYNC_STATE_FILE = '.commits_sync.json'
+
+
+def _rev_parse(repo_path, rev):
+    """解析版本号为完整hash，失败返回None"""
+    cmd = ['git', 'rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}']
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8',
+                                         stderr=subprocess.DEVNULL)
+        return output.strip() or None
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+
+def is_ancestor(repo_path, ancestor, rev):
+    """判断ancestor是否是rev的祖先（历史被改写时返回False）"""
+    cmd = ['git', 'merge-base', '--is-ancestor', ancestor, rev]
+    result = subprocess.run(cmd, cwd=repo_path, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def _load_sync_state(output_dir):
+    """加载上次同步的状态"""
+    path = os.path.join(output_dir, SYNC_STATE_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def _save_sync_state(output_dir, head, count):
+    """记录本次同步到的HEAD"""
+    path = os.path.join(output_dir, SYNC_STATE_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'head': head, 'count': count,
+                   'synced_at': datetime.now().isoformat()}, f)
+
+
+def prepend_to_csv(commits, output_dir='data'):
+    """
+    将新提交插入CSV文件开头（表头之后），与save_to_csv一样新提交在前
+    
+    已有的行按原样逐字节复制，不重新解析。
+    
+    Args:
+        commits: 提交记录列表（新提交在前）
+        output_dir: 输出目录
+    """
+    filepath = f'{output_dir}/commits.csv'
+    if not os.path.exists(filepath):
+        save_to_csv(commits, output_dir)
+        return
+    rows = _csv_frame(commits).to_csv(header=False, index=False)
+    tmp = filepath + '.tmp'
+    with open(filepath, 'rb') as src, open(tmp, 'wb') as out:
+        # 表头行原样保留（包括BOM）
+        out.write(src.readline())
+        out.write(rows.encode('utf-8'))
+        shutil.copyfileobj(src, out)
+    os.replace(tmp, filepath)
+    print(f"✓ 更新CSV: {filepath} (+{len(commits)})")
+
+
+def prepend_to_json(commits, output_dir='data'):
+    """
+    将新提交插入JSON数组开头，与save_to_json一样新提交在前
+    
+    已有的元素按原样逐字节复制，不重新序列化。
+    
+    Args:
+        commits: 提交记录列表（新提交在前）
+        output_dir: 输出目录
+    """
+    filepath = f'{output_dir}/commits.json'
+    if not os.path.exists(filepath):
+        save_to_json(commits, output_dir)
+        return
+    
+    items = ',\n'.join(
+        '  ' + json.dumps(c, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        for c in commits
+    )
+    tmp = filepath + '.tmp'
+    with open(filepath, 'rb') as src:
+        # 跳过数组的起始符
+        ch = src.read(1)
+        while ch.isspace():
+            ch = src.read(1)
+        if ch != b'[':
+            raise ValueError(f"{filepath} 不是JSON数组")
+        ch = src.read(1)
+        while ch.isspace():
+            ch = src.read(1)
+        with open(tmp, 'wb') as out:
+            out.write(('[\n' + items).encode('utf-8'))
+            if ch == b']':
+                out.write(b'\n]')
+            else:
+                out.write(b',\n  ' + ch)
+                shutil.copyfileobj(src, out)
+    os.replace(tmp, filepath)
+    print(f"✓ 更新JSON: {filepath} (+{len(commits)})")
+
+
+def sync_commits(repo_path, output_dir='data'):
+    """
+    增量同步提交记录
+    
+    写出的CSV/JSON与普通运行（save_to_csv/save_to_json）顺序一致：新提交在前，
+    第一条即上次同步到的HEAD。新提交插入到文件开头。
+    只获取 <last>..HEAD 之间的新提交，已存在的hash不会重复追加。
+    以下情况全量重建：上次的HEAD已不在当前历史中（rebase、force push等）、
+    没有同步状态、或文件第一条与同步状态不一致（文件被其他方式改写过）。
+    
+    Args:
+        repo_path: 仓库路径
+        output_dir: 输出目录
+    
+    Returns:
+        全部提交记录列表（新提交在前，与get_commits及写出的文件一致）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    head = _rev_parse(repo_path, 'HEAD')
+    if head is None:
+        print("✗ 无法解析HEAD")
+        return []
+    
+    json_path = f'{output_dir}/commits.json'
+    existing = None
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            existing = None
+    
+    last = _load_sync_state(output_dir).get('head')
+    # 旧版本保存的记录没有co_authors字段，与新记录混在一起会导致CSV列错位
+    usable = bool(existing) and 'co_authors' in existing[0] and existing[0]['hash'] == last
+    if not usable or not is_ancestor(repo_path, last, head):
+        print("  历史无法增量同步，全量重建...")
+        commits = get_commits(repo_path)
+        save_to_csv(commits, output_dir)
+        save_to_json(commits, output_dir)
+        _save_sync_state(output_dir, head, len(commits))
+        return commits
+    
+    if last == head:
+        print(f"✓ 提交记录已是最新 ({len(existing)} 条)")
+        return existing
+    
+    known = {c['hash'] for c in existing}
+    new_commits = [c for c in iter_commits(repo_path, rev_range=f'{last}..{head}')
+                   if c['hash'] not in known]
+    if new_commits:
+        prepend_to_csv(new_commits, output_dir)
+        prepend_to_json(new_commits, output_dir)
+    _save_sync_state(output_dir, head, len(existing) + len(new_commits))
+    print(f"✓ 增量同步 {len(new_commits)} 条新提交")
+    return new_commits + existing
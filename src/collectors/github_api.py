@@ -9,25 +9,27 @@ GitHub API模块
 - get_contributors: 获取贡献者列表
 - save_data: 保存数据到JSON
 """
-import requests
-import time
 import json
 import os
 
+from src.collectors.http_client import get_client
+from src.exceptions import APIError, RateLimitError
+
 
 class GitHubAPI:
     """
     GitHub API客户端
     
     封装了对GitHub REST API的调用，支持：
-    - 自动分页获取大量数据
+    - 自动分页获取大量数据（按Link头并发请求各页）
     - API限流处理（429错误自动等待）
     - 可选的认证Token
+    - 共享连接池和ETag条件请求（见 http_client）
     
     Attributes:
         repo: 仓库名称，格式为 owner/repo
         base_url: API基础URL
-        headers: 请求头
+        client: 共享的HttpClient
     """
     
     def __init__(self, repo, token=None):
@@ -40,9 +42,7 @@ class GitHubAPI:
         """
         self.repo = repo
         self.base_url = "https://api.github.com"
-        self.headers = {'Accept': 'application/vnd.github.v3+json'}
-        if token:
-            self.headers['Authorization'] = f'token {token}'
+        self.client = get_client(token)
     
     def _fetch_paginated(self, url, params, max_items=5000):
         """
@@ -57,34 +57,28 @@ class GitHubAPI:
             所有获取到的数据列表
         """
         all_items = []
-        page = 1
+        next_page = 1
+        max_pages = -(-max_items // 100)
         
         while len(all_items) < max_items:
-            params['page'] = page
-            params['per_page'] = 100
-            
-            response = requests.get(url, params=params, headers=self.headers)
-            
-            # 处理限流
-            if response.status_code == 403:
-                print("API限流，等待60秒...")
-                time.sleep(60)
-                continue
-            
-            if response.status_code != 200:
-                print(f"请求失败: {response.status_code}")
+            try:
+                for page, items in self.client.iter_pages(
+                        url, params, start=next_page, max_pages=max_pages - next_page + 1):
+                    next_page = page + 1
+                    if not items:
+                        break
+                    all_items.extend(items)
+                    print(f"  已获取 {len(all_items)} 条...")
+                break
+            except RateLimitError as e:
+                # 调度器已按限流响应头等待并重试，仍失败时保留已获取的数据
+                print(f"API限流: {e}")
                 break
-            
-            items = response.json()
-            if not items:
+            except APIError as e:
+                print(f"请求失败: {e}")
                 break
-            
-            all_items.extend(items)
-            print(f"  已获取 {len(all_items)} 条...")
-            page += 1
-            time.sleep(0.3)  # 避免过快请求
         
-        return all_items
+        return all_items[:max_items]
     
     def get_issues(self, state='all'):
         """获取仓库的issues"""
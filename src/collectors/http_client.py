@@ -0,0 +1,269 @@
+"""
+共享HTTP客户端
+
+所有GitHub采集器共用的请求层：
+- 一个 requests.Session + 连接池，分页请求复用keep-alive连接，不再每页重新握手
+- 按URL持久化 ETag / Last-Modified 和响应体，再次请求时带上
+  If-None-Match / If-Modified-Since；GitHub对未变化的页面返回304，
+  304不计入API限额，响应体直接从本地副本读取
+
+缓存按完整URL（含查询参数）的sha1分文件存放在 cache/http/ 下，
+每个响应只写自己的文件。
+
+分页接口先请求第一页，从响应的Link头读出最后一页的页码，
+其余页面用有界线程池并发请求，并按页码顺序交给调用方。
+同时在途的请求数不超过并发上限，也不超过各token剩余的额度。
+
+每个请求发出前向 RateLimitScheduler 申请token，限流响应头交给调度器更新额度；
+被限流（Retry-After、额度用完、二级限流）的请求由调度器等待后换token重试。
+
+主要功能：
+- HttpClient: 带连接池和条件请求的客户端，iter_pages 并发分页
+- get_client: 按token共享的客户端实例
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.collectors.rate_limiter import get_scheduler
+from src.config import CACHE_DIR, GITHUB_PAGE_WORKERS
+from src.exceptions import APIError, RateLimitError
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, 'http')
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 10
+# 单个请求因限流重试的次数上限
+MAX_ATTEMPTS = 5
+# 分页时保留的限额，避免把额度用到0
+RATE_LIMIT_RESERVE = 10
+
+# 从缓存返回时沿用的响应头（分页链接、内容类型）
+_CACHED_HEADERS = ('Link', 'Content-Type', 'ETag', 'Last-Modified')
+
+
+class HttpClient:
+    """
+    带连接池和条件请求缓存的HTTP客户端
+    
+    Attributes:
+        session: 共享的requests.Session
+        scheduler: 限流调度器，负责选择token和安排请求时间，默认与同一token的其他客户端共用
+        cache_dir: 条件请求缓存目录，None表示不缓存
+        requests: 发出的请求数
+        not_modified: 返回304、由本地副本应答的请求数
+    """
+    
+    def __init__(self, token=None, cache_dir=HTTP_CACHE_DIR, pool_size=POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, scheduler=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept'] = 'application/vnd.github.v3+json'
+        if scheduler is None:
+            scheduler = get_scheduler([token] if token else None)
+        self.scheduler = scheduler
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def headers(self):
+        return self.session.headers
+    
+    @staticmethod
+    def _cache_key(url, params):
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        return full_url, hashlib.sha1(full_url.encode('utf-8')).hexdigest()
+    
+    def _load_entry(self, key):
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f'{key}.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_entry(self, key, full_url, resp):
+        headers = {h: resp.headers[h] for h in _CACHED_HEADERS if h in resp.headers}
+        if not self.cache_dir or not ('ETag' in headers or 'Last-Modified' in headers):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f'{key}.json')
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'url': full_url, 'headers': headers, 'body': resp.text}, f,
+                      ensure_ascii=False)
+        os.replace(tmp, path)
+    
+    @staticmethod
+    def _from_cache(entry, resp):
+        """用缓存的响应体构造200响应，限流等响应头取自实际的304响应"""
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.url = entry['url']
+        cached.encoding = 'utf-8'
+        cached._content = entry['body'].encode('utf-8')
+        cached.headers = CaseInsensitiveDict(entry['headers'])
+        cached.headers.update(resp.headers)
+        cached.request = resp.request
+        cached.from_cache = True
+        return cached
+    
+    def get(self, url, params=None, **kwargs):
+        """
+        发送GET请求，有缓存时附带条件请求头
+        
+        请求前由调度器分配token并等待到可用时间；被限流时换token重试，
+        最多 MAX_ATTEMPTS 次，之后把限流响应交给调用方。
+        
+        Returns:
+            requests.Response；页面未变化时返回由缓存构造的200响应，
+            其 from_cache 属性为True
+        """
+        full_url, key = self._cache_key(url, params)
+        entry = self._load_entry(key)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            if 'ETag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if 'Last-Modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        
+        kwargs.setdefault('timeout', self.timeout)
+        for _ in range(MAX_ATTEMPTS):
+            token = self.scheduler.acquire()
+            if token:
+                headers['Authorization'] = f'token {token}'
+            resp = self.session.get(url, params=params, headers=headers, **kwargs)
+            with self._lock:
+                self.requests += 1
+            if not self.scheduler.update(token, resp):
+                break
+        
+        if resp.status_code == 304 and entry:
+            with self._lock:
+                self.not_modified += 1
+            return self._from_cache(entry, resp)
+        if resp.status_code == 200:
+            self._save_entry(key, full_url, resp)
+        resp.from_cache = False
+        return resp
+    
+    @staticmethod
+    def _last_page(resp):
+        """从Link头读出最后一页的页码，没有分页时返回None"""
+        last = resp.links.get('last', {}).get('url')
+        if not last:
+            return None
+        pages = parse_qs(urlparse(last).query).get('page')
+        return int(pages[0]) if pages else None
+    
+    @staticmethod
+    def _reset(resp):
+        value = resp.headers.get('X-RateLimit-Reset')
+        return int(value) if value is not None else None
+    
+    @staticmethod
+    def _is_rate_limited(resp):
+        """429，或额度用完/带Retry-After的403；其余403是权限问题"""
+        if resp.status_code == 429:
+            return True
+        return resp.status_code == 403 and (
+            resp.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in resp.headers)
+    
+    @classmethod
+    def _check(cls, resp, page):
+        if cls._is_rate_limited(resp):
+            raise RateLimitError(f"第{page}页被限流 ({resp.status_code})", cls._reset(resp))
+        if resp.status_code != 200:
+            raise APIError(f"第{page}页请求失败 ({resp.status_code})")
+    
+    def _concurrency(self, max_workers, reserve):
+        """可同时在途的请求数：剩余额度（扣除保留部分）未知或充足时取并发上限"""
+        available = self.scheduler.available()
+        if available is None:
+            return max_workers
+        return max(1, min(max_workers, available - reserve))
+    
+    def iter_pages(self, url, params=None, start=1, per_page=100, max_pages=None,
+                   max_workers=GITHUB_PAGE_WORKERS, reserve=RATE_LIMIT_RESERVE):
+        """
+        并发获取分页接口，按页码顺序逐页yield
+        
+        Args:
+            url: API端点URL
+            params: 查询参数（page/per_page由本方法设置）
+            start: 起始页码，用于断点续传
+            per_page: 每页条数
+            max_pages: 最多获取多少页
+            max_workers: 并发请求上限
+            reserve: 保留的限额，剩余额度接近该值时逐页请求，由调度器控制节奏
+        
+        Yields:
+            (页码, 该页的JSON数据)
+        
+        Raises:
+            RateLimitError: 重试后仍被限流
+            APIError: 其他非200响应；之前的页面已经yield，可从出错的页码续传
+        """
+        params = dict(params or {}, per_page=per_page)
+        
+        def fetch(page):
+            return self.get(url, params=dict(params, page=page))
+        
+        resp = fetch(start)
+        self._check(resp, start)
+        data = resp.json()
+        yield start, data
+        
+        last = self._last_page(resp)
+        if max_pages is not None:
+            last = min(last or start, start + max_pages - 1)
+        if not data or last is None or last <= start:
+            return
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            inflight = {}
+            next_page = start + 1
+            for page in range(start + 1, last + 1):
+                limit = self._concurrency(max_workers, reserve)
+                while next_page <= last and (len(inflight) < limit or page >= next_page):
+                    inflight[next_page] = executor.submit(fetch, next_page)
+                    next_page += 1
+                
+                resp = inflight.pop(page).result()
+                self._check(resp, page)
+                data = resp.json()
+                yield page, data
+                if not data:
+                    return
+    
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(token=None):
+    """按token共享的HttpClient，同一进程内的采集器复用同一个连接池"""
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = _clients[token] = HttpClient(token)
+        return client
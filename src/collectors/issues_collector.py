@@ -1,14 +1,19 @@
 """
 Issues采集模块 - 完整版
 
-支持重试机制、增量持久化、实时热存储
+支持重试机制、并发分页、增量持久化、实时热存储
+
+采集结果每页追加到 issues.jsonl / pull_requests.jsonl（见 src.utils.record_log）
 """
-import requests
 import json
 import os
 import time
 from datetime import datetime
 
+from src.collectors.http_client import get_client
+from src.exceptions import RateLimitError
+from src.utils.record_log import RecordLog
+
 
 class IssuesCollector:
     """GitHub Issues全量采集器"""
@@ -16,74 +21,61 @@ class IssuesCollector:
     def __init__(self, repo, token=None):
         self.repo = repo
         self.base_url = "https://api.github.com"
-        self.headers = {'Accept': 'application/vnd.github.v3+json'}
-        if token:
-            self.headers['Authorization'] = f'token {token}'
+        self.client = get_client(token)
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
         
-        self.issues_file = os.path.join(self.data_dir, 'issues.json')
-        self.prs_file = os.path.join(self.data_dir, 'pull_requests.json')
+        self.issues_file = os.path.join(self.data_dir, 'issues.jsonl')
+        self.prs_file = os.path.join(self.data_dir, 'pull_requests.jsonl')
     
     def _load_existing(self, filepath):
-        """加载已有数据"""
-        if os.path.exists(filepath):
+        """打开记录日志，日志为空时导入旧版的同名 .json 文件"""
+        log = RecordLog(filepath)
+        legacy = os.path.splitext(filepath)[0] + '.json'
+        if not len(log) and os.path.exists(legacy):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(legacy, 'r', encoding='utf-8') as f:
+                    log.append(json.load(f))
             except:
                 pass
-        return []
+        return log
     
-    def _save_realtime(self, data, filepath):
-        """实时热存储"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def _save_realtime(self, records, log):
+        """实时热存储：本页的新记录追加到日志"""
+        log.append(records)
     
-    def _request_with_retry(self, url, params, max_retries=3):
-        """带重试的请求"""
-        for attempt in range(max_retries):
+    def _iter_pages(self, url, params, max_retries=3):
+        """
+        并发分页获取，按页码顺序yield每页数据
+        
+        限流由请求层的调度器等待，仍被限流时放弃；其他错误重试max_retries次，
+        从未完成的页码继续。
+        """
+        next_page = 1
+        attempt = 0
+        while attempt < max_retries:
             try:
-                resp = requests.get(url, headers=self.headers, params=params, timeout=30)
-                
-                if resp.status_code == 200:
-                    return resp.json()
-                elif resp.status_code == 403:
-                    reset_time = int(resp.headers.get('X-RateLimit-Reset', 0))
-                    wait_time = max(reset_time - int(time.time()), 60)
-                    if wait_time > 120:
-                        print(f"  ⚠ API限流需等待{wait_time}秒，跳过采集")
-                        return None
-                    print(f"  ⚠ API限流，等待{wait_time}秒...")
-                    time.sleep(wait_time)
-                    continue
-                elif resp.status_code == 422:
-                    return None
-                else:
-                    print(f"  ⚠ 请求失败({resp.status_code})，重试{attempt+1}/{max_retries}")
-                    time.sleep(5)
+                for page, data in self.client.iter_pages(url, params, start=next_page):
+                    next_page = page + 1
+                    yield page, data
+                return
+            except RateLimitError as e:
+                print(f"  ⚠ API限流，跳过采集: {e}")
+                return
             except Exception as e:
-                print(f"  ⚠ 网络错误: {e}，重试{attempt+1}/{max_retries}")
+                attempt += 1
+                print(f"  ⚠ 请求失败: {e}，重试{attempt}/{max_retries}")
                 time.sleep(5)
-        return None
     
     def fetch_issues(self, state='all'):
         """使用REST API获取issues（更稳定）"""
-        existing = self._load_existing(self.issues_file)
-        existing_numbers = {item['number'] for item in existing}
-        
-        all_issues = list(existing)
-        page = 1
+        log = self._load_existing(self.issues_file)
+        all_issues = log.load()
+        existing_numbers = {item['number'] for item in all_issues}
+        url = f"{self.base_url}/repos/{self.repo}/issues"
         
-        while True:
-            url = f"{self.base_url}/repos/{self.repo}/issues"
-            params = {'state': state, 'page': page, 'per_page': 100}
-            
-            data = self._request_with_retry(url, params)
-            if data is None or not data:
-                break
-            
-            new_count = 0
+        for page, data in self._iter_pages(url, {'state': state}):
+            new_issues = []
             for item in data:
                 if 'pull_request' in item:
                     continue
@@ -98,37 +90,25 @@ class IssuesCollector:
                         'labels': [l['name'] for l in item.get('labels', [])],
                         'comments': item.get('comments', 0)
                     }
-                    all_issues.append(issue)
+                    new_issues.append(issue)
                     existing_numbers.add(item['number'])
-                    new_count += 1
             
-            self._save_realtime(all_issues, self.issues_file)
+            all_issues.extend(new_issues)
+            self._save_realtime(new_issues, log)
             print(f"  获取第{page}页，累计{len(all_issues)}条issues")
-            
-            if len(data) < 100:
-                break
-            
-            page += 1
-            time.sleep(1)
         
+        log.close()
         return all_issues
     
     def fetch_pull_requests(self, state='all'):
         """获取PRs"""
-        existing = self._load_existing(self.prs_file)
-        existing_numbers = {item['number'] for item in existing}
+        log = self._load_existing(self.prs_file)
+        all_prs = log.load()
+        existing_numbers = {item['number'] for item in all_prs}
+        url = f"{self.base_url}/repos/{self.repo}/pulls"
         
-        all_prs = list(existing)
-        page = 1
-        
-        while True:
-            url = f"{self.base_url}/repos/{self.repo}/pulls"
-            params = {'state': state, 'page': page, 'per_page': 100}
-            
-            data = self._request_with_retry(url, params)
-            if data is None or not data:
-                break
-            
+        for page, data in self._iter_pages(url, {'state': state}):
+            new_prs = []
             for item in data:
                 if item['number'] not in existing_numbers:
                     pr = {
@@ -141,18 +121,14 @@ class IssuesCollector:
                         'merged_at': item.get('merged_at'),
                         'labels': [l['name'] for l in item.get('labels', [])]
                     }
-                    all_prs.append(pr)
+                    new_prs.append(pr)
                     existing_numbers.add(item['number'])
             
-            self._save_realtime(all_prs, self.prs_file)
+            all_prs.extend(new_prs)
+            self._save_realtime(new_prs, log)
             print(f"  获取第{page}页，累计{len(all_prs)}条PRs")
-            
-            if len(data) < 100:
-                break
-            
-            page += 1
-            time.sleep(1)
         
+        log.close()
         return all_prs
     
     def save_issues(self, issues, filename='issues.json'):
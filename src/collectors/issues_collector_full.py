@@ -3,14 +3,22 @@ Issues全量采集模块
 
 特性：
 - 分别获取open和closed状态
-- 指数退避等待（适合切换代理）
+- 网络错误指数退避等待（适合切换代理），限流由请求层的调度器处理
 - 断点续传（记录页码）
+- 按Link头并发获取各页，按页码顺序处理
+- 增量同步：记录最大的updated_at作为水位，之后只获取水位之后有更新的记录，
+  按number更新（状态变化、标签变化都会同步）
+- 存储为追加写的 issues.jsonl / pull_requests.jsonl，每页一次追加，
+  同一number以最后写入的版本为准；旧版的 .json 文件在首次打开时导入
 """
-import requests
 import json
 import os
 import time
 
+from src.collectors.http_client import get_client
+from src.exceptions import APIError
+from src.utils.record_log import RecordLog
+
 
 class IssuesCollectorFull:
     """全量Issues采集器"""
@@ -18,13 +26,12 @@ class IssuesCollectorFull:
     def __init__(self, repo, token=None):
         self.repo = repo
         self.base_url = "https://api.github.com"
-        self.headers = {'Accept': 'application/vnd.github.v3+json'}
-        if token:
-            self.headers['Authorization'] = f'token {token}'
+        self.client = get_client(token)
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
         
         self.progress_file = os.path.join(self.data_dir, '.fetch_progress.json')
+        self.sync_file = os.path.join(self.data_dir, '.issues_sync.json')
     
     def _load_progress(self):
         """加载进度"""
@@ -49,183 +56,293 @@ class IssuesCollectorFull:
         print(f"    ⏳ 等待{wait}秒后重试 (尝试{attempt+1})...")
         time.sleep(wait)
     
-    def _load_existing_issues(self):
-        """加载已有issues"""
-        filepath = os.path.join(self.data_dir, 'issues.json')
-        if os.path.exists(filepath):
+    @staticmethod
+    def _issue_record(item):
+        return {
+            'number': item['number'],
+            'title': item['title'],
+            'state': item['state'],
+            'author': item['user']['login'],
+            'created_at': item['created_at'],
+            'updated_at': item.get('updated_at'),
+            'closed_at': item.get('closed_at'),
+            'labels': [l['name'] for l in item.get('labels', [])]
+        }
+    
+    @staticmethod
+    def _pr_record(item):
+        return {
+            'number': item['number'],
+            'title': item['title'],
+            'state': item['state'],
+            'author': item['user']['login'],
+            'created_at': item['created_at'],
+            'updated_at': item.get('updated_at'),
+            'merged_at': item.get('merged_at')
+        }
+    
+    def _open_log(self, name):
+        """
+        打开 <name>.jsonl 记录日志
+        
+        日志为空而存在旧版的 <name>.json 时，先把其中的记录导入日志。
+        """
+        log = RecordLog(os.path.join(self.data_dir, f'{name}.jsonl'))
+        legacy = os.path.join(self.data_dir, f'{name}.json')
+        if not len(log) and os.path.exists(legacy):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
+                with open(legacy, 'r', encoding='utf-8') as f:
+                    log.append(json.load(f))
+            except (OSError, ValueError):
                 pass
-        return []
+        return log
     
-    def _save_issues(self, issues):
-        """保存issues"""
-        filepath = os.path.join(self.data_dir, 'issues.json')
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(issues, f, ensure_ascii=False, indent=2)
+    def _iter_pages(self, url, params, start_page=1, status=None):
+        """
+        并发分页获取，按页码顺序yield (页码, 数据)
+        
+        网络错误时指数退避，之后从未完成的页码继续，超过5次时放弃；
+        限流由调度器等待重试，仍被限流时放弃。
+        
+        Args:
+            status: 可选的字典，结束时写入 complete（是否取完了全部页面）
+        """
+        next_page = start_page
+        failed = 0
+        if status is not None:
+            status['complete'] = False
+        while True:
+            try:
+                for page, data in self.client.iter_pages(url, params, start=next_page):
+                    next_page = page + 1
+                    failed = 0
+                    yield page, data
+                if status is not None:
+                    status['complete'] = True
+                return
+            except APIError as e:
+                print(f"    ❌ {e}")
+                return
+            except Exception as e:
+                print(f"    ⚠ 错误: {e}")
+                failed += 1
+                if failed > 5:
+                    print(f"    ❌ 重试次数过多，停在第{next_page}页")
+                    return
+                self._exponential_backoff(failed)
     
     def fetch_all_issues(self):
         """获取全部Issues（open + closed）"""
-        existing = self._load_existing_issues()
-        existing_numbers = {i['number'] for i in existing}
-        all_issues = list(existing)
+        return self._fetch_all_issues()[0]
+    
+    def _fetch_all_issues(self):
+        """
+        全量获取Issues
         
+        Returns:
+            (全部issues, 是否取完)；未取完时保留页码进度，下次从中断处继续
+        """
+        log = self._open_log('issues')
         progress = self._load_progress()
+        complete = True
         
         for state in ['open', 'closed']:
             progress_key = f'issues_{state}'
             start_page = progress.get(progress_key, 1)
-            page = start_page
-            retry_count = 0
+            url = f"{self.base_url}/repos/{self.repo}/issues"
+            params = {'state': state, 'sort': 'created', 'direction': 'asc'}
             
             print(f"    获取{state}状态issues (从第{start_page}页开始)...")
             
-            while True:
-                url = f"{self.base_url}/repos/{self.repo}/issues"
-                params = {'state': state, 'page': page, 'per_page': 100, 'sort': 'created', 'direction': 'asc'}
-                
-                try:
-                    resp = requests.get(url, headers=self.headers, params=params, timeout=30)
-                    
-                    if resp.status_code == 403:
-                        retry_count += 1
-                        if retry_count > 10:
-                            print(f"    ❌ 重试次数过多，跳过")
-                            break
-                        self._exponential_backoff(retry_count)
-                        continue
-                    
-                    if resp.status_code != 200:
-                        print(f"    ❌ 请求失败: {resp.status_code}")
-                        break
-                    
-                    data = resp.json()
-                    if not data:
-                        break
-                    
-                    retry_count = 0
-                    new_count = 0
-                    
-                    for item in data:
-                        if 'pull_request' in item:
-                            continue
-                        if item['number'] not in existing_numbers:
-                            all_issues.append({
-                                'number': item['number'],
-                                'title': item['title'],
-                                'state': item['state'],
-                                'author': item['user']['login'],
-                                'created_at': item['created_at'],
-                                'closed_at': item.get('closed_at'),
-                                'labels': [l['name'] for l in item.get('labels', [])]
-                            })
-                            existing_numbers.add(item['number'])
-                            new_count += 1
-                    
-                    self._save_issues(all_issues)
-                    self._save_progress(progress_key, page + 1)
-                    
-                    total_state = len([i for i in all_issues if i['state'] == state])
-                    print(f"    第{page}页 (+{new_count}), {state}总计{total_state}条")
-                    
-                    if len(data) < 100:
-                        break
-                    
-                    page += 1
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    print(f"    ⚠ 错误: {e}")
-                    retry_count += 1
-                    if retry_count > 5:
-                        break
-                    self._exponential_backoff(retry_count)
+            status = {}
+            for page, data in self._iter_pages(url, params, start_page, status):
+                new_count = log.append(self._issue_record(item) for item in data
+                                       if 'pull_request' not in item)
+                self._save_progress(progress_key, page + 1)
+                print(f"    第{page}页 (+{new_count}), 总计{len(log)}条")
             
-            self._save_progress(progress_key, 1)
+            if status['complete']:
+                self._save_progress(progress_key, 1)
+            else:
+                complete = False
         
+        log.close()
+        all_issues = log.load()
         print(f"  ✓ Issues总计: {len(all_issues)} (open: {len([i for i in all_issues if i['state']=='open'])}, closed: {len([i for i in all_issues if i['state']=='closed'])})")
-        return all_issues
+        if not complete:
+            print("  ⚠ Issues未取完，下次从中断的页码继续")
+        return all_issues, complete
     
     def fetch_all_prs(self):
         """获取全部PRs"""
-        filepath = os.path.join(self.data_dir, 'pull_requests.json')
-        existing = []
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    existing = json.load(f)
-            except:
-                pass
-        
-        existing_numbers = {p['number'] for p in existing}
-        all_prs = list(existing)
+        return self._fetch_all_prs()[0]
+    
+    def _fetch_all_prs(self):
+        """
+        全量获取PRs
         
+        Returns:
+            (全部PRs, 是否取完)；未取完时保留页码进度，下次从中断处继续
+        """
+        log = self._open_log('pull_requests')
         progress = self._load_progress()
+        complete = True
         
         for state in ['open', 'closed']:
             progress_key = f'prs_{state}'
             start_page = progress.get(progress_key, 1)
-            page = start_page
-            retry_count = 0
+            url = f"{self.base_url}/repos/{self.repo}/pulls"
+            params = {'state': state, 'sort': 'created', 'direction': 'asc'}
             
             print(f"    获取{state}状态PRs (从第{start_page}页开始)...")
             
-            while True:
-                url = f"{self.base_url}/repos/{self.repo}/pulls"
-                params = {'state': state, 'page': page, 'per_page': 100, 'sort': 'created', 'direction': 'asc'}
-                
-                try:
-                    resp = requests.get(url, headers=self.headers, params=params, timeout=30)
-                    
-                    if resp.status_code == 403:
-                        retry_count += 1
-                        if retry_count > 10:
-                            break
-                        self._exponential_backoff(retry_count)
-                        continue
-                    
-                    if resp.status_code != 200:
-                        break
-                    
-                    data = resp.json()
-                    if not data:
-                        break
-                    
-                    retry_count = 0
-                    
-                    for item in data:
-                        if item['number'] not in existing_numbers:
-                            all_prs.append({
-                                'number': item['number'],
-                                'title': item['title'],
-                                'state': item['state'],
-                                'author': item['user']['login'],
-                                'created_at': item['created_at'],
-                                'merged_at': item.get('merged_at')
-                            })
-                            existing_numbers.add(item['number'])
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(all_prs, f, ensure_ascii=False, indent=2)
-                    self._save_progress(progress_key, page + 1)
-                    
-                    print(f"    第{page}页，{state}累计{len([p for p in all_prs if p['state']==state])}条")
-                    
-                    if len(data) < 100:
-                        break
-                    
-                    page += 1
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count > 5:
-                        break
-                    self._exponential_backoff(retry_count)
+            status = {}
+            for page, data in self._iter_pages(url, params, start_page, status):
+                log.append(self._pr_record(item) for item in data)
+                self._save_progress(progress_key, page + 1)
+                print(f"    第{page}页，累计{len(log)}条")
             
-            self._save_progress(progress_key, 1)
+            if status['complete']:
+                self._save_progress(progress_key, 1)
+            else:
+                complete = False
         
+        log.close()
+        all_prs = log.load()
         print(f"  ✓ PRs总计: {len(all_prs)}")
+        if not complete:
+            print("  ⚠ PRs未取完，下次从中断的页码继续")
+        return all_prs, complete
+    
+    def _load_sync_state(self):
+        if os.path.exists(self.sync_file):
+            try:
+                with open(self.sync_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+    
+    def _save_sync_state(self, key, watermark):
+        state = self._load_sync_state()
+        state[key] = watermark
+        with open(self.sync_file, 'w') as f:
+            json.dump(state, f)
+    
+    @staticmethod
+    def _watermark(records):
+        """记录中最大的updated_at，有记录缺少该字段（旧版本保存）时返回None"""
+        stamps = [r.get('updated_at') for r in records]
+        if not stamps or None in stamps:
+            return None
+        return max(stamps)
+    
+    def _get_page(self, url, params):
+        """请求一页，网络错误时指数退避重试，失败返回None"""
+        retry_count = 0
+        while True:
+            try:
+                resp = self.client.get(url, params=params)
+            except Exception as e:
+                print(f"    ⚠ 错误: {e}")
+                resp = None
+            if resp is not None:
+                if resp.status_code == 200:
+                    return resp.json()
+                print(f"    ❌ 请求失败: {resp.status_code}")
+                return None
+            retry_count += 1
+            if retry_count > 10:
+                print(f"    ❌ 重试次数过多，跳过")
+                return None
+            self._exponential_backoff(retry_count)
+    
+    def sync_issues(self):
+        """
+        增量同步Issues
+        
+        请求 since=<水位>&sort=updated，只返回水位之后有更新的issue，
+        每页追加到日志；没有水位时先全量获取，全量获取完整结束后才记录水位。
+        全部页面成功后才推进水位，中断后下次从原水位重新同步。
+        """
+        watermark = self._load_sync_state().get('issues')
+        if watermark is None:
+            all_issues, complete = self._fetch_all_issues()
+            watermark = self._watermark(all_issues)
+            if complete and watermark:
+                self._save_sync_state('issues', watermark)
+            return all_issues
+        
+        log = self._open_log('issues')
+        url = f"{self.base_url}/repos/{self.repo}/issues"
+        params = {'state': 'all', 'since': watermark, 'sort': 'updated', 'direction': 'asc'}
+        latest = watermark
+        page = 0
+        created = updated = 0
+        
+        print(f"    增量同步issues (水位 {watermark})...")
+        status = {}
+        for page, data in self._iter_pages(url, params, status=status):
+            records = [self._issue_record(item) for item in data
+                       if 'pull_request' not in item]
+            if data:
+                latest = max(latest, *(item['updated_at'] for item in data))
+            added = log.append(records)
+            created += added
+            updated += len(records) - added
+        
+        log.close()
+        all_issues = log.load()
+        if not status['complete']:
+            # 水位不推进，下次从原水位重新同步
+            return all_issues
+        self._save_sync_state('issues', latest)
+        print(f"  ✓ Issues增量同步: 新增{created}, 更新{updated}, 请求{page}页")
+        return all_issues
+    
+    def sync_prs(self):
+        """
+        增量同步PRs
+        
+        pulls接口不支持since，按sort=updated倒序分页，
+        遇到updated_at早于水位的记录即停止；没有水位时先全量获取，
+        全量获取完整结束后才记录水位。
+        """
+        watermark = self._load_sync_state().get('prs')
+        if watermark is None:
+            all_prs, complete = self._fetch_all_prs()
+            watermark = self._watermark(all_prs)
+            if complete and watermark:
+                self._save_sync_state('prs', watermark)
+            return all_prs
+        
+        log = self._open_log('pull_requests')
+        url = f"{self.base_url}/repos/{self.repo}/pulls"
+        latest = watermark
+        page = 1
+        created = updated = 0
+        
+        print(f"    增量同步PRs (水位 {watermark})...")
+        while True:
+            params = {'state': 'all', 'sort': 'updated', 'direction': 'desc',
+                      'page': page, 'per_page': 100}
+            data = self._get_page(url, params)
+            if data is None:
+                log.close()
+                return log.load()
+            
+            fresh = [item for item in data if item['updated_at'] >= watermark]
+            if fresh:
+                latest = max(latest, *(item['updated_at'] for item in fresh))
+            added = log.append(self._pr_record(item) for item in fresh)
+            created += added
+            updated += len(fresh) - added
+            if len(fresh) < len(data) or len(data) < 100:
+                break
+            page += 1
+        
+        log.close()
+        all_prs = log.load()
+        self._save_sync_state('prs', latest)
+        print(f"  ✓ PRs增量同步: 新增{created}, 更新{updated}, 请求{page}页")
         return all_prs
@@ -0,0 +1,427 @@
+"""
+全历史变更采集模块
+
+用一次 git log --numstat --raw -z 遍历整个历史，得到每个提交中
+每个文件的路径、前后blob id、增删行数和重命名信息，
+替代diff_collector中逐个提交调用 git show 的做法。
+
+结果存放在列式的ChangeTable中：
+- 提交按时间正序（最早的在前）编号
+- 路径、作者和作者邮箱做了字符串驻留，行数等列使用array存储
+- blob id以20字节二进制存放在bytearray中
+
+主要功能：
+- iter_file_changes: 流式读取每个提交及其文件变更
+- collect_changes: 采集全部变更，返回ChangeTable
+- ChangeTable: 紧凑变更表，支持按提交/按文件查询
+"""
+import base64
+import gzip
+import json
+import os
+from array import array
+from collections import defaultdict
+
+from src.config import DATA_DIR
+from src.collectors.git_collector import iter_log_records, is_ancestor, FIELD_SEP
+
+NUMSTAT_FORMAT = '%x1e%H%x00%at%x00%aN%x00%aE'
+_NULL_BLOB_BYTES = bytes(20)
+CHANGES_FILE = os.path.join(DATA_DIR, 'changes.json.gz')
+
+
+def _parse_change_record(record):
+    """
+    解析一个提交的 --raw/--numstat -z 输出
+    
+    Returns:
+        (commit, changes)，commit为 {hash, timestamp, author, email}，
+        changes为文件变更字典列表；无法解析时返回None
+    """
+    tokens = record.split(FIELD_SEP)
+    if len(tokens) < 4:
+        return None
+    
+    commit = {
+        'hash': tokens[0],
+        'timestamp': int(tokens[1]) if tokens[1].isdigit() else 0,
+        'author': tokens[2],
+        'email': tokens[3],
+    }
+    
+    raw_entries = []
+    numstats = []
+    i = 4
+    n = len(tokens)
+    while i < n:
+        token = tokens[i].lstrip('\n')
+        i += 1
+        if not token:
+            continue
+        
+        if token.startswith(':'):
+            # :old_mode new_mode old_blob new_blob status
+            meta = token[1:].split(' ')
+            if len(meta) < 5:
+                continue
+            status = meta[4]
+            if status[0] in 'RC':
+                old_path, path = tokens[i], tokens[i + 1]
+                i += 2
+            else:
+                old_path, path = None, tokens[i]
+                i += 1
+            raw_entries.append({
+                'path': path,
+                'old_path': old_path,
+                'status': status[0],
+                'similarity': int(status[1:]) if status[1:].isdigit() else None,
+                'old_blob': meta[2],
+                'new_blob': meta[3],
+            })
+        elif '\t' in token:
+            # added \t deleted \t path，重命名时path为空，随后是旧路径和新路径
+            added, deleted, path = token.split('\t', 2)
+            if not path:
+                path = tokens[i + 1]
+                i += 2
+            numstats.append((
+                path,
+                int(added) if added.isdigit() else -1,
+                int(deleted) if deleted.isdigit() else -1,
+            ))
+    
+    stats = {path: (added, deleted) for path, added, deleted in numstats}
+    for entry in raw_entries:
+        entry['additions'], entry['deletions'] = stats.get(entry['path'], (0, 0))
+    return commit, raw_entries
+
+
+def iter_file_changes(repo_path, rev_range=None):
+    """
+    流式读取历史中每个提交的文件变更（最早的提交在前）
+    
+    merge提交不展开diff，只返回空的变更列表。
+    
+    Args:
+        repo_path: 仓库路径
+        rev_range: 版本范围，默认为HEAD的全部历史
+    
+    Yields:
+        (commit, changes)，每个change包含path, old_path, status,
+        similarity, old_blob, new_blob, additions, deletions；
+        二进制文件的增删行数为-1
+    """
+    cmd = ['git', 'log', '--reverse', '--raw', '--numstat', '-z', '-M',
+           '--no-abbrev', f'--format={NUMSTAT_FORMAT}']
+    if rev_range:
+        cmd.append(rev_range)
+    cmd.append('--')
+    
+    for record in iter_log_records(repo_path, cmd):
+        parsed = _parse_change_record(record)
+        if parsed:
+            yield parsed
+
+
+class ChangeTable:
+    """
+    列式的文件变更表
+    
+    每行是一个(提交, 文件)变更，行按提交顺序排列，
+    commit_offsets[i]:commit_offsets[i+1] 即第i个提交的全部变更。
+    """
+    
+    def __init__(self):
+        # 提交表
+        self.hashes = []
+        self.timestamps = array('q')
+        self.author_ids = array('i')
+        self.authors = []
+        self._author_index = {}
+        self.email_ids = array('i')
+        self.emails = []
+        self._email_index = {}
+        self._commit_index = {}
+        self.commit_offsets = array('i', [0])
+        
+        # 变更表
+        self.paths = []
+        self._path_index = {}
+        self.commit_idx = array('i')
+        self.path_ids = array('i')
+        self.old_path_ids = array('i')
+        self.status = bytearray()
+        self.old_blobs = bytearray()
+        self.new_blobs = bytearray()
+        self.additions = array('i')
+        self.deletions = array('i')
+        self._path_rows = None
+    
+    def __len__(self):
+        return len(self.commit_idx)
+    
+    @property
+    def num_commits(self):
+        return len(self.hashes)
+    
+    @property
+    def head(self):
+        """最后采集到的提交hash"""
+        return self.hashes[-1] if self.hashes else None
+    
+    def _intern_path(self, path):
+        pid = self._path_index.get(path)
+        if pid is None:
+            pid = len(self.paths)
+            self.paths.append(path)
+            self._path_index[path] = pid
+        return pid
+    
+    def add_commit(self, commit, changes):
+        """追加一个提交及其变更"""
+        idx = len(self.hashes)
+        self.hashes.append(commit['hash'])
+        self._commit_index[commit['hash']] = idx
+        self.timestamps.append(commit['timestamp'])
+        
+        aid = self._author_index.get(commit['author'])
+        if aid is None:
+            aid = len(self.authors)
+            self.authors.append(commit['author'])
+            self._author_index[commit['author']] = aid
+        self.author_ids.append(aid)
+        
+        eid = self._email_index.get(commit['email'])
+        if eid is None:
+            eid = len(self.emails)
+            self.emails.append(commit['email'])
+            self._email_index[commit['email']] = eid
+        self.email_ids.append(eid)
+        
+        for change in changes:
+            self.commit_idx.append(idx)
+            self.path_ids.append(self._intern_path(change['path']))
+            old_path = change.get('old_path')
+            self.old_path_ids.append(self._intern_path(old_path) if old_path else -1)
+            self.status.append(ord(change['status']))
+            self.old_blobs += bytes.fromhex(change['old_blob'])
+            self.new_blobs += bytes.fromhex(change['new_blob'])
+            self.additions.append(change['additions'])
+            self.deletions.append(change['deletions'])
+        
+        self.commit_offsets.append(len(self.commit_idx))
+        self._path_rows = None
+        return idx
+    
+    def author_of(self, idx):
+        """第idx个提交的(作者署名, 邮箱)"""
+        return self.authors[self.author_ids[idx]], self.emails[self.email_ids[idx]]
+    
+    def commit_index(self, commit_hash):
+        """提交hash对应的序号，不存在时返回None"""
+        return self._commit_index.get(commit_hash)
+    
+    def blobs(self, i):
+        """第i行变更的(旧blob id, 新blob id)，新增/删除的一侧为None"""
+        old_blob = bytes(self.old_blobs[i * 20:(i + 1) * 20])
+        new_blob = bytes(self.new_blobs[i * 20:(i + 1) * 20])
+        return (None if old_blob == _NULL_BLOB_BYTES else old_blob.hex(),
+                None if new_blob == _NULL_BLOB_BYTES else new_blob.hex())
+    
+    def row(self, i):
+        """返回第i行变更的字典形式"""
+        old_pid = self.old_path_ids[i]
+        old_blob, new_blob = self.blobs(i)
+        return {
+            'commit': self.hashes[self.commit_idx[i]],
+            'path': self.paths[self.path_ids[i]],
+            'old_path': self.paths[old_pid] if old_pid >= 0 else None,
+            'status': chr(self.status[i]),
+            'old_blob': old_blob,
+            'new_blob': new_blob,
+            'additions': self.additions[i],
+            'deletions': self.deletions[i],
+        }
+    
+    def commit_rows(self, idx):
+        """第idx个提交的变更行号范围"""
+        return range(self.commit_offsets[idx], self.commit_offsets[idx + 1])
+    
+    def changes_for_commit(self, commit_hash):
+        """查询某个提交的全部文件变更"""
+        idx = self.commit_index(commit_hash)
+        if idx is None:
+            return []
+        return [self.row(i) for i in self.commit_rows(idx)]
+    
+    def commit_stats(self, commit_hash):
+        """某个提交的(增加行数, 删除行数)，二进制文件不计"""
+        idx = self.commit_index(commit_hash)
+        if idx is None:
+            return 0, 0
+        rows = self.commit_rows(idx)
+        insertions = sum(max(self.additions[i], 0) for i in rows)
+        deletions = sum(max(self.deletions[i], 0) for i in rows)
+        return insertions, deletions
+    
+    def changes_for_path(self, path):
+        """查询某个路径的全部变更（按时间正序）"""
+        if self._path_rows is None:
+            self._path_rows = defaultdict(list)
+            for i, pid in enumerate(self.path_ids):
+                self._path_rows[pid].append(i)
+        pid = self._path_index.get(path)
+        if pid is None:
+            return []
+        return [self.row(i) for i in self._path_rows[pid]]
+    
+    def churn_by_file(self):
+        """
+        按文件汇总变更
+        
+        Returns:
+            {path: {'commits', 'additions', 'deletions'}}
+        """
+        churn = {}
+        for pid, added, deleted in zip(self.path_ids, self.additions, self.deletions):
+            path = self.paths[pid]
+            entry = churn.get(path)
+            if entry is None:
+                entry = churn[path] = {'commits': 0, 'additions': 0, 'deletions': 0}
+            entry['commits'] += 1
+            entry['additions'] += max(added, 0)
+            entry['deletions'] += max(deleted, 0)
+        return churn
+    
+    def to_dataframe(self):
+        """转换为pandas DataFrame，每行一个文件变更"""
+        import pandas as pd
+        
+        commit_idx = list(self.commit_idx)
+        return pd.DataFrame({
+            'commit': pd.Categorical.from_codes(commit_idx, self.hashes),
+            'timestamp': [self.timestamps[i] for i in commit_idx],
+            'author': pd.Categorical.from_codes(
+                [self.author_ids[i] for i in commit_idx], self.authors),
+            'path': pd.Categorical.from_codes(list(self.path_ids), self.paths),
+            'status': list(self.status.decode('ascii')),
+            'additions': list(self.additions),
+            'deletions': list(self.deletions),
+        })
+    
+    def update(self, repo_path):
+        """
+        增量追加HEAD上新出现的提交
+        
+        Returns:
+            新增的提交数
+        """
+        rev_range = f'{self.head}..HEAD' if self.head else None
+        count = 0
+        for commit, changes in iter_file_changes(repo_path, rev_range):
+            if commit['hash'] in self._commit_index:
+                continue
+            self.add_commit(commit, changes)
+            count += 1
+        return count
+    
+    def save(self, filepath):
+        """保存为gzip压缩的列式JSON"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        data = {
+            'hashes': self.hashes,
+            'timestamps': self.timestamps.tolist(),
+            'authors': self.authors,
+            'author_ids': self.author_ids.tolist(),
+            'emails': self.emails,
+            'email_ids': self.email_ids.tolist(),
+            'commit_offsets': self.commit_offsets.tolist(),
+            'paths': self.paths,
+            'commit_idx': self.commit_idx.tolist(),
+            'path_ids': self.path_ids.tolist(),
+            'old_path_ids': self.old_path_ids.tolist(),
+            'status': self.status.decode('ascii'),
+            'old_blobs': base64.b64encode(bytes(self.old_blobs)).decode('ascii'),
+            'new_blobs': base64.b64encode(bytes(self.new_blobs)).decode('ascii'),
+            'additions': self.additions.tolist(),
+            'deletions': self.deletions.tolist(),
+        }
+        with gzip.open(filepath, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        print(f"✓ 保存变更表: {filepath} ({self.num_commits}个提交, {len(self)}条变更)")
+    
+    @classmethod
+    def load(cls, filepath):
+        """从save()生成的文件加载，文件不存在或是没有作者邮箱的旧格式时返回None"""
+        if not os.path.exists(filepath):
+            return None
+        with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'email_ids' not in data:
+            return None
+        
+        table = cls()
+        table.hashes = data['hashes']
+        table._commit_index = {h: i for i, h in enumerate(table.hashes)}
+        table.timestamps = array('q', data['timestamps'])
+        table.authors = data['authors']
+        table._author_index = {a: i for i, a in enumerate(table.authors)}
+        table.author_ids = array('i', data['author_ids'])
+        table.emails = data['emails']
+        table._email_index = {e: i for i, e in enumerate(table.emails)}
+        table.email_ids = array('i', data['email_ids'])
+        table.commit_offsets = array('i', data['commit_offsets'])
+        table.paths = data['paths']
+        table._path_index = {p: i for i, p in enumerate(table.paths)}
+        table.commit_idx = array('i', data['commit_idx'])
+        table.path_ids = array('i', data['path_ids'])
+        table.old_path_ids = array('i', data['old_path_ids'])
+        table.status = bytearray(data['status'].encode('ascii'))
+        table.old_blobs = bytearray(base64.b64decode(data['old_blobs']))
+        table.new_blobs = bytearray(base64.b64decode(data['new_blobs']))
+        table.additions = array('i', data['additions'])
+        table.deletions = array('i', data['deletions'])
+        return table
+
+
+def collect_changes(repo_path, rev_range=None):
+    """
+    一次遍历采集全部历史的文件变更
+    
+    Args:
+        repo_path: 仓库路径
+        rev_range: 版本范围，默认为HEAD的全部历史
+    
+    Returns:
+        ChangeTable
+    """
+    table = ChangeTable()
+    for commit, changes in iter_file_changes(repo_path, rev_range):
+        table.add_commit(commit, changes)
+    print(f"✓ 采集变更: {table.num_commits} 个提交, {len(table)} 条文件变更")
+    return table
+
+
+def load_or_collect_changes(repo_path, filepath=CHANGES_FILE):
+    """
+    加载已保存的变更表并增量更新，没有时全量采集
+    
+    Args:
+        repo_path: 仓库路径
+        filepath: 变更表文件路径
+    
+    Returns:
+        ChangeTable
+    """
+    table = ChangeTable.load(filepath)
+    if table is not None and table.head and not is_ancestor(repo_path, table.head, 'HEAD'):
+        print("  历史已被改写，重新采集变更表...")
+        table = None
+    if table is None:
+        table = collect_changes(repo_path)
+    else:
+        added = table.update(repo_path)
+        print(f"✓ 增量更新变更表: +{added} 个提交")
+    table.save(filepath)
+    return table
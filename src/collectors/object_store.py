@@ -0,0 +1,672 @@
+"""
+纯Python的Git对象库读取模块
+
+直接读取 .git/objects，读对象时不启动任何git进程：
+- 松散对象：zlib解压
+- 包文件：.idx 二分查找定位，.pack 用mmap映射，
+  OFS_DELTA/REF_DELTA 逐级还原，delta基对象放入LRU缓存
+- 解析commit、tree、tag对象，按引用名解析版本；
+  缩写hash、rev:path 等其余版本语法交给 git rev-parse
+
+只支持SHA-1对象格式的仓库。open_object_store 按仓库共享一个实例，
+整个流程（GitTreeProvider、复杂度/存活分析等）都通过它读取历史blob。
+
+主要功能：
+- ObjectStore: 对象库读取器
+- open_object_store: 获取按仓库共享的ObjectStore
+- find_git_dir / common_dir: 定位git目录和worktree共享的公共目录
+- parse_commit / parse_tree / parse_tag: 对象解析
+"""
+import mmap
+import os
+import re
+import struct
+import subprocess
+import threading
+import zlib
+
+from src.exceptions import GitError
+from src.utils.cache import LRUCache
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+TYPE_NAMES = {OBJ_COMMIT: 'commit', OBJ_TREE: 'tree', OBJ_BLOB: 'blob', OBJ_TAG: 'tag'}
+
+DEFAULT_DELTA_CACHE_BYTES = 32 * 1024 * 1024
+_DECOMPRESS_CHUNK = 16 * 1024
+_REV_SUFFIX_RE = re.compile(r'^(.+?)((?:[~^]\d*)+)$')
+_REV_STEP_RE = re.compile(r'([~^])(\d*)')
+
+
+def find_git_dir(repo_path):
+    """
+    定位git目录
+    
+    支持普通仓库（.git目录）、worktree/子模块（.git文件中的gitdir:）和裸仓库。
+    
+    Returns:
+        git目录的绝对路径
+    """
+    dot_git = os.path.join(repo_path, '.git')
+    if os.path.isdir(dot_git):
+        return os.path.abspath(dot_git)
+    if os.path.isfile(dot_git):
+        with open(dot_git, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content.startswith('gitdir:'):
+            git_dir = content[len('gitdir:'):].strip()
+            return os.path.abspath(os.path.join(repo_path, git_dir))
+    if os.path.isdir(os.path.join(repo_path, 'objects')) and \
+            os.path.exists(os.path.join(repo_path, 'HEAD')):
+        return os.path.abspath(repo_path)
+    raise GitError(f"不是git仓库: {repo_path}")
+
+
+def common_dir(git_dir):
+    """git目录对应的公共目录：worktree的对象和引用保存在commondir中，普通仓库就是git目录本身"""
+    path = os.path.join(git_dir, 'commondir')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return os.path.abspath(os.path.join(git_dir, f.read().strip()))
+    return git_dir
+
+
+def apply_delta(base, delta):
+    """
+    将delta指令应用到基对象上
+    
+    Args:
+        base: 基对象内容
+        delta: delta数据
+    
+    Returns:
+        还原后的对象内容
+    """
+    pos = 0
+    
+    def read_varint():
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+    
+    src_size = read_varint()
+    dst_size = read_varint()
+    if src_size != len(base):
+        raise GitError("delta基对象大小不匹配")
+    
+    out = bytearray()
+    n = len(delta)
+    while pos < n:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # 从基对象复制
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            if size == 0:
+                size = 0x10000
+            out += base[offset:offset + size]
+        elif op:
+            # 插入新数据
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitError("非法的delta指令")
+    
+    if len(out) != dst_size:
+        raise GitError("delta结果大小不匹配")
+    return bytes(out)
+
+
+class PackIndex:
+    """pack .idx 文件（v1/v2），通过fanout表加二分查找定位对象"""
+    
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._data
+        
+        if data[:4] == b'\xfftOc':
+            self.version = struct.unpack('>I', data[4:8])[0]
+            if self.version != 2:
+                raise GitError(f"不支持的idx版本: {self.version}")
+            fanout_start = 8
+        else:
+            self.version = 1
+            fanout_start = 0
+        
+        self._fanout = struct.unpack('>256I', data[fanout_start:fanout_start + 1024])
+        self.count = self._fanout[255]
+        base = fanout_start + 1024
+        if self.version == 2:
+            self._sha_start = base
+            self._sha_stride = 20
+            self._crc_start = base + 20 * self.count
+            self._offset_start = self._crc_start + 4 * self.count
+            self._large_start = self._offset_start + 4 * self.count
+        else:
+            self._sha_start = base + 4
+            self._sha_stride = 24
+            self._offset_start = base
+    
+    def _sha_at(self, i):
+        start = self._sha_start + i * self._sha_stride
+        return self._data[start:start + 20]
+    
+    def _offset_at(self, i):
+        if self.version == 1:
+            start = self._offset_start + i * 24
+            return struct.unpack('>I', self._data[start:start + 4])[0]
+        start = self._offset_start + i * 4
+        offset = struct.unpack('>I', self._data[start:start + 4])[0]
+        if offset & 0x80000000:
+            start = self._large_start + (offset & 0x7fffffff) * 8
+            offset = struct.unpack('>Q', self._data[start:start + 8])[0]
+        return offset
+    
+    def find(self, sha):
+        """
+        查找对象在pack中的偏移
+        
+        Args:
+            sha: 20字节的二进制对象id
+        
+        Returns:
+            偏移量，不存在时返回None
+        """
+        first = sha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur = self._sha_at(mid)
+            if cur < sha:
+                lo = mid + 1
+            elif cur > sha:
+                hi = mid
+            else:
+                return self._offset_at(mid)
+        return None
+    
+    def __iter__(self):
+        """遍历全部 (sha, offset)"""
+        for i in range(self.count):
+            yield self._sha_at(i), self._offset_at(i)
+    
+    def close(self):
+        self._data.close()
+
+
+class PackFile:
+    """mmap映射的 .pack 文件"""
+    
+    def __init__(self, path, store):
+        self.path = path
+        self.index = PackIndex(path[:-len('.pack')] + '.idx')
+        self._store = store
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:4] != b'PACK':
+            raise GitError(f"非法的pack文件: {path}")
+    
+    def _read_header(self, offset):
+        """读取对象头，返回(类型, 解压后大小, 数据起始位置)"""
+        data = self._data
+        byte = data[offset]
+        offset += 1
+        obj_type = (byte >> 4) & 0x07
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        return obj_type, size, offset
+    
+    def _inflate(self, offset, size):
+        """从offset处解压出size字节"""
+        dobj = zlib.decompressobj()
+        out = []
+        total = 0
+        chunk = max(size + 64, _DECOMPRESS_CHUNK)
+        pos = offset
+        end = len(self._data)
+        while not dobj.eof and pos < end:
+            piece = dobj.decompress(self._data[pos:pos + chunk])
+            pos += chunk
+            if piece:
+                out.append(piece)
+                total += len(piece)
+        result = b''.join(out)
+        if total != size:
+            raise GitError(f"pack对象解压大小不匹配: {self.path}@{offset}")
+        return result
+    
+    def _delta_base(self, obj_type, data_start):
+        """解析delta对象的基对象位置，返回(基对象偏移或sha, delta数据起始位置)"""
+        data = self._data
+        pos = data_start
+        if obj_type == OBJ_OFS_DELTA:
+            byte = data[pos]
+            pos += 1
+            rel = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                rel = ((rel + 1) << 7) | (byte & 0x7f)
+            return ('ofs', rel), pos
+        return ('ref', bytes(data[pos:pos + 20])), pos + 20
+    
+    def read_at(self, offset):
+        """
+        读取并还原pack中指定偏移的对象
+        
+        delta链从外到内收集，遇到缓存命中或完整对象后再依次应用。
+        
+        Returns:
+            (type_name, data)
+        """
+        cache = self._store.delta_cache
+        chain = []
+        cur = offset
+        while True:
+            cached = cache.get((self.path, cur))
+            if cached is not None:
+                base_type, base = cached
+                break
+            obj_type, size, data_start = self._read_header(cur)
+            if obj_type in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+                (kind, ref), delta_start = self._delta_base(obj_type, data_start)
+                chain.append((cur, size, delta_start))
+                if kind == 'ofs':
+                    cur = cur - ref
+                    continue
+                base_type, base = self._store.read_binary(ref)
+                break
+            base_type = TYPE_NAMES[obj_type]
+            base = self._inflate(data_start, size)
+            if chain:
+                cache.put((self.path, cur), (base_type, base))
+            break
+        
+        for delta_offset, size, delta_start in reversed(chain):
+            base = apply_delta(base, self._inflate(delta_start, size))
+            # 只缓存作为其他delta基的中间结果
+            if delta_offset != offset:
+                cache.put((self.path, delta_offset), (base_type, base))
+        return base_type, base
+    
+    def close(self):
+        self._data.close()
+        self.index.close()
+
+
+def parse_commit(data):
+    """
+    解析commit对象
+    
+    Returns:
+        {tree, parents, author, author_time, committer, commit_time, message}
+    """
+    text = data.decode('utf-8', errors='replace')
+    header, _, message = text.partition('\n\n')
+    commit = {'tree': None, 'parents': [], 'author': '', 'author_time': 0,
+              'committer': '', 'commit_time': 0, 'message': message}
+    for line in header.split('\n'):
+        key, _, value = line.partition(' ')
+        if key == 'tree':
+            commit['tree'] = value
+        elif key == 'parent':
+            commit['parents'].append(value)
+        elif key in ('author', 'committer'):
+            # Name <email> timestamp tz
+            ident, _, rest = value.rpartition('> ')
+            parts = rest.split(' ')
+            commit[key] = ident + '>'
+            commit['author_time' if key == 'author' else 'commit_time'] = \
+                int(parts[0]) if parts and parts[0].lstrip('-').isdigit() else 0
+    return commit
+
+
+def parse_tree(data):
+    """
+    解析tree对象
+    
+    Returns:
+        [(mode, name, oid)]，mode为字符串如 '100644'、'40000'
+    """
+    entries = []
+    pos = 0
+    n = len(data)
+    while pos < n:
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        mode = data[pos:space].decode('ascii')
+        name = data[space + 1:nul].decode('utf-8', errors='surrogateescape')
+        oid = data[nul + 1:nul + 21].hex()
+        entries.append((mode, name, oid))
+        pos = nul + 21
+    return entries
+
+
+def parse_tag(data):
+    """
+    解析tag对象
+    
+    Returns:
+        {object, type, tag, tagger, message}
+    """
+    text = data.decode('utf-8', errors='replace')
+    header, _, message = text.partition('\n\n')
+    tag = {'object': None, 'type': None, 'tag': None, 'tagger': '', 'message': message}
+    for line in header.split('\n'):
+        key, _, value = line.partition(' ')
+        if key in ('object', 'type', 'tag', 'tagger'):
+            tag[key] = value
+    return tag
+
+
+class ObjectStore:
+    """
+    .git/objects 读取器
+    
+    Attributes:
+        git_dir: git目录
+        objects_dir: 对象目录
+        delta_cache: delta基对象缓存，键为(pack路径, 偏移)
+    """
+    
+    def __init__(self, repo_path, delta_cache_bytes=DEFAULT_DELTA_CACHE_BYTES):
+        self.git_dir = find_git_dir(repo_path)
+        self.common_dir = common_dir(self.git_dir)
+        self.objects_dir = os.path.join(self.common_dir, 'objects')
+        self.delta_cache = LRUCache(max_bytes=delta_cache_bytes, sizeof=lambda v: len(v[1]))
+        self._packs = {}
+        self._lock = threading.Lock()
+        self._packed_refs = None
+        self._packed_refs_stat = None
+        self._alternates = self._load_alternates()
+        self.refresh()
+    
+    def _load_alternates(self):
+        path = os.path.join(self.objects_dir, 'info', 'alternates')
+        stores = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        alt = os.path.join(self.objects_dir, line)
+                        stores.append(os.path.abspath(alt))
+        return stores
+    
+    def refresh(self):
+        """重新扫描pack目录，加载新出现的pack"""
+        with self._lock:
+            for objects_dir in [self.objects_dir] + self._alternates:
+                pack_dir = os.path.join(objects_dir, 'pack')
+                if not os.path.isdir(pack_dir):
+                    continue
+                for name in sorted(os.listdir(pack_dir)):
+                    if not name.endswith('.pack'):
+                        continue
+                    path = os.path.join(pack_dir, name)
+                    if path in self._packs or \
+                            not os.path.exists(path[:-len('.pack')] + '.idx'):
+                        continue
+                    self._packs[path] = PackFile(path, self)
+    
+    def _read_loose(self, hex_oid):
+        for objects_dir in [self.objects_dir] + self._alternates:
+            path = os.path.join(objects_dir, hex_oid[:2], hex_oid[2:])
+            try:
+                with open(path, 'rb') as f:
+                    raw = zlib.decompress(f.read())
+            except FileNotFoundError:
+                continue
+            header, _, body = raw.partition(b'\0')
+            obj_type, _, size = header.decode('ascii').partition(' ')
+            if int(size) != len(body):
+                raise GitError(f"松散对象大小不匹配: {hex_oid}")
+            return obj_type, body
+        return None
+    
+    def _read_packed(self, sha):
+        for pack in list(self._packs.values()):
+            offset = pack.index.find(sha)
+            if offset is not None:
+                return pack.read_at(offset)
+        return None
+    
+    def read_binary(self, sha):
+        """按20字节二进制id读取对象，不存在时抛出GitError"""
+        result = self._read_packed(sha) or self._read_loose(sha.hex())
+        if result is None:
+            # 可能有新的pack（如gc之后），刷新后再试一次
+            self.refresh()
+            result = self._read_packed(sha)
+        if result is None:
+            raise GitError(f"对象不存在: {sha.hex()}")
+        return result
+    
+    def read(self, oid):
+        """
+        读取对象
+        
+        Args:
+            oid: 40位十六进制对象id
+        
+        Returns:
+            (type, data)
+        """
+        return self.read_binary(bytes.fromhex(oid))
+    
+    def contains(self, oid):
+        """对象是否存在"""
+        try:
+            self.read(oid)
+            return True
+        except GitError:
+            return False
+    
+    def read_blob(self, oid):
+        obj_type, data = self.read(oid)
+        if obj_type != 'blob':
+            raise GitError(f"{oid} 不是blob而是{obj_type}")
+        return data
+    
+    def read_commit(self, oid):
+        obj_type, data = self.read(oid)
+        if obj_type != 'commit':
+            raise GitError(f"{oid} 不是commit而是{obj_type}")
+        return parse_commit(data)
+    
+    def read_tree(self, oid):
+        obj_type, data = self.read(oid)
+        if obj_type != 'tree':
+            raise GitError(f"{oid} 不是tree而是{obj_type}")
+        return parse_tree(data)
+    
+    def walk_tree(self, tree_oid, prefix=''):
+        """
+        递归遍历tree，跳过子模块
+        
+        Yields:
+            (path, mode, blob_oid)
+        """
+        for mode, name, oid in self.read_tree(tree_oid):
+            path = f'{prefix}{name}'
+            if mode == '40000':
+                yield from self.walk_tree(oid, path + '/')
+            elif mode != '160000':
+                yield path, mode, oid
+    
+    def _read_ref_file(self, ref):
+        for base in (self.git_dir, self.common_dir):
+            path = os.path.join(base, ref)
+            if os.path.isfile(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return f.read().strip()
+        return self._read_packed_refs().get(ref)
+    
+    def _read_packed_refs(self):
+        """读取packed-refs，文件变化（如 git pack-refs、fetch 之后）时重新加载"""
+        path = os.path.join(self.common_dir, 'packed-refs')
+        try:
+            st = os.stat(path)
+            stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stat = None
+        if self._packed_refs is None or stat != self._packed_refs_stat:
+            refs = {}
+            if stat is not None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.startswith(('#', '^')):
+                            continue
+                        parts = line.strip().split(' ', 1)
+                        if len(parts) == 2:
+                            refs[parts[1]] = parts[0]
+            self._packed_refs, self._packed_refs_stat = refs, stat
+        return self._packed_refs
+    
+    def resolve(self, rev):
+        """
+        解析引用名或对象id
+        
+        直接支持完整的40位hash、HEAD、分支名、标签名、远程分支名和完整引用名，
+        以及 ~N、^N 后缀（如 HEAD~3、v1.0^2）；
+        其余写法（缩写hash、rev:path、@{u} 等）交给 git rev-parse。
+        
+        Returns:
+            对象id（标签名返回tag对象本身，需要提交时用resolve_commit）
+        """
+        if ':' in rev or '@' in rev:
+            return self._rev_parse(rev)
+        m = _REV_SUFFIX_RE.match(rev)
+        if m:
+            return self._walk_parents(self.resolve_commit(m.group(1)), m.group(2), rev)
+        if len(rev) == 40 and all(c in '0123456789abcdef' for c in rev):
+            return rev
+        if rev.startswith('refs/') or rev.isupper():
+            # 完整引用名或 HEAD、ORIG_HEAD 这类伪引用
+            candidates = [rev]
+        else:
+            candidates = [f'refs/{rev}', f'refs/tags/{rev}', f'refs/heads/{rev}',
+                          f'refs/remotes/{rev}', f'refs/remotes/{rev}/HEAD']
+        for ref in candidates:
+            value = self._read_ref_file(ref)
+            depth = 0
+            while value and value.startswith('ref: ') and depth < 10:
+                value = self._read_ref_file(value[5:])
+                depth += 1
+            if value:
+                return value
+        return self._rev_parse(rev)
+    
+    def _rev_parse(self, rev):
+        """用 git rev-parse 解析对象库无法直接解析的版本"""
+        if rev.startswith('-'):
+            raise GitError(f"无法解析版本: {rev}")
+        try:
+            return subprocess.check_output(['git', 'rev-parse', '--verify', '--quiet', rev],
+                                           cwd=self.git_dir, encoding='utf-8',
+                                           stderr=subprocess.DEVNULL).strip()
+        except (OSError, subprocess.CalledProcessError):
+            raise GitError(f"无法解析版本: {rev}") from None
+    
+    def _walk_parents(self, oid, steps, rev):
+        """按 ~N / ^N 后缀沿父提交移动"""
+        for op, num in _REV_STEP_RE.findall(steps):
+            n = int(num) if num else 1
+            if op == '~':
+                hops, index = n, 0
+            elif n == 0:
+                continue
+            else:
+                hops, index = 1, n - 1
+            for _ in range(hops):
+                parents = self.read_commit(oid)['parents']
+                if index >= len(parents):
+                    raise GitError(f"无法解析版本: {rev}")
+                oid = parents[index]
+        return oid
+    
+    def peel(self, oid):
+        """剥离tag，返回最终指向的对象 (type, oid)"""
+        obj_type, data = self.read(oid)
+        while obj_type == 'tag':
+            oid = parse_tag(data)['object']
+            obj_type, data = self.read(oid)
+        return obj_type, oid
+    
+    def resolve_commit(self, rev):
+        """解析版本为提交id"""
+        obj_type, oid = self.peel(self.resolve(rev))
+        if obj_type != 'commit':
+            raise GitError(f"{rev} 不指向提交")
+        return oid
+    
+    def resolve_tree(self, treeish):
+        """解析tree-ish（提交、标签、分支或tree id）为tree id"""
+        obj_type, oid = self.peel(self.resolve(treeish))
+        if obj_type == 'commit':
+            return self.read_commit(oid)['tree']
+        if obj_type == 'tree':
+            return oid
+        raise GitError(f"{treeish} 不是tree-ish")
+    
+    def close(self):
+        """关闭全部mmap"""
+        with self._lock:
+            for pack in self._packs.values():
+                pack.close()
+            self._packs = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_object_store(repo_path):
+    """
+    获取仓库共享的ObjectStore
+    
+    Args:
+        repo_path: 仓库路径
+    
+    Returns:
+        ObjectStore
+    """
+    key = os.path.abspath(repo_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ObjectStore(repo_path)
+        return store
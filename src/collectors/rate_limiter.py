@@ -0,0 +1,170 @@
+"""
+GitHub限流调度
+
+所有请求发出前向调度器申请一个token，响应返回后把限流响应头交还给调度器：
+- X-RateLimit-Remaining / X-RateLimit-Reset：按剩余额度把请求均匀分布到重置时间之前，
+  额度恰好在重置时用完，不会先打满再长时间空等
+- Retry-After 和二级限流（403/429且额度未用完）：该token暂停到提示的时间
+- 配置了多个token时，每次选择最早可用的token，一个token被限流时其余token继续工作
+
+并发请求的响应到达顺序与服务端扣减顺序不一致，同一个重置周期内剩余额度取最小值。
+
+主要功能：
+- RateLimitScheduler: 按token记录额度并安排请求时间
+- get_scheduler: 按token列表共享的调度器，同一进程内所有客户端共用额度信息
+- configured_tokens: 读取配置中的token列表
+"""
+import threading
+import time
+
+from src.config import GITHUB_TOKEN, GITHUB_TOKENS
+
+# 二级限流没有给出Retry-After时的等待秒数（GitHub文档建议至少一分钟）
+SECONDARY_LIMIT_WAIT = 60
+
+
+def configured_tokens():
+    """GITHUB_TOKEN 和 GITHUB_TOKENS 中的token，去重并保持顺序"""
+    tokens = []
+    for token in [GITHUB_TOKEN, *(GITHUB_TOKENS or [])]:
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+class _TokenState:
+    __slots__ = ('token', 'remaining', 'reset', 'blocked_until', 'next_slot')
+    
+    def __init__(self, token):
+        self.token = token
+        self.remaining = None       # 未知时为None
+        self.reset = 0
+        self.blocked_until = 0
+        self.next_slot = 0
+    
+    def ready_at(self, now):
+        """该token下一次可以发请求的时间"""
+        at = max(self.blocked_until, self.next_slot)
+        if self.remaining is not None and self.remaining <= 0:
+            at = max(at, self.reset)
+        return at
+    
+    def interval(self, now):
+        """把剩余额度均匀分布到重置时间之前的请求间隔"""
+        if self.remaining is None or self.reset <= now:
+            return 0
+        return (self.reset - now) / max(self.remaining, 1)
+
+
+class RateLimitScheduler:
+    """
+    多token的限流调度器
+    
+    Args:
+        tokens: token列表，为空时使用一个匿名身份（None）
+        clock / sleep: 时间函数，测试时可替换
+    """
+    
+    def __init__(self, tokens=None, clock=time.time, sleep=time.sleep):
+        self._states = [_TokenState(t) for t in (tokens or [None])]
+        self._by_token = {s.token: s for s in self._states}
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.waited = 0.0
+    
+    @property
+    def tokens(self):
+        return [s.token for s in self._states]
+    
+    def acquire(self):
+        """
+        等到某个token可以发请求，返回该token
+        
+        选择最早可用的token，并为它预留下一个请求时段。
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                state = min(self._states, key=lambda s: s.ready_at(now))
+                at = state.ready_at(now)
+                if at <= now:
+                    if state.remaining is not None:
+                        if state.reset <= now:
+                            # 已过重置时间，额度未知，等下一个响应更新
+                            state.remaining = None
+                        else:
+                            state.remaining -= 1
+                    state.next_slot = now + state.interval(now)
+                    return state.token
+                wait = at - now
+                self.waited += wait
+            self._sleep(wait)
+    
+    def update(self, token, resp):
+        """
+        根据响应头更新token的额度
+        
+        Returns:
+            响应是否因限流失败、需要重试
+        """
+        headers = resp.headers
+        now = self._clock()
+        with self._lock:
+            state = self._by_token[token]
+            remaining = headers.get('X-RateLimit-Remaining')
+            if remaining is not None:
+                remaining = int(remaining)
+                reset = int(headers.get('X-RateLimit-Reset', 0))
+                if reset > state.reset or state.remaining is None:
+                    state.reset = reset
+                    state.remaining = remaining
+                elif reset == state.reset:
+                    state.remaining = min(state.remaining, remaining)
+            
+            if resp.status_code not in (403, 429):
+                return False
+            retry_after = headers.get('Retry-After')
+            if retry_after is not None:
+                state.blocked_until = now + int(retry_after)
+            elif remaining == 0:
+                state.blocked_until = state.reset
+            elif resp.status_code == 429 or 'rate limit' in resp.text.lower():
+                state.blocked_until = now + SECONDARY_LIMIT_WAIT
+            else:
+                # 没有权限等普通403，不是限流
+                return False
+            wait = max(state.blocked_until - now, 0)
+        
+        label = f'token #{self.tokens.index(token) + 1}' if token else '匿名请求'
+        print(f"  ⏳ {label} 被限流，{wait:.0f}秒后可用")
+        return True
+    
+    def available(self):
+        """所有token剩余额度之和，有token额度未知时返回None"""
+        with self._lock:
+            if any(s.remaining is None for s in self._states):
+                return None
+            return sum(max(s.remaining, 0) for s in self._states)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(tokens=None):
+    """
+    按token列表共享的RateLimitScheduler
+    
+    额度属于token而不是客户端，使用相同token的所有客户端必须共用一个调度器，
+    否则各自按完整额度安排请求，合起来仍会超限。
+    
+    Args:
+        tokens: token列表，默认为配置中的token
+    """
+    key = tuple(configured_tokens() if tokens is None else tokens)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = RateLimitScheduler(list(key))
+        return scheduler
@@ -0,0 +1,231 @@
+"""
+发布归属索引
+
+回答"某个提交最早随哪个版本发布"。
+逐个提交调用 git tag --contains 的代价是 提交数 × 标签数，
+这里用一次 git log 读出标签可达的提交图（CommitGraph），按发布顺序
+从每个标签出发沿父提交遍历，遇到已标记的提交就停止，未标记的提交标记为当前标签。
+
+发布顺序按祖先关系（提交代数）而不是标签日期：标签日期可能早于它的祖先标签
+（补打的标签、导入的历史），按日期处理会把提交记到错误的版本上。
+祖先标签总是先处理，每个提交得到的就是最早包含它的标签，整个历史只遍历一遍。
+
+主要功能：
+- ReleaseIndex: 提交 → 最早发布版本的映射，支持增量追加新标签
+- build_release_index: 全量构建索引
+- order_tags: 按祖先关系排列标签
+- load_or_build_release_index: 加载已保存的索引，有新标签时增量更新
+"""
+import json
+import os
+from datetime import datetime
+
+from src.config import DATA_DIR
+from src.collectors.commit_graph import CommitGraph, build_commit_graph
+from src.collectors.tag_collector import get_all_tags_info
+from src.exceptions import GitError
+
+RELEASE_INDEX_FILE = os.path.join(DATA_DIR, 'release_index.json')
+
+
+class ReleaseIndex:
+    """
+    提交到最早发布版本的索引
+    
+    Attributes:
+        tags: 已处理的标签列表（按发布顺序，祖先在前），每条包含tag, hash, date
+        releases: {提交hash: 标签在tags中的下标}
+        skipped: 不指向提交而被跳过的标签 [{tag, hash}]
+    """
+    
+    def __init__(self):
+        self.tags = []
+        self.releases = {}
+        self.skipped = []
+    
+    def __len__(self):
+        return len(self.releases)
+    
+    def __contains__(self, commit):
+        return commit in self.releases
+    
+    def release_of(self, commit):
+        """提交最早所在的标签名，尚未发布时返回None"""
+        idx = self.releases.get(commit)
+        return None if idx is None else self.tags[idx]['tag']
+    
+    def commits_of(self, tag):
+        """首次随该标签发布的提交列表"""
+        for idx, t in enumerate(self.tags):
+            if t['tag'] == tag:
+                return [c for c, i in self.releases.items() if i == idx]
+        return []
+    
+    def release_sizes(self):
+        """{标签: 首次随该标签发布的提交数}，按发布顺序"""
+        counts = [0] * len(self.tags)
+        for idx in self.releases.values():
+            counts[idx] += 1
+        return {t['tag']: n for t, n in zip(self.tags, counts)}
+    
+    def add_tags(self, graph, tags):
+        """
+        按顺序追加标签并标记新发布的提交
+        
+        tags必须排在已处理的标签之后（见 order_tags），
+        遍历在已标记的提交处停止，只访问新发布的那部分历史。
+        
+        Args:
+            graph: 包含这些标签的CommitGraph
+            tags: 按发布顺序排列的新标签
+        
+        Returns:
+            新标记的提交数
+        """
+        before = len(self.releases)
+        for tag in tags:
+            idx = len(self.tags)
+            self.tags.append({'tag': tag['tag'], 'hash': tag['hash'], 'date': tag['date']})
+            
+            stack = [tag['hash']]
+            while stack:
+                commit = stack.pop()
+                if commit in self.releases or commit not in graph:
+                    continue
+                self.releases[commit] = idx
+                stack.extend(graph.parents_of(commit))
+        
+        return len(self.releases) - before
+    
+    def covers(self, tags):
+        """tags（按标签名和hash）是否恰好是已处理和已跳过的标签，即索引无需更新"""
+        known = {(t['tag'], t['hash']) for t in self.tags + self.skipped}
+        return known == {(t['tag'], t['hash']) for t in tags}
+    
+    def extends(self, tags):
+        """已处理的标签是否恰好是tags（按发布顺序）的前缀"""
+        if len(tags) < len(self.tags):
+            return False
+        return all(old['tag'] == new['tag'] and old['hash'] == new['hash']
+                   for old, new in zip(self.tags, tags))
+    
+    def save(self, filepath):
+        """保存为JSON"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({'tags': self.tags, 'releases': self.releases, 'skipped': self.skipped},
+                      f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, filepath):
+        """从JSON加载，文件不存在或损坏时返回None"""
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        index = cls()
+        index.tags = data.get('tags', [])
+        index.releases = data.get('releases', {})
+        index.skipped = data.get('skipped', [])
+        return index
+
+
+def read_tag_graph(repo_path, tags):
+    """
+    读取标签可达的提交图
+    
+    Raises:
+        GitError: 有标签但读不出提交历史（git log 失败）
+    """
+    if not tags:
+        return CommitGraph()
+    graph = build_commit_graph(repo_path, [t['hash'] for t in tags])
+    if not len(graph):
+        raise GitError(f"无法读取标签的提交历史: {repo_path}")
+    return graph
+
+
+def _timestamp(date):
+    """ISO日期的Unix时间戳，不同时区的日期可以直接比较；无法解析时为0"""
+    try:
+        return datetime.fromisoformat(date).timestamp()
+    except (TypeError, ValueError):
+        return 0
+
+
+def _skipped_tags(graph, tags):
+    return [{'tag': t['tag'], 'hash': t['hash']} for t in tags if t['hash'] not in graph]
+
+
+def order_tags(graph, tags):
+    """
+    按发布顺序排列标签
+    
+    按标签提交的代数排序，祖先提交上的标签总在后代之前；
+    没有祖先关系的标签按日期、标签名排序。
+    不指向提交的标签（如指向tree）不在提交图中，跳过。
+    """
+    ordered = [t for t in tags if t['hash'] in graph]
+    ordered.sort(key=lambda t: (graph.generation(t['hash']), _timestamp(t['date']), t['tag']))
+    return ordered
+
+
+def build_release_index(repo_path, tags=None, graph=None):
+    """
+    全量构建发布归属索引
+    
+    Args:
+        repo_path: 仓库路径
+        tags: 标签列表，默认用 get_all_tags_info 获取；按 order_tags 排序后处理
+        graph: 包含这些标签的CommitGraph，默认用 read_tag_graph 读取
+    
+    Returns:
+        ReleaseIndex
+    """
+    if tags is None:
+        tags = get_all_tags_info(repo_path, sort='date')
+    if graph is None:
+        graph = read_tag_graph(repo_path, tags)
+    index = ReleaseIndex()
+    index.add_tags(graph, order_tags(graph, tags))
+    index.skipped = _skipped_tags(graph, tags)
+    print(f"✓ 发布归属索引: {len(index.tags)} 个标签, {len(index)} 个已发布提交")
+    return index
+
+
+def load_or_build_release_index(repo_path, filepath=RELEASE_INDEX_FILE):
+    """
+    加载已保存的索引并追加新标签，没有或标签被改动时全量构建
+    
+    标签没有变化时直接返回，不读取提交图；
+    新标签都排在已有标签之后时只标记新增部分；
+    标签被删除、移动，或新标签是已有标签的祖先时重新构建。
+    
+    Args:
+        repo_path: 仓库路径
+        filepath: 索引文件路径
+    
+    Returns:
+        ReleaseIndex
+    """
+    all_tags = get_all_tags_info(repo_path, sort='date')
+    index = ReleaseIndex.load(filepath)
+    if index is not None and index.covers(all_tags):
+        return index
+    
+    graph = read_tag_graph(repo_path, all_tags)
+    tags = order_tags(graph, all_tags)
+    if index is not None and index.extends(tags):
+        new_tags = tags[len(index.tags):]
+        added = index.add_tags(graph, new_tags)
+        index.skipped = _skipped_tags(graph, all_tags)
+        print(f"✓ 增量更新发布归属索引: +{len(new_tags)} 个标签, +{added} 个提交")
+        index.save(filepath)
+        return index
+    
+    index = build_release_index(repo_path, all_tags, graph)
+    index.save(filepath)
+    return index
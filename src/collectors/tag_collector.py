@@ -2,8 +2,18 @@
 标签采集模块
 
 获取Git仓库的标签信息。
+get_all_tags_info 用一次 git for-each-ref 取得全部标签的元数据，
+sort_tags 支持按版本号或日期排序。
 """
+import re
 import subprocess
+from datetime import datetime
+
+# 名称、对象类型、对象hash、附注标签指向的对象hash及类型、创建日期、提交日期、主题
+TAG_FORMAT = '%00'.join([
+    '%(refname:short)', '%(objecttype)', '%(objectname)', '%(*objectname)', '%(*objecttype)',
+    '%(creatordate:iso-strict)', '%(*committerdate:iso-strict)', '%(contents:subject)',
+])
 
 
 def get_tags(repo_path):
@@ -35,7 +45,131 @@ def get_tag_info(repo_path, tag):
     return None
 
 
-def get_all_tags_info(repo_path):
-    """获取所有标签的详细信息"""
-    tags = get_tags(repo_path)
-    return [get_tag_info(repo_path, t) for t in tags if get_tag_info(repo_path, t)]
+def _peel_nested(repo_path, oids):
+    """
+    把指向另一个标签的标签对象完全剥离
+    
+    %(*objectname) 只剥离一层，标签的标签仍然是标签对象。
+    用一次 git cat-file --batch-check 剥离到最终对象，再用一次 git show
+    取得其中提交的提交时间。
+    
+    Returns:
+        {标签对象hash: (最终对象hash, 提交时间)}，最终对象不是提交时提交时间为空
+    """
+    if not oids:
+        return {}
+    try:
+        output = subprocess.run(
+            ['git', 'cat-file', '--batch-check=%(objectname) %(objecttype)'],
+            cwd=repo_path, input=''.join(f'{oid}^{{}}\n' for oid in oids),
+            capture_output=True, encoding='utf-8', check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    
+    targets = {}
+    for oid, line in zip(oids, output.splitlines()):
+        parts = line.split()
+        if len(parts) == 2 and parts[1] != 'missing':
+            targets[oid] = (parts[0], parts[1])
+    
+    commits = sorted({target for target, obj_type in targets.values() if obj_type == 'commit'})
+    dates = {}
+    if commits:
+        cmd = ['git', 'show', '-s', '--format=%H%x00%cI'] + commits
+        try:
+            output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8')
+            dates = dict(line.split('\0') for line in output.splitlines() if '\0' in line)
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    return {oid: (target, dates.get(target, '')) for oid, (target, _) in targets.items()}
+
+
+def get_all_tags_info(repo_path, sort=None):
+    """
+    获取所有标签的详细信息
+    
+    只调用一次 git for-each-ref，不再为每个标签启动 git show。
+    
+    Args:
+        repo_path: 仓库路径
+        sort: 排序方式，'version' 或 'date'，默认按标签名
+    
+    Returns:
+        标签列表，每条包含:
+        - tag: 标签名
+        - hash: 指向的提交hash（标签的标签会剥离到最终的提交；指向tree或blob的标签为该对象的hash）
+        - date: 附注标签为打标签时间，轻量标签为提交时间（ISO格式）
+        - commit_date: 提交时间
+        - annotated: 是否为附注标签
+        - message: 附注标签的说明或轻量标签所指提交的主题
+    """
+    cmd = ['git', 'for-each-ref', 'refs/tags', f'--format={TAG_FORMAT}']
+    try:
+        output = subprocess.check_output(cmd, cwd=repo_path, encoding='utf-8', errors='replace')
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    
+    records = [line.split('\0') for line in output.split('\n')]
+    records = [parts for parts in records if len(parts) == 8]
+    nested = _peel_nested(repo_path, [parts[3] for parts in records if parts[4] == 'tag'])
+    
+    tags = []
+    for name, obj_type, oid, peeled, peeled_type, created, committed, subject in records:
+        annotated = obj_type == 'tag'
+        if peeled_type == 'tag':
+            peeled, committed = nested.get(peeled, (peeled, committed))
+        tags.append({
+            'tag': name,
+            'hash': peeled if annotated else oid,
+            'date': created,
+            'commit_date': committed if annotated else created,
+            'annotated': annotated,
+            'message': subject
+        })
+    
+    if sort:
+        tags = sort_tags(tags, by=sort)
+    return tags
+
+
+def version_key(tag_name):
+    """
+    标签名的版本排序键
+    
+    '0.95.1' < '0.100.0'，预发布版本排在正式版本之前，如 '1.0.0rc1' < '1.0.0'。
+    """
+    m = re.match(r'^\D*?(\d+(?:\.\d+)*)(.*)$', tag_name)
+    if not m:
+        return ((), 0, tag_name)
+    numbers = tuple(int(n) for n in m.group(1).split('.'))
+    suffix = m.group(2)
+    return (numbers, 0 if suffix else 1, suffix)
+
+
+def _date_key(tag):
+    """标签日期的UTC时间戳，日期可能带不同时区"""
+    try:
+        return datetime.fromisoformat(tag['date']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return float('-inf')
+
+
+def sort_tags(tags, by='version', reverse=False):
+    """
+    对标签排序
+    
+    Args:
+        tags: get_all_tags_info 返回的标签列表
+        by: 'version' 按版本号，'date' 按日期
+        reverse: 是否倒序
+    
+    Returns:
+        排序后的新列表
+    """
+    if by == 'date':
+        key = _date_key
+    elif by == 'version':
+        key = lambda t: version_key(t['tag'])
+    else:
+        raise ValueError(f"未知排序方式: {by}")
+    return sorted(tags, key=key, reverse=reverse)
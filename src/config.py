@@ -12,9 +12,15 @@ CACHE_DIR = 'cache'
 
 GITHUB_REPO = 'tiangolo/fastapi'
 GITHUB_TOKEN = None
+GITHUB_TOKENS = []            # 额外的token，与GITHUB_TOKEN一起轮换使用
 
 CHART_DPI = 150
 CHART_STYLE = 'whitegrid'
 FONT_PATH = 'C:/Windows/Fonts/msyh.ttc'
 
 CACHE_EXPIRE_HOURS = 24
+
+MULTI_REPO_MANIFEST = 'repos.json'
+MULTI_REPO_WORKERS = 4
+
+GITHUB_PAGE_WORKERS = 4
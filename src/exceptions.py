@@ -19,8 +19,10 @@ class APIError(CollectorError):
     pass
 
 class RateLimitError(APIError):
-    """API限流错误"""
-    pass
+    """API限流错误，reset为限额重置的Unix时间戳（未知时为None）"""
+    def __init__(self, message='', reset=None):
+        super().__init__(message)
+        self.reset = reset
 
 class VisualizationError(AnalysisError):
     """可视化错误"""
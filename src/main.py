@@ -6,16 +6,20 @@ FastAPI仓库深度分析工具 - 主程序
     python src/main.py --fetch      # 交互式选择获取哪些数据
     python src/main.py --fetch all  # 获取全部数据
     python src/main.py --fetch issues/prs/contributors  # 获取指定数据
+    python src/main.py --sync       # 增量同步提交记录后分析
+    python src/main.py --multi [repos.json]  # 按清单并行分析多个仓库
 """
 import sys
 import os
 import warnings
 
-from src.collectors.git_collector import get_commits, save_to_csv, save_to_json, get_file_stats
+from src.collectors.git_collector import get_commits, save_to_csv, save_to_json, get_file_stats, sync_commits
+from src.collectors.git_collector import get_file_inventory, get_size_history
 from src.collectors.branch_collector import get_branches
 from src.collectors.tag_collector import get_tags
 from src.analyzers.ast_analyzer import analyze_project_ast
 from src.analyzers.stats import generate_report
+from src.analyzers.identity import IdentityResolver
 from src.analyzers.message_analyzer import analyze_messages
 from src.analyzers.loc_counter import analyze_project_loc
 from src.analyzers.dependency_analyzer import build_dependency_graph
@@ -24,7 +28,7 @@ from src.visualizers.charts import plot_commits_by_year, plot_author_pie, genera
 from src.visualizers.heatmap import plot_commit_heatmap
 from src.visualizers.trends import plot_monthly_trend, plot_cumulative
 from src.visualizers.author_charts import plot_top_authors
-from src.visualizers.file_charts import plot_file_types, plot_loc_bar
+from src.visualizers.file_charts import plot_file_types, plot_loc_bar, plot_file_sizes, plot_size_growth
 from src.visualizers.complexity_charts import plot_complexity_distribution, plot_function_count_by_file
 from src.visualizers.message_charts import plot_commit_types
 from src.visualizers.yearly_charts import plot_yearly_comparison
@@ -35,6 +39,7 @@ from src.visualizers.pr_charts import plot_pr_state, plot_pr_timeline, plot_top_
 from src.visualizers.charts_3d import plot_3d_commits_by_year_month, plot_3d_author_activity
 from src.visualizers.font_config import configure_matplotlib
 from src.utils.persistence import ensure_data_dirs, save_json
+from src.utils.record_log import load_records
 from src.config import REPO_PATH, DATA_DIR, OUTPUT_DIR, GITHUB_REPO
 import json
 
@@ -43,7 +48,10 @@ configure_matplotlib()
 
 
 def load_cached_data(filename):
-    """加载缓存数据"""
+    """加载缓存数据，优先读取同名的 .jsonl 记录日志"""
+    log_path = os.path.join(DATA_DIR, os.path.splitext(filename)[0] + '.jsonl')
+    if os.path.exists(log_path):
+        return load_records(log_path)
     filepath = os.path.join(DATA_DIR, filename)
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
@@ -81,11 +89,11 @@ def fetch_data_interactive():
     
     if '1' in choices:
         print("\n[获取Issues...]")
-        collector.fetch_all_issues()
+        collector.sync_issues()
     
     if '2' in choices:
         print("\n[获取Pull Requests...]")
-        collector.fetch_all_prs()
+        collector.sync_prs()
     
     if '3' in choices:
         print("\n[获取Contributors...]")
@@ -105,17 +113,17 @@ def fetch_specific(target):
     
     if target == 'all':
         print("\n[1/3] 获取Issues...")
-        collector.fetch_all_issues()
+        collector.sync_issues()
         print("\n[2/3] 获取Pull Requests...")
-        collector.fetch_all_prs()
+        collector.sync_prs()
         print("\n[3/3] 获取Contributors...")
         contrib_collector.fetch_all()
     elif target == 'issues':
         print("\n获取Issues...")
-        collector.fetch_all_issues()
+        collector.sync_issues()
     elif target == 'prs':
         print("\n获取Pull Requests...")
-        collector.fetch_all_prs()
+        collector.sync_prs()
     elif target == 'contributors':
         print("\n获取Contributors...")
         contrib_collector.fetch_all()
@@ -124,8 +132,13 @@ def fetch_specific(target):
         print("可用: all, issues, prs, contributors")
 
 
-def main():
-    """主程序入口 - 使用缓存数据分析"""
+def main(sync=False):
+    """
+    主程序入口 - 使用缓存数据分析
+    
+    Args:
+        sync: 为True时增量同步提交记录，只获取上次运行之后的新提交
+    """
     print("=" * 70)
     print("   FastAPI 仓库深度分析工具   ")
     print("   技术栈: ast | libcst | pysnooper | z3-solver   ")
@@ -137,16 +150,22 @@ def main():
     print("[1/4] Git数据采集")
     print("=" * 70)
     
-    commits = get_commits(REPO_PATH)
+    if sync:
+        commits = sync_commits(REPO_PATH, DATA_DIR)
+    else:
+        commits = get_commits(REPO_PATH)
     if not commits:
         print("  ✗ 无法获取提交")
         return
     
     print(f"  ✓ Git提交: {len(commits):,} 条")
-    save_to_csv(commits, DATA_DIR)
-    save_to_json(commits, DATA_DIR)
+    if not sync:
+        save_to_csv(commits, DATA_DIR)
+        save_to_json(commits, DATA_DIR)
     
     file_stats = get_file_stats(REPO_PATH)
+    inventory = get_file_inventory(REPO_PATH)
+    size_history = get_size_history(REPO_PATH)
     branches = get_branches(REPO_PATH)
     tags = get_tags(REPO_PATH)
     print(f"  ✓ 分支: {len(branches)} | 标签: {len(tags)}")
@@ -178,7 +197,8 @@ def main():
     
     save_json(ast_results, os.path.join(DATA_DIR, 'ast_analysis.json'))
     
-    report = generate_report(commits)
+    resolver = IdentityResolver.from_commits(commits)
+    report = generate_report(commits, resolver)
     msg_stats = analyze_messages(commits)
     loc_stats = analyze_project_loc(REPO_PATH)
     dep_graph = build_dependency_graph(REPO_PATH)
@@ -194,12 +214,15 @@ def main():
     print("=" * 70)
     
     plot_commits_by_year(commits, OUTPUT_DIR)
-    plot_author_pie(commits, OUTPUT_DIR)
-    plot_top_authors(commits, OUTPUT_DIR)
+    plot_author_pie(commits, OUTPUT_DIR, resolver=resolver)
+    plot_top_authors(commits, OUTPUT_DIR, resolver=resolver)
     plot_commit_heatmap(commits, OUTPUT_DIR)
     plot_monthly_trend(commits, OUTPUT_DIR)
     plot_cumulative(commits, OUTPUT_DIR)
     plot_file_types(file_stats, OUTPUT_DIR)
+    if inventory:
+        plot_file_sizes(inventory, OUTPUT_DIR)
+    plot_size_growth(size_history, OUTPUT_DIR)
     plot_loc_bar(loc_stats, OUTPUT_DIR)
     plot_complexity_distribution(ast_results, OUTPUT_DIR)
     plot_function_count_by_file(ast_results, OUTPUT_DIR)
@@ -227,7 +250,7 @@ def main():
         plot_contributions_distribution(contributors, OUTPUT_DIR)
     
     plot_3d_commits_by_year_month(commits, OUTPUT_DIR)
-    plot_3d_author_activity(commits, OUTPUT_DIR)
+    plot_3d_author_activity(commits, OUTPUT_DIR, resolver=resolver)
     
     text = ' '.join(c['message'] for c in commits)
     generate_wordcloud(text, OUTPUT_DIR)
@@ -262,5 +285,13 @@ if __name__ == '__main__':
             fetch_specific(sys.argv[2])
         else:
             fetch_data_interactive()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--sync':
+        main(sync=True)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--multi':
+        from src.multi_repo import run_multi_repo
+        if len(sys.argv) > 2:
+            run_multi_repo(sys.argv[2])
+        else:
+            run_multi_repo()
     else:
         main()
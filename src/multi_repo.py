@@ -0,0 +1,196 @@
+"""
+多仓库并行分析
+
+读取仓库清单，用一个全局进程池并行分析多个本地仓库：
+- 每个仓库作为一个任务，在一个工作进程中依次完成采集和分析
+- 进程池大小即全局并发上限，某个仓库很慢时只占用一个工作进程，其余仓库照常完成
+- 按仓库体积从大到小提交任务，避免最大的仓库最后才开始
+- 每个仓库的数据和图表写入 data/<名称>/、output/<名称>/
+- 全部完成后写出跨仓库对比表 output/comparison.json / comparison.csv
+
+清单格式（JSON）：
+    [
+        {"name": "fastapi", "path": "../../fastapi"},
+        {"path": "../../starlette"},
+        "../../flask"
+    ]
+name缺省时使用目录名。
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from src.config import DATA_DIR, OUTPUT_DIR, MULTI_REPO_MANIFEST, MULTI_REPO_WORKERS
+from src.exceptions import GitError
+from src.utils.persistence import save_json
+
+
+def load_manifest(filepath=MULTI_REPO_MANIFEST):
+    """
+    读取仓库清单
+    
+    Returns:
+        [{'name', 'path'}, ...]，名称重复时抛出ValueError
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    base = os.path.dirname(os.path.abspath(filepath))
+    repos = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        path = entry['path']
+        if not os.path.isabs(path):
+            path = os.path.normpath(os.path.join(base, path))
+        name = entry.get('name') or os.path.basename(path.rstrip('/\\'))
+        repos.append({'name': name, 'path': path})
+    
+    names = [r['name'] for r in repos]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"清单中的仓库名重复: {', '.join(sorted(duplicates))}")
+    return repos
+
+
+def _repo_size(path):
+    """仓库对象库的大致字节数，用于安排任务顺序"""
+    from src.collectors.object_store import find_git_dir, common_dir
+    
+    try:
+        objects = os.path.join(common_dir(find_git_dir(path)), 'objects')
+    except (GitError, OSError):
+        return 0
+    total = 0
+    for root, _, files in os.walk(objects):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+def analyze_repo(repo, data_root=DATA_DIR, output_root=OUTPUT_DIR, charts=True):
+    """
+    分析单个仓库（在工作进程中运行）
+    
+    Args:
+        repo: {'name', 'path'}
+        data_root: 数据根目录，结果写入 data_root/<name>/
+        output_root: 图表根目录，图表写入 output_root/<name>/
+        charts: 是否生成图表
+    
+    Returns:
+        对比表中的一行，失败时包含error字段
+    """
+    from src.collectors.git_collector import get_commits, save_to_csv, save_to_json
+    from src.collectors.branch_collector import get_branches
+    from src.collectors.tag_collector import get_tags
+    from src.analyzers.ast_analyzer import analyze_project_ast
+    from src.analyzers.stats import generate_report
+    from src.analyzers.message_analyzer import analyze_messages
+    from src.analyzers.loc_counter import analyze_project_loc
+    
+    name, path = repo['name'], repo['path']
+    data_dir = os.path.join(data_root, name)
+    output_dir = os.path.join(output_root, name)
+    start = time.time()
+    
+    try:
+        commits = get_commits(path)
+        if not commits:
+            raise RuntimeError("无法获取提交")
+        save_to_csv(commits, data_dir)
+        save_to_json(commits, data_dir)
+        
+        report = generate_report(commits)
+        msg_stats = analyze_messages(commits)
+        ast_results = analyze_project_ast(path)
+        loc_stats = analyze_project_loc(path)
+        summary = ast_results.get('summary', {})
+        
+        save_json(ast_results, os.path.join(data_dir, 'ast_analysis.json'))
+        save_json(report, os.path.join(data_dir, 'report.json'))
+        save_json(loc_stats, os.path.join(data_dir, 'loc_stats.json'))
+        save_json(msg_stats, os.path.join(data_dir, 'message_stats.json'))
+        
+        if charts:
+            from src.visualizers.charts import plot_commits_by_year
+            from src.visualizers.trends import plot_monthly_trend
+            from src.visualizers.complexity_charts import plot_complexity_distribution
+            
+            plot_commits_by_year(commits, output_dir)
+            plot_monthly_trend(commits, output_dir)
+            plot_complexity_distribution(ast_results, output_dir)
+        
+        functions = summary.get('total_functions', 0)
+        complexity_sum = sum(f['complexity'] for r in ast_results['files'] for f in r['functions'])
+        row = {
+            'name': name,
+            'total_commits': len(commits),
+            'contributors': report['unique_authors'],
+            'branches': len(get_branches(path)),
+            'tags': len(get_tags(path)),
+            'python_files': summary.get('total_files', 0),
+            'code_lines': loc_stats['code'],
+            'functions': functions,
+            'classes': summary.get('total_classes', 0),
+            'avg_complexity': round(complexity_sum / functions, 2) if functions else 0,
+        }
+        save_json(row, os.path.join(output_dir, 'summary.json'))
+    except Exception as e:
+        row = {'name': name, 'error': str(e)}
+    
+    row['seconds'] = round(time.time() - start, 1)
+    return row
+
+
+def run_multi_repo(manifest=MULTI_REPO_MANIFEST, max_workers=MULTI_REPO_WORKERS,
+                   data_root=DATA_DIR, output_root=OUTPUT_DIR, charts=True):
+    """
+    并行分析清单中的全部仓库并写出对比表
+    
+    Args:
+        manifest: 清单文件路径，或 load_manifest 格式的列表
+        max_workers: 全局工作进程数
+        data_root: 数据根目录
+        output_root: 输出根目录
+        charts: 是否为每个仓库生成图表
+    
+    Returns:
+        对比表（每个仓库一行，按提交数降序，失败的仓库排在最后）
+    """
+    repos = load_manifest(manifest) if isinstance(manifest, str) else manifest
+    repos = sorted(repos, key=lambda r: _repo_size(r['path']), reverse=True)
+    print(f"✓ 清单: {len(repos)} 个仓库, 并发 {max_workers}")
+    
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(analyze_repo, repo, data_root, output_root, charts): repo
+                   for repo in repos}
+        for future in as_completed(futures):
+            repo = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {'name': repo['name'], 'error': str(e)}
+            status = f"✗ {row['error']}" if 'error' in row else '✓'
+            print(f"  [{len(rows) + 1}/{len(repos)}] {repo['name']} {status} "
+                  f"({row.get('seconds', 0)}s)")
+            rows.append(row)
+    
+    rows.sort(key=lambda r: ('error' in r, -r.get('total_commits', 0)))
+    save_comparison(rows, output_root)
+    return rows
+
+
+def save_comparison(rows, output_root=OUTPUT_DIR):
+    """写出跨仓库对比表 comparison.json / comparison.csv"""
+    save_json(rows, os.path.join(output_root, 'comparison.json'))
+    filepath = os.path.join(output_root, 'comparison.csv')
+    pd.DataFrame(rows).to_csv(filepath, index=False, encoding='utf-8-sig')
+    print(f"✓ 保存: {filepath}")
@@ -2,11 +2,14 @@
 缓存模块
 
 提供文件级缓存功能，支持过期时间控制，
-避免重复的API请求和计算。
+避免重复的API请求和计算；
+以及按条目数/字节数限制大小的内存LRU缓存。
 """
 import json
 import os
 import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 CACHE_DIR = 'cache'
@@ -75,3 +78,79 @@ def clear_cache():
         for f in os.listdir(CACHE_DIR):
             os.remove(os.path.join(CACHE_DIR, f))
         print("✓ 缓存已清空")
+
+
+class LRUCache:
+    """
+    线程安全的内存LRU缓存
+    
+    同时支持条目数上限和总字节数上限，超出时淘汰最久未使用的条目。
+    
+    Attributes:
+        max_items: 最大条目数，None表示不限制
+        max_bytes: 最大总字节数，None表示不限制
+        hits: 命中次数
+        misses: 未命中次数
+    """
+    
+    def __init__(self, max_items=None, max_bytes=None, sizeof=len):
+        """
+        Args:
+            max_items: 最大条目数
+            max_bytes: 最大总字节数
+            sizeof: 计算条目大小的函数，默认len
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __contains__(self, key):
+        return key in self._data
+    
+    @property
+    def size_bytes(self):
+        return self._bytes
+    
+    def get(self, key, default=None):
+        """获取条目并标记为最近使用"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """写入条目，单个条目超过max_bytes时不缓存"""
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizeof(self._data.pop(key)) if self.max_bytes is not None else 0
+            self._data[key] = value
+            self._bytes += size
+            while self._data and (
+                (self.max_items is not None and len(self._data) > self.max_items) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, old = self._data.popitem(last=False)
+                if self.max_bytes is not None:
+                    self._bytes -= self._sizeof(old)
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
@@ -0,0 +1,150 @@
+"""
+文件来源抽象
+
+分析器通过FileProvider列出和读取文件，不关心文件来自哪里：
+- WorktreeProvider: 工作区目录（原来的 os.walk 行为）
+- GitTreeProvider: 任意tree-ish（标签、提交、分支）中的文件，
+  直接从对象库读取，不需要checkout，也支持裸仓库
+"""
+import os
+from abc import ABC, abstractmethod
+
+
+def _is_skipped_dir(name):
+    """和原来 os.walk 中的过滤规则一致：跳过隐藏目录和 __pycache__"""
+    return name.startswith('.') or name == '__pycache__'
+
+
+class FileProvider(ABC):
+    """文件来源基类，子类实现 iter_files / read_bytes / relpath"""
+    
+    @abstractmethod
+    def iter_files(self, suffix=None):
+        """
+        遍历文件
+        
+        Args:
+            suffix: 扩展名或扩展名元组，如 '.py'，默认全部文件
+        
+        Yields:
+            文件路径（作为分析结果中的filepath）
+        """
+    
+    @abstractmethod
+    def read_bytes(self, path):
+        """读取文件内容，失败时返回None"""
+    
+    @abstractmethod
+    def relpath(self, path):
+        """文件相对于项目根目录的路径"""
+    
+    def blob_id(self, path):
+        """文件的blob id，工作区文件返回None"""
+        return None
+    
+    def read_text(self, path, errors='strict'):
+        """以UTF-8读取文本，读取或解码失败时返回None"""
+        data = self.read_bytes(path)
+        if data is None:
+            return None
+        try:
+            return data.decode('utf-8', errors=errors)
+        except UnicodeDecodeError:
+            return None
+
+
+class WorktreeProvider(FileProvider):
+    """工作区目录中的文件"""
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def iter_files(self, suffix=None):
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not _is_skipped_dir(d)]
+            
+            for f in files:
+                if suffix and not f.endswith(suffix):
+                    continue
+                yield os.path.join(root, f)
+    
+    def read_bytes(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def relpath(self, path):
+        return os.path.relpath(path, self.root)
+
+
+class GitTreeProvider(FileProvider):
+    """
+    某个版本中的文件
+    
+    文件列表和内容都来自对象库，不读取也不修改工作区。
+    
+    Attributes:
+        repo_path: 仓库路径（可以是裸仓库）
+        treeish: 版本，如 '0.100.0'、'HEAD~10'、提交hash（可缩写）、'v1.0:src'
+        tree: 解析得到的tree id
+    """
+    
+    def __init__(self, repo_path, treeish, store=None):
+        from src.collectors.object_store import open_object_store
+        
+        self.repo_path = repo_path
+        self.treeish = treeish
+        self.store = store or open_object_store(repo_path)
+        self.tree = self.store.resolve_tree(treeish)
+        self._files = None
+    
+    @property
+    def files(self):
+        """{路径: blob id}，不包含子模块和符号链接"""
+        if self._files is None:
+            self._files = {
+                path: oid for path, mode, oid in self.store.walk_tree(self.tree)
+                if mode != '120000'
+            }
+        return self._files
+    
+    def iter_files(self, suffix=None):
+        for path in self.files:
+            parts = path.split('/')
+            if any(_is_skipped_dir(d) for d in parts[:-1]):
+                continue
+            if suffix and not path.endswith(suffix):
+                continue
+            yield path
+    
+    def read_bytes(self, path):
+        oid = self.files.get(path)
+        if oid is None:
+            return None
+        return self.store.read_blob(oid)
+    
+    def relpath(self, path):
+        return path
+    
+    def blob_id(self, path):
+        return self.files.get(path)
+
+
+def as_file_provider(source, rev=None):
+    """
+    把分析器的project_path参数转换为FileProvider
+    
+    Args:
+        source: 目录路径或FileProvider
+        rev: 版本，指定时从该版本的tree读取，否则读工作区
+    
+    Returns:
+        FileProvider
+    """
+    if isinstance(source, FileProvider):
+        return source
+    if rev:
+        return GitTreeProvider(source, rev)
+    return WorktreeProvider(source)
@@ -2,20 +2,16 @@
 文件扫描器 - 扫描项目中的Python文件
 """
 import os
-from typing import List, Generator
+from typing import List, Generator, Optional
 
-def find_python_files(path: str) -> Generator[str, None, None]:
-    """查找所有Python文件"""
-    for root, dirs, files in os.walk(path):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
-        
-        for f in files:
-            if f.endswith('.py'):
-                yield os.path.join(root, f)
+def find_python_files(path: str, rev: Optional[str] = None) -> Generator[str, None, None]:
+    """查找所有Python文件，指定rev时列出该版本中的文件"""
+    from src.utils.file_provider import as_file_provider
+    yield from as_file_provider(path, rev).iter_files('.py')
 
-def get_project_files(path: str) -> List[str]:
+def get_project_files(path: str, rev: Optional[str] = None) -> List[str]:
     """获取项目文件列表"""
-    return list(find_python_files(path))
+    return list(find_python_files(path, rev))
 
 def count_files_by_extension(path: str) -> dict:
     """按扩展名统计文件数"""
@@ -0,0 +1,230 @@
+"""
+追加写的JSONL记录日志
+
+Issues/PRs按页采集，每页只把该页的记录追加到日志末尾（一次write + fsync），
+不再每页重写整个JSON文件。同一条记录更新后再次追加，读取时以最后一次为准。
+
+偏移索引（<日志>.idx）记录每个键最新版本所在的字节偏移，只在压缩、关闭时
+或未索引的尾部过大时写出；打开时从索引覆盖到的位置继续扫描日志尾部，
+写入中途崩溃留下的不完整末行（没有换行符）会被忽略，下次追加前截掉；
+中间无法解析的完整行跳过并计数，不影响其后的记录。
+日志行数超过有效记录数的 COMPACT_RATIO 倍时压缩：只保留每个键的最新版本，
+写入临时文件后原子替换。
+
+读取按行流式进行，过期版本的行根据偏移直接跳过，不做JSON解析。
+
+主要功能：
+- RecordLog: 按键去重的追加日志，append / iter_records / get / compact
+- load_records: 只读方式加载日志中的有效记录
+"""
+import json
+import os
+
+# 日志行数超过有效记录数的多少倍时压缩
+COMPACT_RATIO = 2
+# 行数少于该值时不压缩
+COMPACT_MIN_LINES = 1000
+# 未索引的尾部超过该字节数时写出索引
+INDEX_TAIL_BYTES = 1 << 20
+
+
+class RecordLog:
+    """
+    按键去重的追加写JSONL日志
+    
+    Args:
+        path: 日志文件路径（.jsonl）
+        key: 记录的键字段
+    
+    Attributes:
+        lines: 日志中的总行数（包括过期版本）
+        corrupt: 扫描时跳过的无法解析的行数
+    """
+    
+    def __init__(self, path, key='number'):
+        self.path = path
+        self.index_path = f'{path}.idx'
+        self.key = key
+        self._offsets = {}
+        self._size = 0
+        self._indexed_size = 0
+        self.lines = 0
+        self.corrupt = 0
+        self._load()
+    
+    def __len__(self):
+        return len(self._offsets)
+    
+    def __contains__(self, key):
+        return key in self._offsets
+    
+    def __iter__(self):
+        return self.iter_records()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _load(self):
+        """读取索引，再扫描索引之后追加的部分"""
+        if not os.path.exists(self.path):
+            return
+        stat = os.stat(self.path)
+        index = self._read_index()
+        if index and index['ino'] == stat.st_ino and index['size'] <= stat.st_size:
+            self._offsets = {k: off for k, off in index['offsets']}
+            self._size = self._indexed_size = index['size']
+            self.lines = index['lines']
+        self._scan(self._size)
+    
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _scan(self, start):
+        """
+        从start开始扫描，更新偏移
+        
+        没有换行符的末行是写入中途留下的，不计入日志；
+        无法解析的完整行跳过，之后的记录照常读取。
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    self._offsets[json.loads(line)[self.key]] = offset
+                except (ValueError, TypeError, KeyError):
+                    self.corrupt += 1
+                offset += len(line)
+                self.lines += 1
+        self._size = offset
+        if self.corrupt:
+            print(f"⚠ {self.path}: 跳过{self.corrupt}行无法解析的记录")
+    
+    def save_index(self):
+        """原子写出偏移索引"""
+        if not os.path.exists(self.path):
+            return
+        index = {
+            'ino': os.stat(self.path).st_ino,
+            'size': self._size,
+            'lines': self.lines,
+            'offsets': list(self._offsets.items()),
+        }
+        tmp = f'{self.index_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+        self._indexed_size = self._size
+    
+    def append(self, records):
+        """
+        追加一批记录，一次写入并fsync
+        
+        Args:
+            records: 记录列表，已存在的键以新版本为准
+        
+        Returns:
+            其中新键的数量
+        """
+        records = list(records)
+        if not records:
+            return 0
+        lines = [json.dumps(r, ensure_ascii=False).encode('utf-8') + b'\n' for r in records]
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._size:
+            # 上次写入中途崩溃留下的不完整末行
+            os.truncate(self.path, self._size)
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        added = 0
+        offset = self._size
+        for record, line in zip(records, lines):
+            if record[self.key] not in self._offsets:
+                added += 1
+            self._offsets[record[self.key]] = offset
+            offset += len(line)
+        self._size = offset
+        self.lines += len(lines)
+        
+        if self.lines >= COMPACT_MIN_LINES and self.lines > COMPACT_RATIO * len(self._offsets):
+            self.compact()
+        elif self._size - self._indexed_size > INDEX_TAIL_BYTES:
+            self.save_index()
+        return added
+    
+    def iter_records(self):
+        """按日志顺序流式读取每个键的最新版本"""
+        if not self._offsets:
+            return
+        live = set(self._offsets.values())
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if offset >= self._size:
+                    break
+                if offset in live:
+                    yield json.loads(line)
+                offset += len(line)
+    
+    def load(self):
+        """全部有效记录的列表"""
+        return list(self.iter_records())
+    
+    def get(self, key, default=None):
+        """按键读取最新版本，只读取一行"""
+        offset = self._offsets.get(key)
+        if offset is None:
+            return default
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+    
+    def compact(self):
+        """只保留每个键的最新版本，原子替换日志并重建索引"""
+        tmp = f'{self.path}.compact'
+        offsets = {}
+        offset = 0
+        with open(tmp, 'wb') as out:
+            for record in self.iter_records():
+                line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+                offsets[record[self.key]] = offset
+                out.write(line)
+                offset += len(line)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+        self._offsets = offsets
+        self._size = offset
+        self.lines = len(offsets)
+        self.save_index()
+    
+    def close(self):
+        if self._size != self._indexed_size:
+            self.save_index()
+
+
+def load_records(path, key='number'):
+    """
+    只读加载日志中每个键的最新版本
+    
+    Returns:
+        记录列表，文件不存在时为空列表
+    """
+    return RecordLog(path, key).load()
@@ -5,15 +5,17 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import os
+from src.analyzers.identity import canonical_authors
 from src.visualizers.font_config import configure_matplotlib
 
 configure_matplotlib()
 
-def plot_top_authors(commits, output_dir='output', top_n=15):
-    """绘制top作者提交数排行"""
+def plot_top_authors(commits, output_dir='output', top_n=15, resolver=None):
+    """绘制top作者提交数排行，resolver为共用的IdentityResolver"""
     os.makedirs(output_dir, exist_ok=True)
     
     df = pd.DataFrame(commits)
+    df['author'] = canonical_authors(commits, resolver)
     top = df['author'].value_counts().head(top_n)
     
     fig, ax = plt.subplots(figsize=(14, 10))
@@ -7,6 +7,7 @@ from wordcloud import WordCloud
 import pandas as pd
 import numpy as np
 import os
+from src.analyzers.identity import canonical_authors
 from src.visualizers.font_config import configure_matplotlib, get_font_prop, FONT_PATH
 
 configure_matplotlib()
@@ -42,11 +43,12 @@ def plot_commits_by_year(commits_data, output_dir='output'):
     plt.close()
     print(f"✓ 年度提交图: {output_dir}/commits_by_year.png")
 
-def plot_author_pie(commits_data, output_dir='output', top_n=10):
-    """作者贡献饼图 - 美化版"""
+def plot_author_pie(commits_data, output_dir='output', top_n=10, resolver=None):
+    """作者贡献饼图 - 美化版，resolver为共用的IdentityResolver"""
     os.makedirs(output_dir, exist_ok=True)
     
     df = pd.DataFrame(commits_data)
+    df['author'] = canonical_authors(commits_data, resolver)
     authors = df['author'].value_counts().head(top_n)
     other = df['author'].value_counts()[top_n:].sum()
     
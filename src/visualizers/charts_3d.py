@@ -8,6 +8,7 @@ from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 import pandas as pd
 import os
+from src.analyzers.identity import canonical_authors
 from src.visualizers.font_config import configure_matplotlib
 
 configure_matplotlib()
@@ -67,11 +68,12 @@ def plot_3d_commits_by_year_month(commits, output_dir='output'):
     print(f"✓ 3D提交图: {output_dir}/commits_3d.png")
 
 
-def plot_3d_author_activity(commits, output_dir='output', top_n=10):
-    """3D作者活跃度图"""
+def plot_3d_author_activity(commits, output_dir='output', top_n=10, resolver=None):
+    """3D作者活跃度图，resolver为共用的IdentityResolver"""
     os.makedirs(output_dir, exist_ok=True)
     
     df = pd.DataFrame(commits)
+    df['author'] = canonical_authors(commits, resolver)
     df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True)
     df = df.dropna(subset=['date'])
     df['year'] = df['date'].dt.year
@@ -108,3 +108,44 @@ def plot_function_count_by_file(analysis_results, output_dir='output', top_n=20)
     plt.savefig(f'{output_dir}/function_count.png', dpi=150, bbox_inches='tight', facecolor='white')
     plt.close()
     print(f"✓ 函数数量: {output_dir}/function_count.png")
+
+
+def plot_hotspots(hotspots, output_dir='output', label_n=10):
+    """热点散点图 - 横轴修改次数，纵轴复杂度，气泡大小为变更行数"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    files = hotspots.get('files', [])
+    if not files:
+        print("  无热点数据")
+        return
+    
+    commits = [f['commits'] for f in files]
+    complexity = [f['complexity_sum'] for f in files]
+    churn = np.array([f['churn'] for f in files], dtype=float)
+    sizes = 40 + 600 * churn / churn.max() if churn.max() > 0 else 80
+    
+    fig, ax = plt.subplots(figsize=(14, 9))
+    
+    scatter = ax.scatter(commits, complexity, s=sizes, c=[f['score'] for f in files],
+                         cmap='YlOrRd', alpha=0.75, edgecolors='#4a5568', linewidths=0.5)
+    
+    for f in files[:label_n]:
+        ax.annotate(os.path.basename(f['path']), (f['commits'], f['complexity_sum']),
+                    xytext=(5, 5), textcoords='offset points', fontsize=9)
+    
+    cbar = plt.colorbar(scatter, ax=ax)
+    cbar.set_label('热点分数', fontsize=12)
+    
+    days = hotspots.get('window', {}).get('days')
+    window = f'最近{days}天' if days else '全部历史'
+    ax.set_xlabel(f'修改次数（{window}）', fontsize=14, fontweight='bold')
+    ax.set_ylabel('文件圈复杂度之和', fontsize=14, fontweight='bold')
+    ax.set_title('代码热点：复杂度 × 变更频率', fontsize=18, fontweight='bold', pad=20)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(alpha=0.3, linestyle='--')
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/hotspots.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 热点图: {output_dir}/hotspots.png")
@@ -104,3 +104,47 @@ def plot_file_dependencies(dependency_data, output_dir='output', top_n=15):
     plt.savefig(f'{output_dir}/file_dependencies.png', dpi=150, bbox_inches='tight', facecolor='white')
     plt.close()
     print(f"✓ 文件依赖图: {output_dir}/file_dependencies.png")
+
+
+def plot_cochange_pairs(pairs, output_dir='output', top_n=20):
+    """
+    绘制共同变更最多的文件对
+    
+    Args:
+        pairs: CoChangeMatrix.top_pairs() 的结果
+        output_dir: 输出目录
+        top_n: 显示前N对
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    top = pairs[:top_n]
+    if not top:
+        return
+    
+    fig, ax = plt.subplots(figsize=(14, 10))
+    
+    labels = [f"{os.path.basename(p['file_a'])} ↔ {os.path.basename(p['file_b'])}" for p in top]
+    values = [p['support'] for p in top]
+    colors = plt.cm.Oranges(np.linspace(0.4, 0.9, len(top)))[::-1]
+    
+    bars = ax.barh(range(len(top)), values, color=colors, edgecolor='white')
+    ax.set_yticks(range(len(top)))
+    ax.set_yticklabels(labels, fontsize=9)
+    ax.invert_yaxis()
+    
+    for bar, p in zip(bars, top):
+        width = bar.get_width()
+        conf = max(p['confidence_ab'], p['confidence_ba'])
+        ax.text(width + 0.2, bar.get_y() + bar.get_height()/2,
+               f'{int(width)} ({conf:.0%})', va='center', fontsize=9)
+    
+    ax.set_xlabel('共同修改的提交数（置信度）', fontsize=14, fontweight='bold')
+    ax.set_title(f'Top {top_n} 共同变更文件对', fontsize=16, fontweight='bold', pad=20)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='x', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/cochange_pairs.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 共同变更图: {output_dir}/cochange_pairs.png")
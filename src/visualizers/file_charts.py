@@ -2,6 +2,7 @@
 文件统计可视化
 """
 import matplotlib.pyplot as plt
+import pandas as pd
 import numpy as np
 import os
 from src.visualizers.font_config import configure_matplotlib
@@ -81,3 +82,84 @@ def plot_loc_bar(loc_data, output_dir='output'):
     plt.savefig(f'{output_dir}/loc_bar.png', dpi=150, bbox_inches='tight', facecolor='white')
     plt.close()
     print(f"✓ 代码行数: {output_dir}/loc_bar.png")
+
+
+def plot_file_sizes(inventory, output_dir='output', top_n=15):
+    """按扩展名绘制字节数占比，并标出文件数"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    items = list(inventory['by_extension'].items())[:top_n]
+    if not items:
+        return
+    
+    labels = [ext for ext, _ in items]
+    sizes = [s['bytes'] / 1024 for _, s in items]
+    counts = [s['files'] for _, s in items]
+    total = inventory['bytes'] / 1024
+    
+    fig, ax = plt.subplots(figsize=(14, 10))
+    colors = plt.cm.magma(np.linspace(0.25, 0.8, len(labels)))
+    bars = ax.barh(range(len(labels)), sizes, color=colors, edgecolor='white', height=0.7)
+    
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=12)
+    ax.invert_yaxis()
+    
+    for bar, count in zip(bars, counts):
+        width = bar.get_width()
+        pct = width / total * 100 if total else 0
+        ax.text(width + max(sizes)*0.01, bar.get_y() + bar.get_height()/2,
+               f'{width:,.0f} KB ({pct:.1f}%) · {count:,} 个文件', va='center', fontsize=10)
+    
+    ax.set_xlabel('大小 (KB)', fontsize=14, fontweight='bold')
+    ax.set_title('文件类型体积分布', fontsize=18, fontweight='bold', pad=20)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    
+    largest = '\n'.join(f"{f['path']}  {f['size'] / 1024:,.0f} KB" for f in inventory['largest'][:5])
+    ax.text(0.95, 0.02, f'最大文件:\n{largest}', transform=ax.transAxes,
+           fontsize=10, ha='right', va='bottom',
+           bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/file_sizes.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 文件体积: {output_dir}/file_sizes.png")
+
+def plot_size_growth(history, output_dir='output', top_n=6):
+    """仓库体积随时间的增长，按扩展名堆叠，右轴为文件数"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if not history:
+        return
+    
+    dates = pd.to_datetime([p['date'] for p in history], utc=True)
+    df = pd.DataFrame([p['by_extension'] for p in history]).fillna(0) / 1024 / 1024
+    top = df.iloc[-1].sort_values(ascending=False).index[:top_n]
+    other = df.drop(columns=top).sum(axis=1)
+    
+    fig, ax = plt.subplots(figsize=(14, 8))
+    series = [df[ext].values for ext in top]
+    labels = list(top)
+    if other.any():
+        series.append(other.values)
+        labels.append('其他')
+    ax.stackplot(dates, *series, labels=labels, alpha=0.85,
+                 colors=plt.cm.tab10(np.arange(len(series))))
+    
+    ax2 = ax.twinx()
+    ax2.plot(dates, [p['files'] for p in history], color='black', linewidth=2,
+             marker='o', markersize=4, label='文件数')
+    ax2.set_ylabel('文件数', fontsize=12)
+    
+    ax.set_ylabel('大小 (MB)', fontsize=14, fontweight='bold')
+    ax.set_title('仓库体积增长', fontsize=18, fontweight='bold', pad=20)
+    ax.legend(loc='upper left', fontsize=10)
+    ax2.legend(loc='upper center', fontsize=10)
+    ax.grid(alpha=0.3, linestyle='--')
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/size_growth.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 体积增长: {output_dir}/size_growth.png")
@@ -0,0 +1,58 @@
+"""
+版本时间线可视化
+"""
+import matplotlib.pyplot as plt
+import os
+from src.visualizers.font_config import configure_matplotlib
+
+configure_matplotlib()
+
+
+def plot_release_timeline(timeline, output_dir='output'):
+    """各版本代码行数、函数/类数量和平均复杂度"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if not timeline:
+        print("  无版本数据")
+        return
+    
+    tags = [r['tag'] for r in timeline]
+    x = range(len(timeline))
+    
+    fig, axes = plt.subplots(3, 1, figsize=(18, 13), sharex=True)
+    
+    ax = axes[0]
+    ax.fill_between(x, [r['loc_code'] for r in timeline], alpha=0.3, color='#667eea')
+    ax.plot(x, [r['loc_code'] for r in timeline], linewidth=2, color='#667eea', label='代码行')
+    ax.plot(x, [r['loc_comment'] for r in timeline], linewidth=2, color='#48bb78', label='注释行')
+    ax.set_ylabel('行数', fontsize=13, fontweight='bold')
+    ax.set_title('各版本代码规模与复杂度', fontsize=18, fontweight='bold', pad=20)
+    ax.legend(loc='upper left')
+    
+    ax = axes[1]
+    ax.plot(x, [r['functions'] for r in timeline], marker='o', markersize=3,
+            linewidth=2, color='#ed8936', label='函数')
+    ax.plot(x, [r['classes'] for r in timeline], marker='s', markersize=3,
+            linewidth=2, color='#9f7aea', label='类')
+    ax.set_ylabel('数量', fontsize=13, fontweight='bold')
+    ax.legend(loc='upper left')
+    
+    ax = axes[2]
+    ax.plot(x, [r['avg_complexity'] for r in timeline], marker='o', markersize=3,
+            linewidth=2, color='#f56565')
+    ax.set_ylabel('平均圈复杂度', fontsize=13, fontweight='bold')
+    ax.set_xlabel('版本', fontsize=13, fontweight='bold')
+    
+    for ax in axes:
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.grid(axis='y', alpha=0.3, linestyle='--')
+    
+    step = max(1, len(tags) // 30)
+    axes[2].set_xticks(list(x)[::step])
+    axes[2].set_xticklabels(tags[::step], rotation=60, ha='right', fontsize=8)
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/release_timeline.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 版本时间线: {output_dir}/release_timeline.png")
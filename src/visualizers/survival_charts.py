@@ -0,0 +1,86 @@
+"""
+代码年龄与行存活可视化
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+from src.visualizers.font_config import configure_matplotlib
+
+configure_matplotlib()
+
+
+def plot_cohort_lines(survival, output_dir='output'):
+    """各版本中按写入年份分层的代码行数（堆叠面积图）"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    releases = survival.get('releases', [])
+    years = list(survival.get('cohorts', {}).keys())
+    if not releases or not years:
+        print("  无存活数据")
+        return
+    
+    x = range(len(releases))
+    layers = [[r['cohorts'].get(y, 0) for r in releases] for y in years]
+    colors = plt.cm.viridis(np.linspace(0.1, 0.9, len(years)))
+    
+    fig, ax = plt.subplots(figsize=(18, 8))
+    ax.stackplot(x, layers, labels=years, colors=colors, alpha=0.85)
+    
+    step = max(1, len(releases) // 30)
+    ax.set_xticks(list(x)[::step])
+    ax.set_xticklabels([r['tag'] for r in releases][::step], rotation=60, ha='right', fontsize=8)
+    
+    ax.set_xlabel('版本', fontsize=14, fontweight='bold')
+    ax.set_ylabel('代码行数', fontsize=14, fontweight='bold')
+    ax.set_title('各版本代码按写入年份分布', fontsize=18, fontweight='bold', pad=20)
+    ax.legend(loc='upper left', fontsize=9, ncol=2)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/cohort_lines.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 年份队列图: {output_dir}/cohort_lines.png")
+
+
+def plot_survival_curves(survival, output_dir='output'):
+    """每个年份写入的代码在后续版本中的存活比例，以及各版本代码年龄中位数"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    releases = survival.get('releases', [])
+    cohorts = survival.get('cohorts', {})
+    if not releases or not cohorts:
+        print("  无存活数据")
+        return
+    
+    x = range(len(releases))
+    colors = plt.cm.viridis(np.linspace(0.1, 0.9, len(cohorts)))
+    
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(18, 11), sharex=True)
+    
+    for color, (year, data) in zip(colors, cohorts.items()):
+        ax1.plot(x, [v * 100 for v in data['survival']], linewidth=2, color=color, label=year)
+    ax1.set_ylabel('存活比例 (%)', fontsize=13, fontweight='bold')
+    ax1.set_title('代码行存活曲线', fontsize=18, fontweight='bold', pad=20)
+    ax1.legend(loc='upper left', fontsize=9, ncol=2)
+    
+    ages = [r['median_age_days'] or 0 for r in releases]
+    ax2.fill_between(x, ages, alpha=0.3, color='#ed8936')
+    ax2.plot(x, ages, linewidth=2, color='#ed8936')
+    ax2.set_ylabel('代码年龄中位数 (天)', fontsize=13, fontweight='bold')
+    ax2.set_xlabel('版本', fontsize=13, fontweight='bold')
+    
+    for ax in (ax1, ax2):
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.grid(axis='y', alpha=0.3, linestyle='--')
+    
+    step = max(1, len(releases) // 30)
+    ax2.set_xticks(list(x)[::step])
+    ax2.set_xticklabels([r['tag'] for r in releases][::step], rotation=60, ha='right', fontsize=8)
+    
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/survival_curves.png', dpi=150, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"✓ 存活曲线: {output_dir}/survival_curves.png")
@@ -5,3 +5,30 @@ import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+import pytest
+
+
+def _git(repo, *args, env=None):
+    """在临时仓库中执行git命令"""
+    return subprocess.check_output(['git', *args], cwd=repo, encoding='utf-8', env=env)
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """创建一个带有若干提交的临时git仓库"""
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    _git(repo, 'init', '-q', '-b', 'main')
+    _git(repo, 'config', 'user.name', 'Alice|Dev')
+    _git(repo, 'config', 'user.email', 'alice@example.com')
+    
+    (repo / 'app.py').write_text('def f(x):\n    if x:\n        return 1\n    return 0\n')
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-q', '-m', 'feat: add app')
+    
+    (repo / 'README.md').write_text('# demo\n')
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-q', '-m', 'docs: add readme')
+    return repo
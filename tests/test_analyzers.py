@@ -1,9 +1,22 @@
 import os
 import sys
+import json
+import subprocess
 import pytest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.analyzers.ast_analyzer import deep_analyze_file, analyze_project_ast
+from src.analyzers.loc_counter import analyze_project_loc
+from src.analyzers.blob_cache import BlobMetricsCache
+from src.analyzers.release_timeline import build_release_timeline
+from src.analyzers.complexity_delta import analyze_complexity_deltas, fill_blob_metrics
+from src.analyzers.cochange_analyzer import CoChangeMatrix, load_or_build_cochange
+from src.analyzers.hotspot_analyzer import analyze_hotspots
+from src.analyzers.survival_analyzer import analyze_survival
+from src.collectors.numstat_collector import collect_changes
+from src.analyzers.identity import IdentityResolver, canonical_authors
+from src.analyzers.stats import get_author_stats
+from src.multi_repo import load_manifest, run_multi_repo
 
 def test_deep_analyze_file():
     """测试文件分析"""
@@ -18,6 +31,225 @@ def test_analyze_project():
     assert 'files' in result
     print("✓ test_analyze_project")
 
+def test_analyze_project_at_rev(git_repo):
+    """测试直接分析历史版本，不读取工作区"""
+    (git_repo / 'app.py').write_text('x = (\n')  # 工作区中的改动不应影响结果
+    
+    result = analyze_project_ast(str(git_repo), rev='HEAD~1')
+    assert result['summary']['total_files'] == 1
+    assert result['files'][0]['filepath'] == 'app.py'
+    
+    loc = analyze_project_loc(str(git_repo), rev='HEAD')
+    assert loc['files'] == 1
+    assert loc['total'] == 4
+    print("✓ test_analyze_project_at_rev")
+
+def test_release_timeline(git_repo, tmp_path):
+    """测试版本时间线 - 未变化的blob只分析一次，不指向提交的标签被跳过"""
+    subprocess.check_call(['git', 'tag', 'v1', 'HEAD~1'], cwd=git_repo)
+    subprocess.check_call(['git', 'tag', 'v2', 'HEAD'], cwd=git_repo)
+    # 指向blob的标签被跳过
+    subprocess.check_call(['git', 'tag', 'v3', 'HEAD:app.py'], cwd=git_repo)
+    
+    cache_file = str(tmp_path / 'blob_metrics.json.gz')
+    cache = BlobMetricsCache(cache_file)
+    timeline = build_release_timeline(str(git_repo), cache=cache)
+    assert [r['tag'] for r in timeline] == ['v1', 'v2']
+    assert timeline[1]['functions'] == 1 and timeline[1]['loc_total'] == 4
+    assert timeline[1]['max_complexity'] == 2
+    assert (cache.computed, cache.reused) == (1, 1)
+    
+    cache = BlobMetricsCache(cache_file)
+    build_release_timeline(str(git_repo), cache=cache)
+    assert cache.computed == 0
+    print("✓ test_release_timeline")
+
+def test_complexity_deltas(git_repo, tmp_path):
+    """测试逐提交复杂度变化 - 只统计修改过的Python文件，并行结果与串行一致，作者按身份合并"""
+    (git_repo / 'app.py').write_text('def f(x):\n    return 0\n\nclass A:\n    pass\n')
+    # 同一邮箱换了署名，仍是同一个作者
+    subprocess.check_call(['git', '-c', 'user.name=Alice', 'commit', '-q', '-am', 'refactor: simplify f'],
+                          cwd=git_repo)
+    
+    cache = BlobMetricsCache(str(tmp_path / 'blob_metrics.json.gz'))
+    result = analyze_complexity_deltas(str(git_repo), cache=cache, max_workers=2, batch_size=1)
+    deltas = [(c['complexity_delta'], c['functions_delta'], c['classes_delta'])
+              for c in result['commits']]
+    assert deltas == [(2, 1, 0), (-1, 0, 1)]
+    assert len(result['authors']) == 1
+    author = result['authors'][result['commits'][1]['author']]
+    assert (author['commits'], author['complexity_added'], author['complexity_removed']) == (2, 2, 1)
+    
+    resolver = IdentityResolver()
+    resolver.add('Alice', 'alice@example.com', count=2)
+    resolver.add('Alice|Dev', 'alice@example.com')
+    merged = analyze_complexity_deltas(str(git_repo), cache=cache, max_workers=1, resolver=resolver)
+    assert list(merged['authors']) == ['Alice']
+    # 读取失败的blob不计入新计算的数量
+    computed = cache.computed
+    assert fill_blob_metrics(str(git_repo), ['0' * 39 + '1'], cache) == 0
+    assert cache.computed == computed
+    
+    again = analyze_complexity_deltas(str(git_repo), cache=cache, max_workers=1)
+    assert again['commits'] == result['commits']
+    
+    # 改名为其他扩展名按删除计
+    subprocess.check_call(['git', 'mv', 'app.py', 'app.txt'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'chore: rename app'], cwd=git_repo)
+    renamed = analyze_complexity_deltas(str(git_repo), cache=cache, max_workers=1)
+    last = renamed['commits'][-1]
+    assert (last['complexity_delta'], last['functions_delta'], last['classes_delta']) == (-1, -1, -1)
+    print("✓ test_complexity_deltas")
+
+def test_cochange_matrix(git_repo, tmp_path):
+    """测试共同变更矩阵 - 跳过大提交、support/confidence、聚类和增量更新"""
+    matrix = CoChangeMatrix(max_files=3)
+    matrix.add_commit(['a.py', 'b.py'])
+    matrix.add_commit(['a.py', 'b.py', 'c.py'])
+    matrix.add_commit(['a.py'])
+    matrix.add_commit(['a.py', 'b.py', 'c.py', 'd.py'])
+    assert (matrix.commits, matrix.skipped) == (3, 1)
+    assert matrix.support('b.py', 'a.py') == 2
+    assert matrix.confidence('b.py', 'a.py') == 1.0
+    assert matrix.top_pairs(1)[0]['support'] == 2
+    assert matrix.clusters(min_support=1, min_confidence=0.5) == [['a.py', 'b.py', 'c.py']]
+    assert matrix.to_dependency_graph(min_support=2)['a.py'] == {'b.py'}
+    assert len(matrix.paths) == 3
+    
+    # 大部分文件对共现次数都不低于2时仍能把数量压到上限的一半
+    bounded = CoChangeMatrix(max_pairs=10)
+    for _ in range(2):
+        for i in range(8):
+            bounded.add_commit([f'f{i}.py', f'g{i}.py'])
+    for i in range(8):
+        bounded.add_commit([f'h{i}.py', f'k{i}.py'])
+    assert len(bounded) == 5
+    assert bounded.support('h7.py', 'k7.py') == 1
+    
+    filepath = str(tmp_path / 'cochange.json.gz')
+    (git_repo / 'app.py').write_text('x = 1\n')
+    (git_repo / 'README.md').write_text('# demo 2\n')
+    subprocess.check_call(['git', 'commit', '-q', '-am', 'chore: both'], cwd=git_repo)
+    built = load_or_build_cochange(str(git_repo), filepath, collect_changes(str(git_repo)))
+    assert built.support('app.py', 'README.md') == 1
+    
+    (git_repo / 'app.py').write_text('x = 2\n')
+    (git_repo / 'README.md').write_text('# demo 3\n')
+    subprocess.check_call(['git', 'commit', '-q', '-am', 'chore: both again'], cwd=git_repo)
+    updated = load_or_build_cochange(str(git_repo), filepath, collect_changes(str(git_repo)))
+    assert updated.support('app.py', 'README.md') == 2 and updated.commits == 4
+    print("✓ test_cochange_matrix")
+
+def test_hotspots(git_repo):
+    """测试热点分析 - 复杂度与修改次数按路径合并"""
+    (git_repo / 'lib.py').write_text('def g():\n    return 1\n')
+    (git_repo / 'app.py').write_text('def f(x):\n    if x and x > 1:\n        return 1\n    return 0\n')
+    subprocess.check_call(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'feat: lib'], cwd=git_repo)
+    
+    result = analyze_hotspots(str(git_repo), ast_results=analyze_project_ast(str(git_repo)))
+    files = {f['path']: f for f in result['files']}
+    assert files['app.py']['commits'] == 2 and files['app.py']['complexity_sum'] == 3
+    assert files['lib.py']['commits'] == 1
+    assert result['files'][0]['path'] == 'app.py' and result['files'][0]['score'] == 1.0
+    assert result['functions'][0]['function'] == 'f'
+    print("✓ test_hotspots")
+
+def test_survival(git_repo):
+    """测试行存活分析 - 第一个版本用blame取得真实时间，未修改的行沿用时间并跟随重命名"""
+    def commit(message, date):
+        env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+        subprocess.check_call(['git', 'add', '-A'], cwd=git_repo)
+        subprocess.check_call(['git', 'commit', '-q', '-m', message], cwd=git_repo, env=env)
+    
+    def tag_at(name, date):
+        env = dict(os.environ, GIT_COMMITTER_DATE=date)
+        subprocess.check_call(['git', 'tag', '-a', name, '-m', name], cwd=git_repo, env=env)
+    
+    (git_repo / 'app.py').write_text('def g(y):\n    if y:\n        return 10\n    return 20\n')
+    commit('feat: g', '2022-06-01T00:00:00+00:00')
+    tag_at('v1', '2023-01-01T00:00:00+00:00')
+    (git_repo / 'app.py').write_text('def g(y):\n    if y:\n        return 11\n    return 20\n')
+    (git_repo / 'app2.py').write_text('A = 1\nB = 2\nC = 3\nD = 4\n')
+    commit('feat: v2', '2023-06-01T00:00:00+00:00')
+    tag_at('v2', '2024-01-01T00:00:00+00:00')
+    (git_repo / 'pkg').mkdir()
+    (git_repo / 'app.py').rename(git_repo / 'pkg' / 'app.py')
+    (git_repo / 'pkg' / 'app.py').write_text('def g(y):\n    if y:\n        return 11\n    return 21\n')
+    commit('refactor: move app', '2024-06-01T00:00:00+00:00')
+    tag_at('v3', '2025-01-01T00:00:00+00:00')
+    
+    result = analyze_survival(str(git_repo))
+    v1, v2, v3 = result['releases']
+    # 第一个版本之前写入的行按blame的真实时间计
+    assert v1['cohorts'] == {'2022': 4} and v1['median_age_days'] == 214
+    # 修改过的行以版本日期计，新文件用blame
+    assert v2['cohorts'] == {'2022': 3, '2023': 4, '2024': 1}
+    # 重命名后仍沿用原来的时间
+    assert v3['cohorts'] == {'2022': 2, '2023': 4, '2024': 1, '2025': 1}
+    assert result['cohorts']['2022'] == {'added': 4, 'survival': [1.0, 0.75, 0.5]}
+    
+    bad = [{'tag': 'broken', 'hash': v1['tag'], 'date': 'not a date'},
+           {'tag': 'blob', 'hash': 'HEAD:app2.py', 'date': '2025-01-01T00:00:00+00:00'}]
+    assert analyze_survival(str(git_repo), tags=bad)['releases'] == []
+    print("✓ test_survival")
+
+def test_multi_repo(git_repo, tmp_path):
+    """测试多仓库批量分析 - 单个仓库失败不影响其他仓库，汇总对比表"""
+    manifest = tmp_path / 'repos.json'
+    manifest.write_text(json.dumps([
+        {'name': 'demo', 'path': str(git_repo)},
+        str(tmp_path / 'missing'),
+    ]))
+    repos = load_manifest(str(manifest))
+    assert [r['name'] for r in repos] == ['demo', 'missing']
+    
+    data_root, output_root = str(tmp_path / 'data'), str(tmp_path / 'output')
+    rows = run_multi_repo(str(manifest), max_workers=2, data_root=data_root,
+                          output_root=output_root, charts=False)
+    
+    assert rows[0]['name'] == 'demo'
+    assert rows[0]['total_commits'] == 2
+    assert rows[0]['functions'] == 1
+    assert 'error' in rows[1]
+    assert os.path.exists(os.path.join(data_root, 'demo', 'commits.csv'))
+    assert os.path.exists(os.path.join(output_root, 'comparison.csv'))
+    with open(os.path.join(output_root, 'comparison.json'), encoding='utf-8') as f:
+        assert [r['name'] for r in json.load(f)] == ['demo', 'missing']
+    print("✓ test_multi_repo")
+
+def test_identity_resolver():
+    """测试作者身份合并 - 共享邮箱/署名的身份合并，noreply邮箱不合并"""
+    commits = [
+        {'author': 'Alice', 'email': 'alice@home.org', 'co_authors': []},
+        {'author': 'alice', 'email': 'alice@work.com', 'co_authors': ['Bob <bob@x.com>']},
+        {'author': 'Alice', 'email': 'alice@work.com', 'co_authors': []},
+        {'author': 'Bob B', 'email': 'BOB@x.com', 'co_authors': ['Alice <alice@home.org>']},
+        {'author': 'root', 'email': 'noreply@github.com', 'co_authors': []},
+        {'author': 'Carol', 'email': 'noreply@github.com', 'co_authors': []},
+        {'author': 'root', 'email': 'ops@x.com', 'co_authors': float('nan')},
+    ]
+    resolver = IdentityResolver.from_commits(commits)
+    assert len(resolver) == 5
+    assert resolver.resolve('alice', 'alice@work.com') == resolver.resolve('Alice', 'alice@home.org')
+    assert resolver.resolve('Bob', 'bob@x.com') == resolver.resolve('Bob B', 'BOB@x.com')
+    assert resolver.resolve('Carol', 'noreply@github.com') != resolver.resolve('root', 'noreply@github.com')
+    
+    stats = get_author_stats(commits, resolver)
+    assert stats['Alice'] == 4
+    assert stats['Bob'] == 2 or stats['Bob B'] == 2
+    assert get_author_stats(commits, co_authors=False)['Alice'] == 3
+    # 署名相同的不同身份各自计数，不会互相覆盖
+    assert stats['root <noreply@github.com>'] == 1 and stats['root <ops@x.com>'] == 1
+    
+    # resolver由其他提交构建时，未知身份按原署名计数；从CSV读回的邮箱可能是NaN
+    others = [{'author': 'Dave', 'email': float('nan'), 'co_authors': []},
+              {'author': 'alice', 'email': 'alice@work.com', 'co_authors': []}]
+    assert get_author_stats(others, resolver) == {'Dave': 1, 'Alice': 1}
+    assert canonical_authors(others, resolver) == ['Dave', 'Alice']
+    assert IdentityResolver.from_commits(others).resolve('Dave', float('nan')) is not None
+    print("✓ test_identity_resolver")
+
 if __name__ == '__main__':
     test_deep_analyze_file()
     test_analyze_project()
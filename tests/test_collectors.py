@@ -3,7 +3,35 @@ import sys
 import pytest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.collectors.git_collector import get_commits
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import time
+from urllib.parse import urlparse, parse_qs
+
+import requests
+import pandas as pd
+
+from src.collectors.git_collector import get_commits, iter_commits, iter_log_records, sync_commits
+from src.collectors.git_collector import get_file_inventory, get_size_history, get_file_stats
+from src.collectors.numstat_collector import collect_changes, ChangeTable
+from src.collectors.diff_collector import get_insertions_deletions
+from src.collectors.blame_collector import get_project_blame, get_file_authors, blame_cache_file
+from src.analyzers.identity import IdentityResolver
+from src.collectors.tag_collector import get_all_tags_info
+from src.collectors import branch_collector
+from src.collectors.branch_collector import get_branch_inventory, get_branches
+from src.collectors.object_store import ObjectStore
+from src.collectors import release_index
+from src.collectors.release_index import load_or_build_release_index
+from src.collectors.file_history import load_or_build_file_history
+from src.collectors.commit_graph import build_commit_graph
+from src.utils.file_provider import FileProvider, GitTreeProvider
+from src.collectors.http_client import HttpClient
+from src.collectors.rate_limiter import RateLimitScheduler, get_scheduler
+from src.collectors.issues_collector_full import IssuesCollectorFull
+from src.exceptions import APIError, GitError, RateLimitError
 
 @pytest.mark.skipif(not os.path.exists('.git'), reason="需要git仓库")
 def test_get_commits():
@@ -24,6 +52,597 @@ def test_commit_fields():
             assert field in c, f"缺少字段: {field}"
     print("✓ test_commit_fields 通过")
 
+def test_iter_commits_stream(git_repo):
+    """测试流式读取 - 作者名中包含|也能正确解析"""
+    stream = iter_commits(str(git_repo))
+    first = next(stream)
+    assert first['author'] == 'Alice|Dev'
+    assert first['message'] == 'docs: add readme'
+    rest = list(stream)
+    assert [c['message'] for c in rest] == ['feat: add app']
+
+def test_iter_log_records_errors(git_repo, capsys):
+    """测试git失败时输出错误信息，提前结束迭代时不报错"""
+    assert list(iter_log_records(str(git_repo), ['git', 'log', 'no-such-rev', '--'])) == []
+    assert 'no-such-rev' in capsys.readouterr().out
+    
+    # 大量stderr输出不会阻塞stdout的读取
+    script = 'import sys; sys.stderr.write("x" * 1000000); print("\\x1ea\\x1eb")'
+    assert list(iter_log_records(str(git_repo), [sys.executable, '-c', script])) == ['a', 'b\n']
+    
+    stream = iter_log_records(str(git_repo), ['git', 'log', '--format=%x1e%H'])
+    next(stream)
+    stream.close()
+    assert capsys.readouterr().out == ''
+
+def test_co_author_trailers_and_mailmap(git_repo):
+    """测试同一次git log中取出Co-authored-by和.mailmap规范身份"""
+    (git_repo / '.mailmap').write_text('Alice <alice@example.com>\n')
+    subprocess.check_output(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_output(
+        ['git', 'commit', '-q', '-m', 'chore: mailmap\n\nCo-authored-by: Bob <bob@example.com>'],
+        cwd=git_repo)
+    commits = list(iter_commits(str(git_repo)))
+    assert commits[0]['author'] == 'Alice'
+    assert commits[0]['co_authors'] == ['Bob <bob@example.com>']
+    assert commits[1]['co_authors'] == []
+
+def test_sync_commits_incremental(git_repo, tmp_path):
+    """测试增量同步 - 新提交插入文件开头，与普通运行顺序一致，历史改写时全量重建"""
+    out = str(tmp_path / 'data')
+    assert len(sync_commits(str(git_repo), out)) == 2
+    
+    (git_repo / 'b.py').write_text('x = 1\n')
+    subprocess.check_call(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'feat: b'], cwd=git_repo)
+    commits = sync_commits(str(git_repo), out)
+    assert [c['message'] for c in commits][0] == 'feat: b'
+    with open(os.path.join(out, 'commits.json'), encoding='utf-8') as f:
+        stored = json.load(f)
+    assert stored == commits and stored[0]['message'] == 'feat: b'
+    csv_hashes = pd.read_csv(os.path.join(out, 'commits.csv'), encoding='utf-8-sig')['hash']
+    assert list(csv_hashes) == [c['hash'] for c in commits]
+    
+    # 同步状态丢失或与文件不一致时重建，不会重复追加
+    os.remove(os.path.join(out, '.commits_sync.json'))
+    assert len(sync_commits(str(git_repo), out)) == 3
+    (git_repo / 'c.py').write_text('y = 1\n')
+    subprocess.check_call(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'feat: c'], cwd=git_repo)
+    assert [c['message'] for c in sync_commits(str(git_repo), out)][:2] == ['feat: c', 'feat: b']
+    with open(os.path.join(out, 'commits.json'), encoding='utf-8') as f:
+        stored = json.load(f)
+    assert [c['message'] for c in stored][:2] == ['feat: c', 'feat: b'] and len(stored) == 4
+    subprocess.check_call(['git', 'reset', '-q', '--hard', 'HEAD~1'], cwd=git_repo)
+    
+    subprocess.check_call(['git', 'commit', '-q', '--amend', '-m', 'feat: b2'], cwd=git_repo)
+    commits = sync_commits(str(git_repo), out)
+    assert len(commits) == 3 and commits[0]['message'] == 'feat: b2'
+
+def test_collect_changes(git_repo, tmp_path):
+    """测试一次遍历采集变更 - 包括重命名和blob id"""
+    subprocess.check_call(['git', 'mv', 'app.py', 'main.py'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'refactor: rename'], cwd=git_repo)
+    
+    table = collect_changes(str(git_repo))
+    assert table.num_commits == 3
+    first = table.changes_for_commit(table.hashes[0])[0]
+    assert first['path'] == 'app.py' and first['status'] == 'A'
+    assert first['additions'] == 4 and first['old_blob'] is None
+    renamed = table.changes_for_commit(table.head)[0]
+    assert renamed['status'] == 'R' and renamed['old_path'] == 'app.py'
+    assert renamed['new_blob'] == first['new_blob']
+    assert get_insertions_deletions(str(git_repo), table.hashes[0], table) == (4, 0)
+    
+    path = str(tmp_path / 'changes.json.gz')
+    table.save(path)
+    loaded = ChangeTable.load(path)
+    assert loaded.changes_for_path('main.py') == table.changes_for_path('main.py')
+    assert loaded.churn_by_file()['app.py']['additions'] == 4
+
+def test_project_blame_cache(git_repo, tmp_path):
+    """测试全仓库blame - 第二次运行全部命中缓存"""
+    cache_file = str(tmp_path / 'blame.json')
+    result = get_project_blame(str(git_repo), max_workers=2, cache_file=cache_file)
+    assert result['files'] == 2 and result['lines'] == 5
+    assert result['authors'] == {'Alice|Dev': 5}
+    assert sum(result['age_histogram'].values()) == 5
+    assert get_file_authors(str(git_repo), 'app.py') == {'Alice|Dev': 4}
+    
+    again = get_project_blame(str(git_repo), max_workers=2, cache_file=cache_file)
+    assert again['by_file'] == result['by_file']
+    
+    resolver = IdentityResolver()
+    resolver.add('Alice|Dev', 'alice@example.com')
+    resolver.add('Alice', 'alice@example.com', count=5)
+    merged = get_project_blame(str(git_repo), max_workers=2, cache_file=cache_file, resolver=resolver)
+    assert merged['authors'] == {'Alice': 5}
+    
+    # 默认按仓库放在cache_dir下，键中包含统计的版本
+    cache_dir = str(tmp_path / 'blame')
+    get_project_blame(str(git_repo), max_workers=2, cache_dir=cache_dir)
+    per_repo = blame_cache_file(str(git_repo), cache_dir)
+    assert os.path.dirname(per_repo) == cache_dir and os.path.exists(per_repo)
+    assert blame_cache_file(str(tmp_path), cache_dir) != per_repo
+    with open(per_repo, encoding='utf-8') as f:
+        assert all(k.startswith(result['head']) for k in json.load(f)['entries'])
+    
+    # 无法解析的版本返回空结果而不是抛出异常
+    missing = get_project_blame(str(git_repo), rev='no-such-rev', cache_file=cache_file)
+    assert missing['head'] is None and missing['files'] == 0 and missing['by_file'] == {}
+
+def test_all_tags_info(git_repo):
+    """测试一次for-each-ref获取标签 - 区分附注/轻量标签并按版本排序，标签的标签剥离到提交"""
+    subprocess.check_call(['git', 'tag', '0.10.0', 'HEAD~1'], cwd=git_repo)
+    subprocess.check_call(['git', 'tag', '-a', '0.9.0', '-m', 'old release', 'HEAD~1'], cwd=git_repo)
+    subprocess.check_call(['git', 'tag', '-a', '0.10.1', '-m', 'Release 0.10.1'], cwd=git_repo)
+    
+    tags = get_all_tags_info(str(git_repo), sort='version')
+    assert [t['tag'] for t in tags] == ['0.9.0', '0.10.0', '0.10.1']
+    assert tags[1]['annotated'] is False and tags[1]['message'] == 'feat: add app'
+    assert tags[2]['annotated'] is True and tags[2]['message'] == 'Release 0.10.1'
+    head = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=git_repo, encoding='utf-8')
+    assert tags[2]['hash'] == head.strip()
+    
+    # 标签的标签剥离到最终的提交
+    subprocess.check_call(['git', 'tag', '-a', '0.10.2', '-m', 'retag', '0.10.1'], cwd=git_repo)
+    retag = {t['tag']: t for t in get_all_tags_info(str(git_repo))}['0.10.2']
+    assert retag['hash'] == head.strip() and retag['commit_date'] == tags[2]['commit_date']
+
+def test_branch_inventory(git_repo, monkeypatch):
+    """测试分支清单 - 提交数和相对默认分支的领先/落后数，日期无法解析时不报错"""
+    subprocess.check_call(['git', 'checkout', '-q', '-b', 'feature', 'HEAD~1'], cwd=git_repo)
+    (git_repo / 'f.py').write_text('y = 2\n')
+    subprocess.check_call(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'feat: f'], cwd=git_repo)
+    subprocess.check_call(['git', 'checkout', '-q', 'main'], cwd=git_repo)
+    
+    inventory = {b['name']: b for b in get_branch_inventory(str(git_repo))}
+    assert inventory['main']['is_default'] and inventory['main']['commits'] == 2
+    feature = inventory['feature']
+    assert (feature['commits'], feature['ahead'], feature['behind']) == (2, 1, 1)
+    assert sorted(get_branches(str(git_repo))) == ['feature', 'main']
+    
+    # 日期为空或无法解析的分支排在最后
+    refs = branch_collector._list_branch_refs(str(git_repo))
+    broken = [(name, ref, oid, '' if name == 'feature' else date) for name, ref, oid, date in refs]
+    monkeypatch.setattr(branch_collector, '_list_branch_refs', lambda repo: broken)
+    assert [b['name'] for b in get_branch_inventory(str(git_repo))] == ['main', 'feature']
+
+def _tag_at(repo, name, rev, date):
+    """创建指定日期的附注标签"""
+    env = dict(os.environ, GIT_COMMITTER_DATE=date)
+    subprocess.check_call(['git', 'tag', '-a', name, '-m', name, rev], cwd=repo, env=env)
+
+def test_release_index(git_repo, tmp_path, monkeypatch):
+    """测试发布归属索引 - 按祖先关系而不是标签日期排序，新标签增量追加"""
+    _tag_at(git_repo, 'v0.2', 'HEAD', '2024-02-01T00:00:00')
+    # 补打的标签：日期晚于v0.2，但指向v0.2的祖先
+    _tag_at(git_repo, 'v0.1', 'HEAD~1', '2024-06-01T00:00:00')
+    index_file = str(tmp_path / 'release_index.json')
+    commits = [c['hash'] for c in get_commits(str(git_repo))]
+    
+    index = load_or_build_release_index(str(git_repo), index_file)
+    assert [index.release_of(c) for c in commits] == ['v0.2', 'v0.1']
+    # 同一提交上的标签按时间（而不是日期字符串）排序
+    graph = release_index.read_tag_graph(str(git_repo), index.tags)
+    same = [{'tag': 'a', 'hash': commits[0], 'date': '2024-01-01T05:00:00+00:00'},
+            {'tag': 'b', 'hash': commits[0], 'date': '2024-01-01T10:00:00+08:00'}]
+    assert [t['tag'] for t in release_index.order_tags(graph, same)] == ['b', 'a']
+    
+    # 标签没有变化时不读取提交图
+    with monkeypatch.context() as m:
+        m.setattr(release_index, 'read_tag_graph', None)
+        assert load_or_build_release_index(str(git_repo), index_file).release_sizes() == index.release_sizes()
+    
+    (git_repo / 'b.py').write_text('b = 1\n')
+    subprocess.check_call(['git', 'add', '.'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'feat: b'], cwd=git_repo)
+    new_commit = get_commits(str(git_repo), max_count=1)[0]['hash']
+    assert load_or_build_release_index(str(git_repo), index_file).release_of(new_commit) is None
+    
+    _tag_at(git_repo, 'v0.3', 'HEAD', '2024-03-01T00:00:00')
+    index = load_or_build_release_index(str(git_repo), index_file)
+    assert index.release_of(new_commit) == 'v0.3'
+    assert list(index.release_sizes().items()) == [('v0.1', 1), ('v0.2', 1), ('v0.3', 1)]
+
+def test_file_history_index(git_repo, tmp_path):
+    """测试文件历史索引 - 跟随重命名、按时间范围二分查询、增量更新"""
+    env = dict(os.environ, GIT_AUTHOR_DATE='2030-01-01T00:00:00+00:00')
+    (git_repo / 'pkg').mkdir()
+    subprocess.check_call(['git', 'mv', 'app.py', 'pkg/app.py'], cwd=git_repo)
+    subprocess.check_call(['git', 'commit', '-q', '-m', 'refactor: move app'], cwd=git_repo, env=env)
+    
+    filepath = str(tmp_path / 'file_history.json.gz')
+    index = load_or_build_file_history(str(git_repo), filepath, collect_changes(str(git_repo)))
+    assert index.lineage('pkg/app.py') == ['app.py', 'pkg/app.py']
+    assert [h['path'] for h in index.history('pkg/app.py')] == ['app.py', 'pkg/app.py']
+    assert len(index.history('pkg/app.py', follow=False)) == 1
+    assert len(index.history('pkg/app.py', since='2029-12-31T00:00:00+00:00')) == 1
+    
+    (git_repo / 'pkg' / 'app.py').write_text('x = 1\n')
+    subprocess.check_call(['git', 'commit', '-q', '-am', 'feat: rewrite'], cwd=git_repo, env=env)
+    # 不传table时加载保存的变更表并增量更新
+    changes_file = str(tmp_path / 'changes.json.gz')
+    collect_changes(str(git_repo), 'HEAD~1').save(changes_file)
+    index = load_or_build_file_history(str(git_repo), filepath, changes_file=changes_file)
+    assert ChangeTable.load(changes_file).num_commits == 4
+    stats = index.stats('pkg/app.py', since='2029-12-31T00:00:00+00:00')
+    assert stats == {'commits': 2, 'additions': 1, 'deletions': 4}
+    assert index.stats('pkg/app.py')['commits'] == 3
+
+def test_object_store_packed(git_repo):
+    """测试纯Python对象库 - gc前后读取结果与git cat-file一致"""
+    lines = [f'line {i}\n' for i in range(500)]
+    for k in range(5):
+        lines[k * 7] = f'changed {k}\n'
+        (git_repo / 'big.txt').write_text(''.join(lines))
+        subprocess.check_call(['git', 'add', 'big.txt'], cwd=git_repo)
+        subprocess.check_call(['git', 'commit', '-q', '-m', f'c{k}'], cwd=git_repo)
+    
+    def check_all():
+        store = ObjectStore(str(git_repo))
+        listing = subprocess.check_output(
+            ['git', 'cat-file', '--batch-all-objects', '--batch-check'], cwd=git_repo, encoding='utf-8')
+        for line in listing.splitlines():
+            oid, obj_type, _ = line.split()
+            expected = subprocess.check_output(['git', 'cat-file', obj_type, oid], cwd=git_repo)
+            assert store.read(oid) == (obj_type, expected)
+        return store
+    
+    check_all()
+    subprocess.check_call(['git', 'gc', '-q', '--aggressive'], cwd=git_repo)
+    store = check_all()
+    head = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=git_repo, encoding='utf-8').strip()
+    assert store.resolve_commit('main') == head
+    files = {path: oid for path, _, oid in store.walk_tree(store.resolve_tree('HEAD'))}
+    assert store.read_blob(files['big.txt']).decode().startswith('changed 0')
+    
+    # 缩写hash、rev:path 交给 git rev-parse
+    assert store.resolve_commit(head[:7]) == head
+    assert store.resolve_tree(f'{head[:7]}~0') == store.resolve_tree('HEAD')
+    assert store.resolve('HEAD:big.txt') == files['big.txt']
+    with pytest.raises(GitError):
+        store.resolve('no-such-branch')
+    # packed-refs 变化后重新读取
+    subprocess.check_call(['git', 'tag', 'v9', 'HEAD~1'], cwd=git_repo)
+    subprocess.check_call(['git', 'pack-refs', '--all'], cwd=git_repo)
+    assert store.resolve_commit('v9') == store.resolve_commit('HEAD~1')
+    
+    provider = GitTreeProvider(str(git_repo), head[:7], store=store)
+    assert provider.blob_id('big.txt') == files['big.txt']
+    with pytest.raises(TypeError):
+        FileProvider()
+
+def test_file_inventory(git_repo, tmp_path):
+    """测试按扩展名统计字节数，结果按tree id缓存"""
+    cache_dir = str(tmp_path / 'inventory')
+    inventory = get_file_inventory(str(git_repo), cache_dir=cache_dir)
+    assert inventory['files'] == 2
+    assert inventory['by_extension']['.py'] == {'files': 1, 'bytes': 50}
+    assert inventory['by_extension']['.md'] == {'files': 1, 'bytes': 7}
+    assert inventory['largest'][0]['path'] == 'app.py'
+    assert os.listdir(cache_dir) == [f"{inventory['tree']}.json"]
+    assert get_file_inventory(str(git_repo), cache_dir=cache_dir) == inventory
+    
+    history = get_size_history(str(git_repo), cache_dir=cache_dir)
+    assert [p['bytes'] for p in history] == [50, 57]
+    assert get_file_inventory(str(git_repo), rev='nonexistent', cache_dir=cache_dir) is None
+    assert get_file_inventory('/nonexistent', cache_dir=cache_dir) is None
+    assert get_file_stats('/nonexistent') == {}
+
+
+def test_commit_graph(git_repo):
+    """测试提交图 - 与git merge-base / rev-list 的结果一致"""
+    def git(*args):
+        return subprocess.check_output(['git', *args], cwd=git_repo, encoding='utf-8').strip()
+    
+    base = git('rev-parse', 'HEAD')
+    git('checkout', '-q', '-b', 'feature')
+    (git_repo / 'b.py').write_text('B = 1\n')
+    git('add', '.')
+    git('commit', '-q', '-m', 'feat: b')
+    feature = git('rev-parse', 'HEAD')
+    git('checkout', '-q', 'main')
+    (git_repo / 'c.py').write_text('C = 1\n')
+    git('add', '.')
+    git('commit', '-q', '-m', 'feat: c')
+    main_tip = git('rev-parse', 'HEAD')
+    git('merge', '-q', '--no-ff', '-m', 'merge feature', 'feature')
+    merge = git('rev-parse', 'HEAD')
+    
+    graph = build_commit_graph(str(git_repo))
+    assert len(graph) == 5
+    assert graph.is_merge(merge) and not graph.is_merge(feature)
+    assert graph.generation(merge) == 4
+    assert graph.first_parent(merge) == [merge, main_tip, base, git('rev-parse', 'HEAD~3')]
+    assert graph.merge_base(feature, main_tip) == git('merge-base', feature, main_tip) == base
+    assert graph.merge_base(merge, feature) == feature
+    assert graph.is_ancestor(base, merge) and graph.is_ancestor(feature, merge)
+    assert not graph.is_ancestor(feature, main_tip)
+    expected = git('rev-list', '--topo-order', f'{base}..{merge}').split()
+    assert sorted(graph.commits_between(base, merge)) == sorted(expected)
+    assert graph.commits_between(merge, base) == []
+    for a, b in [(feature, main_tip), (main_tip, feature), (merge, base), (feature, feature)]:
+        left, right = git('rev-list', '--left-right', '--count', f'{a}...{b}').split()
+        assert graph.ahead_behind(a, b) == (int(left), int(right))
+    assert graph.ancestor_count(merge) == 5
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    """返回固定内容的测试服务器，If-None-Match匹配时返回304"""
+    hits = []
+    
+    def do_GET(self):
+        etag = '"v1"'
+        if self.headers.get('If-None-Match') == etag:
+            self.hits.append(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.hits.append(200)
+        body = json.dumps([{'number': 1, 'path': self.path}]).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_http_client_conditional_requests(tmp_path):
+    """测试ETag条件请求 - 未变化的页面由304应答并返回本地副本"""
+    server = HTTPServer(('127.0.0.1', 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/items'
+    try:
+        client = HttpClient(cache_dir=str(tmp_path / 'http'))
+        first = client.get(url, params={'page': 1})
+        again = client.get(url, params={'page': 1})
+        other = client.get(url, params={'page': 2})
+    finally:
+        server.shutdown()
+    
+    assert _ETagHandler.hits == [200, 304, 200]
+    assert not first.from_cache and again.from_cache
+    assert again.status_code == 200
+    assert again.json() == first.json() == [{'number': 1, 'path': '/items?page=1'}]
+    assert other.json()[0]['path'] == '/items?page=2'
+    assert client.requests == 3 and client.not_modified == 1
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self._data = data
+        self.headers = {}
+    
+    def json(self):
+        return self._data
+
+
+class _FakeClient:
+    """按URL返回预设页面，记录请求参数"""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+    
+    def get(self, url, params=None):
+        self.calls.append((url.rsplit('/', 1)[1], dict(params)))
+        return _FakeResponse(self.pages[url.rsplit('/', 1)[1]].pop(0))
+    
+    def iter_pages(self, url, params=None, start=1):
+        page = start
+        while self.pages[url.rsplit('/', 1)[1]]:
+            yield page, self.get(url, dict(params, page=page)).json()
+            page += 1
+
+
+def _gh_item(number, state, updated_at, pr=False):
+    item = {'number': number, 'title': f't{number}', 'state': state, 'user': {'login': 'alice'},
+            'created_at': '2024-01-01T00:00:00Z', 'updated_at': updated_at, 'labels': []}
+    if pr:
+        item['pull_request'] = {}
+    return item
+
+
+def test_incremental_issue_sync(tmp_path):
+    """测试增量同步 - 按水位请求，按number追加更新，PR遇到旧记录即停止"""
+    collector = IssuesCollectorFull('owner/repo')
+    collector.data_dir = str(tmp_path)
+    collector.sync_file = str(tmp_path / '.issues_sync.json')
+    (tmp_path / '.issues_sync.json').write_text(json.dumps(
+        {'issues': '2024-02-01T00:00:00Z', 'prs': '2024-02-01T00:00:00Z'}))
+    (tmp_path / 'issues.json').write_text(json.dumps([
+        IssuesCollectorFull._issue_record(_gh_item(1, 'open', '2024-01-15T00:00:00Z')),
+        IssuesCollectorFull._issue_record(_gh_item(3, 'open', '2024-01-20T00:00:00Z')),
+    ]))
+    (tmp_path / 'pull_requests.json').write_text(json.dumps([
+        IssuesCollectorFull._pr_record(_gh_item(4, 'open', '2024-01-10T00:00:00Z')),
+    ]))
+    collector.client = _FakeClient({
+        'issues': [[_gh_item(1, 'closed', '2024-02-03T00:00:00Z'),
+                    _gh_item(2, 'open', '2024-02-04T00:00:00Z'),
+                    _gh_item(9, 'open', '2024-02-05T00:00:00Z', pr=True)]],
+        'pulls': [[_gh_item(5, 'open', '2024-02-06T00:00:00Z'),
+                   _gh_item(4, 'closed', '2024-01-10T00:00:00Z')] + [
+                   _gh_item(n, 'closed', '2023-01-01T00:00:00Z') for n in range(10, 108)]],
+    })
+    
+    issues = collector.sync_issues()
+    # 更新过的记录以日志中最后写入的位置为准
+    assert [(i['number'], i['state']) for i in issues] == [(3, 'open'), (1, 'closed'), (2, 'open')]
+    assert collector.client.calls[0][1]['since'] == '2024-02-01T00:00:00Z'
+    
+    prs = collector.sync_prs()
+    assert [p['number'] for p in prs] == [4, 5]
+    assert len(collector.client.calls) == 2
+    assert (tmp_path / 'pull_requests.jsonl').read_text().count('\n') == 2
+    
+    with open(collector.sync_file) as f:
+        assert json.load(f) == {'issues': '2024-02-05T00:00:00Z', 'prs': '2024-02-06T00:00:00Z'}
+
+
+class _ScriptedClient:
+    """每次iter_pages调用按脚本返回若干页，之后可选地抛出异常"""
+    
+    def __init__(self, script):
+        self.script = script
+        self.starts = []
+    
+    def iter_pages(self, url, params=None, start=1):
+        self.starts.append(start)
+        step = self.script.pop(0)
+        for page, data in enumerate(step.get('pages', []), start):
+            yield page, data
+        if 'error' in step:
+            raise step['error']
+
+
+def test_issue_sync_failures(tmp_path, monkeypatch):
+    """测试同步中断 - 全量获取未完成时不记录水位，网络错误退避后从中断的页码续传"""
+    collector = IssuesCollectorFull('owner/repo')
+    collector.data_dir = str(tmp_path)
+    collector.sync_file = str(tmp_path / '.issues_sync.json')
+    collector.progress_file = str(tmp_path / '.fetch_progress.json')
+    monkeypatch.setattr(collector, '_exponential_backoff', lambda attempt: None)
+    
+    def sync_state():
+        return collector._load_sync_state().get('issues')
+    
+    collector.client = _ScriptedClient([
+        {'pages': [[_gh_item(1, 'open', '2024-01-01T00:00:00Z')]]},
+        {'pages': [[_gh_item(2, 'closed', '2024-03-01T00:00:00Z')]], 'error': APIError('boom')},
+    ])
+    collector.sync_issues()
+    assert sync_state() is None
+    assert collector._load_progress() == {'issues_open': 1, 'issues_closed': 2}
+    
+    collector.client = _ScriptedClient([
+        {'pages': [[_gh_item(1, 'open', '2024-01-01T00:00:00Z')]]},
+        {'error': requests.ConnectionError('reset')},
+        {'pages': [[_gh_item(3, 'closed', '2024-02-01T00:00:00Z')]]},
+    ])
+    issues = collector.sync_issues()
+    assert collector.client.starts == [1, 2, 2]
+    assert sorted(i['number'] for i in issues) == [1, 2, 3]
+    assert sync_state() == '2024-03-01T00:00:00Z'
+    
+    collector.client = _ScriptedClient([
+        {'pages': [[_gh_item(1, 'closed', '2024-04-01T00:00:00Z')]],
+         'error': requests.Timeout('slow')},
+        {'pages': [[_gh_item(4, 'open', '2024-04-02T00:00:00Z')]]},
+    ])
+    collector.sync_issues()
+    assert collector.client.starts == [1, 2]
+    assert sync_state() == '2024-04-02T00:00:00Z'
+    print("✓ test_issue_sync_failures")
+
+
+class _PagedHandler(BaseHTTPRequestHandler):
+    """5页的分页接口，页码越小响应越慢，X-RateLimit-Remaining每次减1"""
+    remaining = 1000
+    lock = threading.Lock()
+    
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query)['page'][0])
+        time.sleep((6 - page) * 0.02)
+        with self.lock:
+            type(self).remaining -= 1
+            remaining = self.remaining
+        body = json.dumps([page]).encode()
+        self.send_response(200)
+        self.send_header('Link', f'<http://{self.headers["Host"]}/items?page=5>; rel="last"')
+        self.send_header('X-RateLimit-Remaining', str(remaining))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_iter_pages_concurrent(tmp_path):
+    """测试并发分页 - 按Link头获取其余页面，按页码顺序返回，额度紧张时逐页请求而不中断"""
+    server = HTTPServer(('127.0.0.1', 0), _PagedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/items'
+    try:
+        client = HttpClient(cache_dir=None)
+        pages = list(client.iter_pages(url, max_workers=4))
+        assert pages == [(1, [1]), (2, [2]), (3, [3]), (4, [4]), (5, [5])]
+        assert list(client.iter_pages(url, start=4)) == [(4, [4]), (5, [5])]
+        
+        _PagedHandler.remaining = 13
+        seen = [page for page, _ in client.iter_pages(url, reserve=10)]
+        assert seen == [1, 2, 3, 4, 5]
+    finally:
+        server.shutdown()
+
+
+class _FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _LimitResponse:
+    def __init__(self, status_code=200, remaining=None, reset=None, retry_after=None, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+        if remaining is not None:
+            self.headers['X-RateLimit-Remaining'] = str(remaining)
+            self.headers['X-RateLimit-Reset'] = str(reset)
+        if retry_after is not None:
+            self.headers['Retry-After'] = str(retry_after)
+
+
+def test_rate_limit_scheduler():
+    """测试限流调度 - 额度均匀分布到重置时间，额度用完或Retry-After时换token"""
+    clock = _FakeClock()
+    scheduler = RateLimitScheduler(['a'], clock=clock, sleep=clock.sleep)
+    assert scheduler.acquire() == 'a' and scheduler.available() is None
+    assert not scheduler.update('a', _LimitResponse(remaining=10, reset=1100))
+    assert scheduler.available() == 10
+    for _ in range(3):
+        scheduler.acquire()
+    # 剩余10次、100秒后重置：每11秒左右一个请求，不会一次打满
+    assert 20 <= clock.now - 1000 <= 25
+    
+    clock = _FakeClock()
+    scheduler = RateLimitScheduler(['a', 'b'], clock=clock, sleep=clock.sleep)
+    assert scheduler.update('a', _LimitResponse(403, remaining=0, reset=1500))
+    assert scheduler.update('b', _LimitResponse(429, retry_after=30))
+    assert not scheduler.update('b', _LimitResponse(403, text='Resource not accessible'))
+    assert scheduler.acquire() == 'b'
+    assert clock.now == 1030
+    assert not scheduler.update('b', _LimitResponse(remaining=0, reset=1800))
+    assert scheduler.acquire() == 'a'
+    assert clock.now == 1500 and scheduler.waited == 500
+    
+    # 同一token的客户端共用调度器；只有额度用完或带Retry-After的403才算限流
+    assert HttpClient('t', cache_dir=None).scheduler is HttpClient('t', cache_dir=None).scheduler
+    assert get_scheduler(['t']) is get_scheduler(['t']) is not get_scheduler(['u'])
+    with pytest.raises(RateLimitError):
+        HttpClient._check(_LimitResponse(403, remaining=0, reset=1500), 1)
+    with pytest.raises(RateLimitError):
+        HttpClient._check(_LimitResponse(403, retry_after=30), 1)
+    with pytest.raises(APIError) as exc:
+        HttpClient._check(_LimitResponse(403, remaining=4000, reset=1500), 1)
+    assert not isinstance(exc.value, RateLimitError)
+
 if __name__ == '__main__':
     test_get_commits()
     test_commit_fields()
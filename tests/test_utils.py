@@ -3,6 +3,9 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.utils.helpers import safe_divide, format_number, truncate_str
+from src.utils.cache import LRUCache
+from src.utils import record_log
+from src.utils.record_log import RecordLog, load_records
 
 def test_safe_divide():
     """测试安全除法"""
@@ -23,8 +26,55 @@ def test_truncate_str():
     assert len(result) == 50
     print("✓ test_truncate_str")
 
+def test_lru_cache():
+    """测试LRU缓存按字节数淘汰"""
+    cache = LRUCache(max_bytes=10)
+    cache.put('a', b'12345')
+    cache.put('b', b'12345')
+    assert cache.get('a') == b'12345'
+    cache.put('c', b'123')
+    assert 'b' not in cache and 'a' in cache
+    cache.put('big', b'x' * 20)
+    assert 'big' not in cache
+    print("✓ test_lru_cache")
+
+def test_record_log(tmp_path, monkeypatch):
+    """测试追加日志 - 同键以最后写入为准，索引续扫尾部，忽略不完整行，压缩去重"""
+    path = str(tmp_path / 'issues.jsonl')
+    log = RecordLog(path)
+    assert log.append([{'number': 1, 'state': 'open'}, {'number': 2, 'state': 'open'}]) == 2
+    log.close()
+    assert log.append([{'number': 1, 'state': 'closed'}]) == 0
+    with open(path, 'a') as f:
+        f.write('{"number": 3, "sta')
+    
+    reopened = RecordLog(path)
+    assert len(reopened) == 2 and reopened.lines == 3
+    assert reopened.get(1) == {'number': 1, 'state': 'closed'}
+    assert load_records(path) == [{'number': 2, 'state': 'open'}, {'number': 1, 'state': 'closed'}]
+    assert reopened.append([{'number': 3, 'state': 'open'}]) == 1
+    assert [r['number'] for r in load_records(path)] == [2, 1, 3]
+    
+    monkeypatch.setattr(record_log, 'COMPACT_MIN_LINES', 4)
+    reopened.append([{'number': 2, 'state': 'closed'}] * 3)
+    with open(path) as f:
+        assert len(f.readlines()) == 3
+    assert [(r['number'], r['state']) for r in RecordLog(path)] == [
+        (1, 'closed'), (3, 'open'), (2, 'closed')]
+    
+    # 中间损坏的完整行只跳过自己，追加时不截断其后的记录
+    corrupt = str(tmp_path / 'corrupt.jsonl')
+    with open(corrupt, 'w') as f:
+        f.write('{"number": 0}\n{"numb\n{"number": 2}\n{"number": 3}\n')
+    log = RecordLog(corrupt)
+    assert log.corrupt == 1
+    log.append([{'number': 9}])
+    assert [r['number'] for r in load_records(corrupt)] == [0, 2, 3, 9]
+    print("✓ test_record_log")
+
 if __name__ == '__main__':
     test_safe_divide()
     test_format_number()
     test_truncate_str()
+    test_lru_cache()
     print("\nutils测试全部通过！")